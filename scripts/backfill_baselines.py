@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backfill historical baselines
+Computes the baseline that was in effect on every day of a date range
+(trailing lookback window before each day) and saves it to the Baseline table
+
+Usage:
+    python scripts/backfill_baselines.py --start 2025-01-01 --end 2025-12-31
+    python scripts/backfill_baselines.py --start 2025-01-01 --end 2025-12-31 --metrics error_rate cpu_utilization
+    python scripts/backfill_baselines.py --start 2025-06-01 --end 2025-06-30 --backend local
+
+Re-run the same command after an interruption to resume from the checkpoint.
+Finished chunks stay in the checkpoint; delete the file to recompute them.
+"""
+
+import os
+import sys
+import argparse
+from datetime import date
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.baseline.calculator import BaselineCalculator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the daily baseline history of configured metrics")
+    parser.add_argument('--start', required=True, type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument('--end', default=date.today(), type=date.fromisoformat,
+                        help="Last day, inclusive (YYYY-MM-DD, default: today)")
+    parser.add_argument('--metrics', nargs='+', help="Metric names (default: all enabled metrics)")
+    parser.add_argument('--lookback-days', type=int, help="Window length in days (default: baseline.lookback_days)")
+    parser.add_argument('--backend', choices=['bigquery', 'local'], help="Backend (default: baseline.backend)")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: baseline.backfill.checkpoint_path)")
+    args = parser.parse_args()
+
+    calculator = BaselineCalculator(backend=args.backend)
+    try:
+        written = calculator.backfill_baselines(
+            args.start, args.end,
+            metric_names=args.metrics,
+            lookback_days=args.lookback_days,
+            checkpoint_path=args.checkpoint
+        )
+    except Exception as e:
+        print(f"[ERROR] Backfill stopped: {e}")
+        print("Re-run the same command to resume from the last finished chunk")
+        sys.exit(1)
+
+    print(f"\n[OK] Backfill complete: {written:,} baselines written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detect regime shifts and recalculate the affected baselines
+Finds metrics and segments whose daily mean shifted permanently (e.g. after
+a migration) and saves new baselines for those series only
+
+Usage:
+    python scripts/detect_regime_shifts.py
+    python scripts/detect_regime_shifts.py --metrics cpu_utilization --lookback-days 90
+    python scripts/detect_regime_shifts.py --backend local --dry-run
+"""
+
+import os
+import sys
+import argparse
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.baseline.calculator import BaselineCalculator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalculate the baselines of series with a regime shift")
+    parser.add_argument('--metrics', nargs='+', help="Metric names (default: all enabled metrics)")
+    parser.add_argument('--lookback-days', type=int,
+                        help="Days of daily means (default: baseline.changepoint.lookback_days)")
+    parser.add_argument('--backend', choices=['bigquery', 'local'], help="Backend (default: baseline.backend)")
+    parser.add_argument('--dry-run', action='store_true', help="Only report shifts, do not save baselines")
+    args = parser.parse_args()
+
+    calculator = BaselineCalculator(backend=args.backend)
+    if args.dry_run:
+        shifts = calculator.detect_regime_shifts(args.metrics, args.lookback_days)
+    else:
+        shifts = calculator.refresh_shifted_baselines(args.metrics, args.lookback_days)
+
+    for shift in shifts:
+        migration = f"  migration {shift.migration_id}" if shift.migration_id else ""
+        print(f"  {shift.metric_name:<24} {shift.segment_key or '(all)':<40} "
+              f"{shift.change_date.isoformat()}  {shift.before_mean:.4g} -> {shift.after_mean:.4g} "
+              f"({shift.shift_sigma:+.1f} sigma){migration}")
+    print(f"\n[OK] {len(shifts):,} regime shifts{' (dry run)' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
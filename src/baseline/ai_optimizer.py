@@ -5,7 +5,7 @@ Uses Vertex AI Gemini to analyze data and recommend optimal baseline calculation
 
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 import pandas as pd
 import numpy as np
 from google.cloud import aiplatform
@@ -69,7 +69,7 @@ class AIBaselineOptimizer:
     def analyze_metric(
         self,
         metric_name: str,
-        data: pd.Series,
+        data: Union[np.ndarray, pd.Series],
         current_method: Optional[str] = None
     ) -> Dict[str, Any]:
         """
@@ -77,7 +77,8 @@ class AIBaselineOptimizer:
         
         Args:
             metric_name: Name of the metric
-            data: Time series data (pandas Series)
+            data: Time-ordered values (float64 NumPy array, e.g. from
+                  BaselineCalculator.sample_metric_values, or pandas Series)
             current_method: Current calculation method (if any)
         
         Returns:
@@ -133,19 +134,22 @@ class AIBaselineOptimizer:
         
         return recommendation
     
-    def _analyze_data_characteristics(self, data: pd.Series) -> Dict[str, Any]:
+    def _analyze_data_characteristics(self, data: Union[np.ndarray, pd.Series]) -> Dict[str, Any]:
         """
         Analyze statistical characteristics of the data
         """
+        values = np.asarray(data, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n = values.size
+        
         # Basic statistics
-        mean = float(data.mean())
-        std_dev = float(data.std())
+        mean = float(values.mean())
+        std_dev = float(values.std(ddof=1)) if n > 1 else 0.0
         cv = std_dev / mean if mean != 0 else 0  # Coefficient of variation
         
         # Trend analysis (simple linear regression)
-        x = np.arange(len(data))
-        z = np.polyfit(x, data, 1)
-        trend_slope = z[0]
+        x = np.arange(n)
+        trend_slope = float(np.polyfit(x, values, 1)[0]) if n > 1 else 0.0
         
         if abs(trend_slope) < 0.01 * mean:
             trend = "stable"
@@ -167,8 +171,13 @@ class AIBaselineOptimizer:
         else:
             volatility = "high"
         
-        # Distribution analysis
-        skewness = float(data.skew())
+        # Distribution analysis (adjusted Fisher-Pearson skewness, as pandas)
+        centered = values - mean
+        m2 = float(np.mean(centered ** 2))
+        skewness = 0.0
+        if n > 2 and m2 > 0:
+            g1 = float(np.mean(centered ** 3)) / m2 ** 1.5
+            skewness = g1 * np.sqrt(n * (n - 1)) / (n - 2)
         if abs(skewness) < 0.5:
             distribution = "normal"
         elif skewness > 0:
@@ -177,19 +186,19 @@ class AIBaselineOptimizer:
             distribution = "left_skewed"
         
         return {
-            'sample_count': len(data),
+            'sample_count': n,
             'mean': mean,
             'std_dev': std_dev,
             'coefficient_of_variation': cv,
             'trend': trend,
-            'trend_slope': float(trend_slope),
+            'trend_slope': trend_slope,
             'seasonality': seasonality,
             'volatility': volatility,
             'distribution': distribution,
-            'skewness': skewness,
-            'min': float(data.min()),
-            'max': float(data.max()),
-            'range': float(data.max() - data.min())
+            'skewness': float(skewness),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'range': float(values.max() - values.min())
         }
     
     def _get_ai_recommendation(
@@ -238,6 +247,12 @@ AVAILABLE BASELINE METHODS:
    - Cons: Requires more data, computationally expensive
    - Lookback: 60-180 days (multiple seasons)
 
+4. **robust_stats**: Median, MAD, IQR and trimmed mean/std dev
+   - Best for: Skewed data or data contaminated by past incidents/outliers
+   - Pros: Outliers do not inflate the baseline spread, same cost as simple_stats
+   - Cons: Doesn't handle trends or seasonality
+   - Lookback: 30-90 days
+
 CURRENT METHOD: {current_method or 'None'}
 
 TASK:
@@ -245,7 +260,7 @@ Analyze the data characteristics and recommend the BEST baseline calculation met
 
 RESPOND IN JSON FORMAT:
 {{
-  "recommended_method": "simple_stats|rolling_average|seasonal_decomposition",
+  "recommended_method": "simple_stats|rolling_average|seasonal_decomposition|robust_stats",
   "confidence": 0.85,
   "reasoning": "Detailed explanation of why this method is best for this data...",
   "parameters": {{
@@ -289,6 +304,7 @@ IMPORTANT:
         # Decision logic based on data characteristics
         volatility = characteristics['volatility']
         trend = characteristics['trend']
+        distribution = characteristics['distribution']
         sample_count = characteristics['sample_count']
         
         # Default to simple_stats
@@ -310,6 +326,13 @@ IMPORTANT:
             confidence = 0.85
             reasoning = f"Data shows {trend} trend. Rolling average will track the trend better than static baseline."
         
+        elif distribution != "normal":
+            method = "robust_stats"
+            lookback_days = 30
+            confidence = 0.80
+            reasoning = (f"Distribution is {distribution.replace('_', '-')}. Median/MAD baseline is not "
+                         f"inflated by the long tail or past incidents.")
+        
         elif sample_count > 10000:
             # Enough data for more sophisticated methods
             method = "seasonal_decomposition"
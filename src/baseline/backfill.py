@@ -0,0 +1,197 @@
+"""
+Historical Baseline Backfill
+
+Rebuilds the baseline that was in effect on every day of a past date
+range, e.g. to replay detectors against history. The baseline "as of"
+day D covers the lookback_days before D (D itself excluded) and is
+stored with calculated_at = D 00:00 UTC.
+
+- BigQuery: one query per source table and chunk of days. Rows are
+  bucketed per day once (moments and a KLL sketch per metric), and every
+  as-of day merges the day buckets of its window, so the raw data is read
+  once per chunk instead of once per day
+- Local: one sliding-window NumPy pass per metric; values are sorted by
+  day so each window is a contiguous slice, moments come from cumulative
+  sums and percentiles from the slice
+- Progress is checkpointed per (table, chunk) in a JSON file, and each
+  chunk is written with a run ID derived from the job, so an interrupted
+  backfill resumes where it stopped and a re-written chunk is not
+  appended twice. A finished job stays in the checkpoint, so running it
+  again does no work
+
+Only simple_stats baselines (mean, std dev, percentiles) are backfilled.
+"""
+
+import json
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.baseline import BaselineStats
+
+logger = logging.getLogger(__name__)
+
+
+def date_chunks(start: date, end: date, chunk_days: int) -> List[Tuple[date, date]]:
+    """Split [start, end] into consecutive (first, last) ranges of at most chunk_days days"""
+    if end < start:
+        raise ValueError(f"Backfill end {end} is before start {start}")
+    chunks = []
+    first = start
+    while first <= end:
+        last = min(first + timedelta(days=chunk_days - 1), end)
+        chunks.append((first, last))
+        first = last + timedelta(days=1)
+    return chunks
+
+
+def backfill_job_key(
+    start: date,
+    end: date,
+    lookback_days: int,
+    percentiles: List[float],
+    metrics: List[Dict[str, Any]]
+) -> str:
+    """Hash identifying a backfill job; a changed range, window or metric set starts over"""
+    inputs = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'lookback_days': lookback_days,
+        'percentiles': percentiles,
+        'metrics': [[m['name'], m['column'], m['table'], m.get('timestamp_column')] for m in metrics]
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def trailing_window_stats(
+    days: np.ndarray,
+    values: np.ndarray,
+    as_of_days: np.ndarray,
+    lookback_days: int,
+    percentiles: List[float]
+) -> Dict[str, Any]:
+    """
+    simple_stats of the trailing window before each as-of day
+
+    Args:
+        days: datetime64[D] day of each value
+        values: Values (NaN are ignored)
+        as_of_days: datetime64[D] days to compute a baseline for
+        lookback_days: Window length in days (the as-of day is excluded)
+        percentiles: Percentile ranks (0-100) to compute
+
+    Returns:
+        Dictionary of (len(as_of_days),) arrays: mean, std_dev, min_value,
+        max_value, sample_count, plus quantiles mapping each rank (and
+        0/100) to an array; NaN where the window is empty
+    """
+    days = np.asarray(days, dtype='datetime64[D]')
+    values = np.asarray(values, dtype=np.float64)
+    as_of_days = np.asarray(as_of_days, dtype='datetime64[D]')
+    valid = ~np.isnan(values) & ~np.isnat(days)
+    days, values = days[valid], values[valid]
+
+    order = np.argsort(days, kind='stable')
+    days, values = days[order], values[order]
+    lower = np.searchsorted(days, as_of_days - np.timedelta64(lookback_days, 'D'), side='left')
+    upper = np.searchsorted(days, as_of_days, side='left')
+
+    # Centered cumulative sums: every window's moments in one pass
+    shift = values.mean() if values.size else 0.0
+    centered = values - shift
+    cumulative = np.concatenate([[0.0], np.cumsum(centered)])
+    cumulative_sq = np.concatenate([[0.0], np.cumsum(centered * centered)])
+    count = (upper - lower).astype(np.float64)
+    total = cumulative[upper] - cumulative[lower]
+    total_sq = cumulative_sq[upper] - cumulative_sq[lower]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centered_mean = total / count
+        variance = (total_sq - total * centered_mean) / (count - 1)
+    std_dev = np.where(count > 1, np.sqrt(np.clip(variance, 0.0, None)), 0.0)
+
+    ranks = sorted(set([0.0, 50.0, 95.0, 99.0, 100.0] + [float(p) for p in percentiles]))
+    grid = np.full((as_of_days.size, len(ranks)), np.nan)
+    for i, (lo, hi) in enumerate(zip(lower.tolist(), upper.tolist())):
+        if hi > lo:
+            grid[i] = np.percentile(values[lo:hi], ranks)
+    quantiles = {rank: grid[:, j] for j, rank in enumerate(ranks)}
+
+    return {
+        'mean': np.where(count > 0, centered_mean + shift, np.nan),
+        'std_dev': std_dev,
+        'min_value': quantiles[0.0],
+        'max_value': quantiles[100.0],
+        'sample_count': count.astype(np.int64),
+        'quantiles': quantiles
+    }
+
+
+def as_of_baseline(
+    baseline: BaselineStats,
+    as_of: date,
+    metric_column: str,
+    lookback_days: int,
+    backend_note: str = ""
+) -> BaselineStats:
+    """Stamp a computed baseline as the one in effect on an as-of day"""
+    baseline.baseline_id = f"baseline-{baseline.metric_name}-{as_of.strftime('%Y%m%d')}-000000"
+    baseline.calculated_at = datetime(as_of.year, as_of.month, as_of.day)
+    baseline.lookback_days = lookback_days
+    baseline.notes = (f"Backfilled from {metric_column} column as of {as_of.isoformat()} "
+                      f"({lookback_days} days before that day, simple_stats{backend_note})")
+    return baseline
+
+
+class BackfillCheckpoint:
+    """
+    Completed (table, chunk) units of backfill jobs, kept in a JSON file
+
+    The file maps job key (see backfill_job_key) to the list of completed
+    unit labels, so several jobs can share one checkpoint file.
+    """
+
+    def __init__(self, path: Optional[str], job_key: str):
+        """
+        Initialize checkpoint
+
+        Args:
+            path: JSON checkpoint file (None keeps progress in memory only)
+            job_key: Key of the running job
+        """
+        self.path = Path(path).expanduser() if path else None
+        self.job_key = job_key
+        self._done = set(self._read().get(job_key, []))
+
+    def _read(self) -> Dict[str, List[str]]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable backfill checkpoint {self.path}: {e}")
+            return {}
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, unit: str) -> bool:
+        """Whether a unit was completed by an earlier run of the job"""
+        return unit in self._done
+
+    def mark_done(self, unit: str):
+        """Record a completed unit (the file is rewritten atomically)"""
+        self._done.add(unit)
+        if self.path is None:
+            return
+        entries = self._read()
+        entries[self.job_key] = sorted(self._done)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, indent=2)
+        tmp_path.replace(self.path)
@@ -0,0 +1,119 @@
+"""
+Baseline Cache
+
+In-process read-through cache for latest-baseline lookups.
+
+Entries expire after a TTL and the least recently used entry is evicted
+once max_entries is reached. Misses (no baseline stored yet) are cached
+too, so a detector polling an unknown metric does not run a query on
+every call. Writes through BaselineCalculator update the cache, so a
+process always sees the baselines it saved itself; rows written by other
+processes become visible after at most one TTL.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# segment_key of the cache entry holding all segment baselines of a metric
+ALL_SEGMENTS = "*"
+
+# segment_key of the cache entry holding a metric group's covariance baseline
+COVARIANCE = "#covariance"
+
+
+def _utc(value: datetime) -> datetime:
+    """Aware UTC datetime (naive timestamps are UTC, as in the Baseline table rows)"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class BaselineCache:
+    """
+    Thread-safe TTL + LRU cache keyed by (metric_name, segment_key)
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 10000):
+        """
+        Initialize cache
+
+        Args:
+            ttl_seconds: Seconds an entry stays valid (0 disables expiry)
+            max_entries: Maximum number of cached keys
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Look up a key
+
+        Returns:
+            (found, value); value may be None for a cached miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            stored_at, value = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value (None records a miss)"""
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any):
+        """Store a value (caller holds the lock)"""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def put_if_newer(self, key: Hashable, baseline):
+        """Store a freshly saved baseline unless a newer one is already cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and \
+                    _utc(entry[1].calculated_at) > _utc(baseline.calculated_at):
+                return
+            self._store(key, baseline)
+
+    def invalidate(self, key: Hashable):
+        """Drop one key"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_metric(self, metric_name: str):
+        """Drop every cached key of a metric (all segments)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == metric_name]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else None
+            }
@@ -13,15 +13,37 @@ Production-ready features:
 """
 
 import os
+import json
+import hashlib
+import time
 import logging
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from datetime import datetime, date, timedelta, timezone
+from typing import List, Optional, Dict, Any, Tuple, Callable, Union
+import numpy as np
 from google.cloud import bigquery
-from google.cloud.exceptions import GoogleCloudError
+from google.cloud.exceptions import GoogleCloudError, NotFound
 from dotenv import load_dotenv
 
-from ..models.baseline import BaselineStats, BASELINE_TABLE_SCHEMA
+from ..models.baseline import (
+    BaselineStats, BaselineBatch, PartialAggregate, SmoothingState, CovarianceBaseline, RegimeShift,
+    make_segment_keys, BASELINE_TABLE_SCHEMA, BASELINE_PARTIALS_TABLE_SCHEMA,
+    BASELINE_SMOOTHING_STATE_TABLE_SCHEMA, BASELINE_COVARIANCE_TABLE_SCHEMA
+)
 from ..utils.config import get_config
+from .seasonal import (
+    decompose, bucket_grid, phase_baselines, fill_phase_profile,
+    SEASONAL_BUCKET_UNITS, HOURS_PER_WEEK
+)
+from .smoothing import refresh_window, refresh_state, state_to_baseline
+from .writer import BaselineWriter
+from .cache import BaselineCache, ALL_SEGMENTS, COVARIANCE
+from .schema_cache import SchemaVerifier
+from .sampling import sample_fraction, choose_method, build_sample_query, arrow_to_values
+from .robust import robust_from_quantiles, robust_resolution, robust_notes
+from .backfill import date_chunks, backfill_job_key, as_of_baseline, BackfillCheckpoint
+from .changepoint import daily_grid, changepoint_penalty, find_last_regime, regime_notes
 
 # Load environment variables
 load_dotenv()
@@ -33,6 +55,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Largest APPROX_QUANTILES / KLL_QUANTILES bucket count requested (0.01 percentile steps)
+MAX_QUANTILE_RESOLUTION = 10000
+
 
 class BaselineCalculator:
     """
@@ -43,46 +68,162 @@ class BaselineCalculator:
     - simple_stats: Mean, std dev, percentiles (default)
     - rolling_average: Rolling window average
     - seasonal_decomposition: Time series decomposition
+    - exponential_smoothing: Holt-Winters with state persisted between runs
+    - robust_stats: Median, MAD, IQR and trimmed moments
+    - hour_of_week: Mean, std dev and percentiles per hour of the week
+    
+    Supports two backends (baseline.backend):
+    - bigquery: Queries source tables and stores baselines in BigQuery (default)
+    - local: Computes from local Parquet/CSV files and stores baselines on disk
     """
     
-    def __init__(self, config=None):
+    def __init__(self, config=None, backend: Optional[str] = None):
         """
         Initialize baseline calculator
         
         Args:
             config: Config object. If None, uses global config.
+            backend: "bigquery" or "local" (uses baseline.backend from config if None)
         """
         self.config = config or get_config()
+        self.backend = backend or self.config.get('baseline.backend', 'bigquery')
         
         self.project_id = self.config.bigquery_project_id
         self.dataset_id = self.config.bigquery_dataset_id
-        self.client = bigquery.Client(project=self.project_id)
         
         # Get calculation method from config
         self.calculation_method = self.config.baseline_calculation_method
         self.lookback_days = self.config.baseline_lookback_days
+        self.percentiles = [float(p) for p in self.config.get('baseline.percentiles', [50, 95, 99])]
+        if self._quantile_resolution() == MAX_QUANTILE_RESOLUTION:
+            rounded = [p for p in self.percentiles
+                       if abs(p * MAX_QUANTILE_RESOLUTION / 100.0 - round(p * MAX_QUANTILE_RESOLUTION / 100.0)) > 1e-9]
+            if rounded:
+                logger.warning(f"Percentiles {rounded} are finer than {100.0 / MAX_QUANTILE_RESOLUTION} "
+                               f"and will be read from the nearest quantile bucket")
+        
+        # Lookback window filtering and per-metric scan budget
+        self.time_window_enabled = self.config.get('baseline.time_window.enabled', False)
+        self.max_bytes_per_metric = self.config.get('baseline.time_window.max_bytes_per_metric', 0)
+        
+        # Incremental refresh settings
+        self.incremental_enabled = self.config.get('baseline.incremental.enabled', False)
+        self.partials_table = self.config.get('baseline.incremental.partials_table', 'BaselinePartials')
+        self.sketch_precision = self.config.get('baseline.incremental.sketch_precision', 1000)
+        self.rollup_hourly = self.config.get('baseline.incremental.hourly', False)
+        
+        # Advanced model parameters
+        self.rolling_window_size = self.config.get('baseline.advanced_models.rolling_average.window_size', 7)
+        self.rolling_min_periods = self.config.get('baseline.advanced_models.rolling_average.min_periods', 3)
+        self.seasonal_period = self.config.get('baseline.advanced_models.seasonal_decomposition.period', 7)
+        self.seasonal_model = self.config.get('baseline.advanced_models.seasonal_decomposition.model', 'additive')
+        self.seasonal_bucket = self.config.get('baseline.advanced_models.seasonal_decomposition.bucket', 'day')
+        self.smoothing_alpha = self.config.get('baseline.advanced_models.exponential_smoothing.alpha', 0.3)
+        self.smoothing_beta = self.config.get('baseline.advanced_models.exponential_smoothing.beta', 0.1)
+        self.smoothing_gamma = self.config.get('baseline.advanced_models.exponential_smoothing.gamma', 0.1)
+        self.smoothing_period = self.config.get('baseline.advanced_models.exponential_smoothing.period', 7)
+        self.smoothing_bucket = self.config.get('baseline.advanced_models.exponential_smoothing.bucket', 'day')
+        self.smoothing_state_table = self.config.get(
+            'baseline.advanced_models.exponential_smoothing.state_table', 'BaselineSmoothingState'
+        )
+        self.robust_trim_fraction = self.config.get('baseline.advanced_models.robust_stats.trim_fraction', 0.05)
+        
+        # Joint covariance baselines of correlated metrics (Mahalanobis detection)
+        self.covariance_groups = self.config.get('baseline.covariance.groups', []) or []
+        self.covariance_table = self.config.get('baseline.covariance.table', 'BaselineCovariance')
+        
+        # Regime shifts in daily means and targeted recomputes (see changepoint.py)
+        self.changepoint_lookback_days = self.config.get('baseline.changepoint.lookback_days', 60)
+        self.changepoint_min_days = self.config.get('baseline.changepoint.min_segment_days', 5)
+        self.changepoint_penalty = self.config.get('baseline.changepoint.penalty', 4.0)
+        self.changepoint_max = self.config.get('baseline.changepoint.max_changepoints', 3)
+        self.migrations_table = self.config.get('baseline.changepoint.migrations_table', 'migrations')
+        self.migration_window_days = self.config.get('baseline.changepoint.migration_window_days', 1)
+        self.migration_penalty_factor = self.config.get('baseline.changepoint.migration_penalty_factor', 0.5)
+        
+        # Concurrent refresh and per-metric timeout (shared by all queries of a refresh task)
+        self.concurrency_enabled = self.config.get('baseline.concurrency.enabled', False)
+        self.max_workers = self.config.get('baseline.concurrency.max_workers', 4)
+        self.query_timeout = self.config.get('baseline.concurrency.metric_timeout_seconds', 0)
+        self._task_deadline = threading.local()
+        
+        # In-process cache for latest-baseline lookups
+        self.baseline_cache = None
+        if self.config.get('baseline.cache.enabled', True):
+            self.baseline_cache = BaselineCache(
+                ttl_seconds=self.config.get('baseline.cache.ttl_seconds', 300),
+                max_entries=self.config.get('baseline.cache.max_entries', 10000)
+            )
+        
+        # Skip refresh of metrics whose source table and inputs are unchanged
+        self.skip_unchanged = self.config.get('baseline.skip_unchanged.enabled', True)
+        
+        # Random samples for distribution analysis (AI optimizer)
+        self.sample_size = self.config.get('baseline.sampling.sample_size', 10000)
+        self.sample_oversample = self.config.get('baseline.sampling.oversample', 1.5)
+        self.sample_min_system_bytes = self.config.get('baseline.sampling.min_system_bytes', 1073741824)
+        
+        # Historical backfill (see backfill.py)
+        self.backfill_chunk_days = self.config.get('baseline.backfill.chunk_days', 31)
+        self.backfill_checkpoint_path = self.config.get(
+            'baseline.backfill.checkpoint_path', '~/.cache/baseline/backfill_checkpoint.json'
+        )
+        
+        # Tables are verified lazily, once per schema version (see schema_cache)
+        self.schema_verifier = SchemaVerifier(
+            self.config.get('baseline.schema_cache.marker_path', '~/.cache/baseline/schema_verified.json')
+            if self.config.get('baseline.schema_cache.enabled', True) else None,
+            max_age_hours=self.config.get('baseline.schema_cache.max_age_hours', 24)
+        )
+        
+        if self.backend == "local":
+            from .local_backend import LocalBaselineBackend
+            
+            # No BigQuery client: the local backend needs no network or GCP project
+            self.client = None
+            self.local_backend = LocalBaselineBackend(self.config, self.percentiles)
+            
+            logger.info("Baseline Calculator initialized (local backend)")
+            logger.info(f"Method: {self.calculation_method}")
+            logger.info(f"Lookback: {self.lookback_days} days")
+            return
+        
+        self.client = bigquery.Client(project=self.project_id)
+        self.local_backend = None
         
         logger.info("Baseline Calculator initialized")
         logger.info(f"Method: {self.calculation_method}")
         logger.info(f"Lookback: {self.lookback_days} days")
         logger.info(f"Project: {self.project_id}")
         logger.info(f"Dataset: {self.dataset_id}")
+    
+    def _ensure_baseline_table(self):
+        """
+        Create the Baseline table or add missing columns, before first use
         
-        # Ensure Baseline table exists
+        Runs at most once per process and schema version, and not at all
+        when the marker file records an earlier verification.
+        """
+        table_id = f"{self.project_id}.{self.dataset_id}.Baseline"
         try:
-            self._ensure_baseline_table()
+            self.schema_verifier.ensure(table_id, BASELINE_TABLE_SCHEMA, self._verify_baseline_table)
         except Exception as e:
             logger.error(f"Failed to initialize Baseline table: {e}")
             raise
     
-    def _ensure_baseline_table(self):
+    def _verify_baseline_table(self):
         """Create Baseline table if it doesn't exist"""
         table_id = f"{self.project_id}.{self.dataset_id}.Baseline"
         
         try:
-            self.client.get_table(table_id)
+            table = self.client.get_table(table_id)
             logger.info(f"Baseline table exists: {table_id}")
         except Exception as e:
+            table = None
+        
+        if table is not None:
+            self._add_missing_columns(table, BASELINE_TABLE_SCHEMA)
+        else:
             # Table doesn't exist, create it
             logger.info(f"Creating Baseline table: {table_id}")
             
@@ -98,13 +239,31 @@ class BaselineCalculator:
                 logger.error(f"Unexpected error creating Baseline table: {ex}")
                 raise
     
+    def _add_missing_columns(self, table, schema_definition: List[Dict[str, Any]]):
+        """
+        Add columns introduced after a table was created
+
+        New columns are always NULLABLE or REPEATED, so BigQuery accepts
+        them as an in-place schema update and existing rows stay valid.
+        """
+        existing = {field.name for field in table.schema}
+        missing = [field for field in schema_definition if field['name'] not in existing]
+        
+        if not missing:
+            return
+        
+        logger.info(f"Adding columns to {table.table_id}: {[f['name'] for f in missing]}")
+        table.schema = list(table.schema) + [bigquery.SchemaField(**field) for field in missing]
+        self.client.update_table(table, ["schema"])
+    
     def calculate_baseline(
         self,
         metric_name: str,
         metric_column: str,
         source_table: str,
         lookback_days: Optional[int] = None,
-        calculation_method: Optional[str] = None
+        calculation_method: Optional[str] = None,
+        timestamp_column: Optional[str] = None
     ) -> BaselineStats:
         """
         Calculate baseline statistics for a metric
@@ -115,6 +274,8 @@ class BaselineCalculator:
             source_table: Source table name (e.g., "cloud_workload_dataset")
             lookback_days: Number of days of historical data to analyze (uses config if None)
             calculation_method: Method to use (uses config if None)
+            timestamp_column: Column used to restrict the scan to the lookback
+                              window (only applied when baseline.time_window is enabled)
         
         Returns:
             BaselineStats object with calculated statistics
@@ -128,96 +289,333 @@ class BaselineCalculator:
         logger.info(f"Method: {calculation_method}, Lookback: {lookback_days} days")
         
         try:
+            if self.local_backend is not None:
+                if calculation_method == "rolling_average":
+                    return self.local_backend.calculate_rolling_baseline(
+                        metric_name, metric_column, source_table, lookback_days,
+                        timestamp_column or self._metric_config(metric_name).get('timestamp_column'),
+                        self.rolling_window_size, self.rolling_min_periods
+                    )
+                if calculation_method == "seasonal_decomposition":
+                    return self.local_backend.calculate_seasonal_baseline(
+                        metric_name, metric_column, source_table, lookback_days,
+                        timestamp_column or self._metric_config(metric_name).get('timestamp_column'),
+                        self.seasonal_period, self.seasonal_model, self.seasonal_bucket
+                    )
+                if calculation_method == "exponential_smoothing":
+                    return self.local_backend.calculate_smoothing_baseline(
+                        metric_name, metric_column, source_table, lookback_days,
+                        timestamp_column or self._metric_config(metric_name).get('timestamp_column'),
+                        self.smoothing_period, self.smoothing_bucket,
+                        self.smoothing_alpha, self.smoothing_beta, self.smoothing_gamma
+                    )
+                if calculation_method == "robust_stats":
+                    return self.local_backend.calculate_robust_baseline(
+                        metric_name, metric_column, source_table, lookback_days,
+                        timestamp_column, self.robust_trim_fraction
+                    )
+                if calculation_method == "hour_of_week":
+                    return self.local_backend.calculate_hour_of_week_baseline(
+                        metric_name, metric_column, source_table, lookback_days,
+                        timestamp_column or self._metric_config(metric_name).get('timestamp_column')
+                    )
+                if calculation_method != "simple_stats":
+                    logger.warning(f"Method '{calculation_method}' not available on local backend, using simple_stats")
+                return self.local_backend.calculate_baseline(
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
+                )
+            
             # Route to appropriate calculation method
             if calculation_method == "simple_stats":
                 return self._calculate_simple_stats(
-                    metric_name, metric_column, source_table, lookback_days
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
                 )
             elif calculation_method == "rolling_average":
                 return self._calculate_rolling_average(
-                    metric_name, metric_column, source_table, lookback_days
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
                 )
             elif calculation_method == "seasonal_decomposition":
                 return self._calculate_seasonal_decomposition(
-                    metric_name, metric_column, source_table, lookback_days
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
+                )
+            elif calculation_method == "exponential_smoothing":
+                return self._calculate_exponential_smoothing(
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
+                )
+            elif calculation_method == "robust_stats":
+                return self._calculate_robust_stats(
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
+                )
+            elif calculation_method == "hour_of_week":
+                return self._calculate_hour_of_week(
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
                 )
             else:
                 logger.warning(f"Unknown method '{calculation_method}', using simple_stats")
                 return self._calculate_simple_stats(
-                    metric_name, metric_column, source_table, lookback_days
+                    metric_name, metric_column, source_table, lookback_days, timestamp_column
                 )
         except Exception as e:
             logger.error(f"Failed to calculate baseline for {metric_name}: {e}")
             raise
     
+    def _time_window_filter(
+        self,
+        timestamp_column: Optional[str],
+        lookback_days: int
+    ) -> Tuple[str, List[bigquery.ScalarQueryParameter]]:
+        """
+        Build the lookback-window predicate for a scan
+        
+        The range is compared against the raw column with a constant
+        parameter (no function wrapped around the column), which is what
+        lets BigQuery prune partitions and clustered blocks.
+        
+        Returns:
+            (SQL predicate, query parameters); ("TRUE", []) when time
+            windows are disabled or the metric has no timestamp column
+        """
+        if not (self.time_window_enabled and timestamp_column):
+            return "TRUE", []
+        
+        window_start = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+        predicate = f"`{timestamp_column}` >= @window_start"
+        return predicate, [bigquery.ScalarQueryParameter("window_start", "TIMESTAMP", window_start)]
+    
+    def _metric_config(self, metric_name: str) -> Dict[str, Any]:
+        """Get the baseline.metrics entry for a metric ({} if not configured)"""
+        for metric in self.config.baseline_metrics or []:
+            if metric.get('name') == metric_name:
+                return metric
+        return {}
+    
+    def _bytes_budget(self, metric_name: str) -> Optional[int]:
+        """
+        Get the bytes-scanned budget for a metric
+        
+        A metric's own max_bytes_scanned overrides
+        baseline.time_window.max_bytes_per_metric; 0 or None means no limit.
+        """
+        metric = self._metric_config(metric_name)
+        if 'max_bytes_scanned' in metric:
+            return metric['max_bytes_scanned'] or None
+        return self.max_bytes_per_metric or None
+    
+    def _run_query(
+        self,
+        query: str,
+        query_parameters: Optional[List[bigquery.ScalarQueryParameter]] = None,
+        bytes_budget: Optional[int] = None,
+        label: str = "query"
+    ):
+        """
+        Run a query, enforcing a bytes-scanned budget with a dry run first
+        
+        Args:
+            query: SQL to run
+            query_parameters: Query parameters
+            bytes_budget: Maximum bytes the query may scan (None = no check)
+            label: Name used in log and error messages
+        
+        Returns:
+            Query result iterator
+        """
+        query_parameters = query_parameters or []
+        
+        if bytes_budget:
+            dry_run_config = bigquery.QueryJobConfig(
+                query_parameters=query_parameters,
+                dry_run=True,
+                use_query_cache=False
+            )
+            estimated = self.client.query(query, job_config=dry_run_config).total_bytes_processed or 0
+            logger.info(f"Dry run for {label}: {estimated:,} bytes (budget {bytes_budget:,})")
+            
+            if estimated > bytes_budget:
+                raise ValueError(
+                    f"Query for {label} would scan {estimated:,} bytes, "
+                    f"exceeding budget of {bytes_budget:,} bytes"
+                )
+        
+        timeout = self._query_time_left(label)
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+        job = self.client.query(query, job_config=job_config)
+        try:
+            return job.result(timeout=timeout)
+        except FutureTimeoutError:
+            job.cancel()
+            raise TimeoutError(f"Query for {label} exceeded timeout of {self.query_timeout}s and was cancelled")
+    
+    def _query_time_left(self, label: str) -> Optional[float]:
+        """
+        Seconds the next query may run (None = no limit)
+        
+        Inside a refresh task (see _run_task) this is what is left of the
+        task's metric_timeout_seconds, so all queries of a metric share one
+        limit; outside a task every query gets the full limit.
+        """
+        if not self.query_timeout:
+            return None
+        deadline = getattr(self._task_deadline, 'value', None)
+        if deadline is None:
+            return self.query_timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Query for {label} not started: metric timeout of {self.query_timeout}s exhausted")
+        return remaining
+    
+    def _run_task(self, task: Callable[[], List[Union[BaselineStats, BaselineBatch]]]):
+        """Run a refresh task with one metric_timeout_seconds deadline for all its queries"""
+        self._task_deadline.value = time.monotonic() + self.query_timeout if self.query_timeout else None
+        try:
+            return task()
+        finally:
+            self._task_deadline.value = None
+    
+    def _quantile_resolution(self) -> int:
+        """
+        Number of APPROX_QUANTILES buckets needed to index every percentile
+
+        The fixed p50/p95/p99 need 100 buckets; each decimal place in a
+        configured percentile (e.g. 99.9) multiplies that by 10, up to
+        MAX_QUANTILE_RESOLUTION; finer percentiles are read from the nearest
+        bucket.
+        """
+        decimals = 0
+        for percentile in self.percentiles:
+            text = repr(float(percentile)).rstrip('0').rstrip('.')
+            if '.' in text:
+                decimals = max(decimals, len(text.split('.')[1]))
+        return min(100 * 10 ** decimals, MAX_QUANTILE_RESOLUTION)
+
+    @staticmethod
+    def _quantile_at(quantiles: List[float], percentile: float) -> float:
+        """Index an APPROX_QUANTILES array at a percentile rank (0-100)"""
+        buckets = len(quantiles) - 1
+        value = quantiles[int(round(percentile / 100.0 * buckets))]
+        return float(value) if value is not None else 0.0
+
+    def _stats_select_expressions(
+        self,
+        metric_column: str,
+        prefix: str = "",
+        resolution: Optional[int] = None
+    ) -> str:
+        """
+        Build the SELECT expressions for simple_stats on one column
+
+        NULLs are ignored by every aggregate, so several columns can share
+        one scan without a per-column WHERE clause. The quantile sketch is
+        computed once per column and indexed for all percentiles afterwards.
+
+        Args:
+            metric_column: Column name in source table
+            prefix: Alias prefix used to tell columns apart in a batched query
+            resolution: APPROX_QUANTILES buckets (a multiple of _quantile_resolution();
+                        uses _quantile_resolution() if None)
+        """
+        column = f"`{metric_column}`"
+        return f"""
+            AVG({column}) as {prefix}mean,
+            STDDEV({column}) as {prefix}std_dev,
+            MIN({column}) as {prefix}min_value,
+            MAX({column}) as {prefix}max_value,
+            APPROX_QUANTILES({column}, {resolution or self._quantile_resolution()}) as {prefix}quantiles,
+            COUNT({column}) as {prefix}sample_count"""
+
+    def _build_baseline_from_row(
+        self,
+        row,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        prefix: str = ""
+    ) -> BaselineStats:
+        """
+        Convert a statistics result row into a BaselineStats object
+
+        Args:
+            row: BigQuery result row containing the simple_stats aliases
+            prefix: Alias prefix used when the row holds several metrics
+        """
+        def value(name: str) -> float:
+            raw = row[f"{prefix}{name}"]
+            return float(raw) if raw is not None else 0.0
+
+        sample_count = row[f"{prefix}sample_count"]
+
+        # Validate we got data
+        if not sample_count:
+            logger.warning(f"No data found for {metric_name} in {source_table}")
+            raise ValueError(f"No data found for metric {metric_name}")
+
+        quantiles = list(row[f"{prefix}quantiles"])
+
+        # Create baseline object
+        baseline_id = f"baseline-{metric_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+        baseline = BaselineStats(
+            baseline_id=baseline_id,
+            metric_name=metric_name,
+            mean=value('mean'),
+            std_dev=value('std_dev'),
+            min_value=value('min_value'),
+            max_value=value('max_value'),
+            p50=self._quantile_at(quantiles, 50),
+            p95=self._quantile_at(quantiles, 95),
+            p99=self._quantile_at(quantiles, 99),
+            calculated_at=datetime.now(),
+            lookback_days=lookback_days,
+            sample_count=int(sample_count),
+            data_source=source_table,
+            notes=f"Calculated from {metric_column} column using simple_stats method",
+            percentiles={p: self._quantile_at(quantiles, p) for p in self.percentiles}
+        )
+
+        logger.info(f"Baseline calculated successfully for {metric_name}")
+        logger.info(f"  Mean: {baseline.mean:.4f}, Std Dev: {baseline.std_dev:.4f}")
+        logger.info(f"  P95: {baseline.p95:.4f}, P99: {baseline.p99:.4f}")
+        logger.info(f"  Samples: {baseline.sample_count:,}")
+
+        return baseline
+
     def _calculate_simple_stats(
         self,
         metric_name: str,
         metric_column: str,
         source_table: str,
-        lookback_days: int
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
     ) -> BaselineStats:
         """
         Calculate baseline using simple statistical methods
         (mean, std dev, percentiles)
         """
+        time_filter, query_parameters = self._time_window_filter(timestamp_column, lookback_days)
         
         # Query to calculate statistics
         query = f"""
-        SELECT
-            AVG(`{metric_column}`) as mean,
-            STDDEV(`{metric_column}`) as std_dev,
-            MIN(`{metric_column}`) as min_value,
-            MAX(`{metric_column}`) as max_value,
-            APPROX_QUANTILES(`{metric_column}`, 100)[OFFSET(50)] as p50,
-            APPROX_QUANTILES(`{metric_column}`, 100)[OFFSET(95)] as p95,
-            APPROX_QUANTILES(`{metric_column}`, 100)[OFFSET(99)] as p99,
-            COUNT(*) as sample_count
+        SELECT{self._stats_select_expressions(metric_column)}
         FROM `{self.project_id}.{self.dataset_id}.{source_table}`
         WHERE `{metric_column}` IS NOT NULL
+          AND {time_filter}
         """
         
-        # Note: cloud_workload_dataset has all data from 2024, no need for time filter for MVP
-        # Time filter can be added later when we have real-time data
-        
         try:
             # Execute query
             logger.debug(f"Executing baseline query for {metric_name}")
-            result = self.client.query(query).result()
+            result = self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=metric_name
+            )
             row = next(result)
             
-            # Validate we got data
-            if row['sample_count'] == 0:
-                logger.warning(f"No data found for {metric_name} in {source_table}")
-                raise ValueError(f"No data found for metric {metric_name}")
-            
-            # Create baseline object
-            baseline_id = f"baseline-{metric_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-            
-            baseline = BaselineStats(
-                baseline_id=baseline_id,
-                metric_name=metric_name,
-                mean=float(row['mean']) if row['mean'] is not None else 0.0,
-                std_dev=float(row['std_dev']) if row['std_dev'] is not None else 0.0,
-                min_value=float(row['min_value']) if row['min_value'] is not None else 0.0,
-                max_value=float(row['max_value']) if row['max_value'] is not None else 0.0,
-                p50=float(row['p50']) if row['p50'] is not None else 0.0,
-                p95=float(row['p95']) if row['p95'] is not None else 0.0,
-                p99=float(row['p99']) if row['p99'] is not None else 0.0,
-                calculated_at=datetime.now(),
-                lookback_days=lookback_days,
-                sample_count=int(row['sample_count']),
-                data_source=source_table,
-                notes=f"Calculated from {metric_column} column using simple_stats method"
+            return self._build_baseline_from_row(
+                row, metric_name, metric_column, source_table, lookback_days
             )
             
-            logger.info(f"Baseline calculated successfully for {metric_name}")
-            logger.info(f"  Mean: {baseline.mean:.4f}, Std Dev: {baseline.std_dev:.4f}")
-            logger.info(f"  P95: {baseline.p95:.4f}, P99: {baseline.p99:.4f}")
-            logger.info(f"  Samples: {baseline.sample_count:,}")
-            
-            return baseline
-            
         except StopIteration:
             logger.error(f"Query returned no results for {metric_name}")
             raise ValueError(f"No data returned from query for {metric_name}")
@@ -228,146 +626,2362 @@ class BaselineCalculator:
             logger.error(f"Unexpected error in _calculate_simple_stats: {e}")
             raise
     
-    def _calculate_rolling_average(
-        self,
-        metric_name: str,
-        metric_column: str,
-        source_table: str,
-        lookback_days: int
-    ) -> BaselineStats:
-        """
-        Calculate baseline using rolling average
-        (for future implementation)
-        """
-        logger.warning("Rolling average method not yet implemented")
-        logger.info("Falling back to simple_stats method")
-        return self._calculate_simple_stats(
-            metric_name, metric_column, source_table, lookback_days
-        )
-    
-    def _calculate_seasonal_decomposition(
+    def _calculate_robust_stats(
         self,
         metric_name: str,
         metric_column: str,
         source_table: str,
-        lookback_days: int
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
     ) -> BaselineStats:
         """
-        Calculate baseline using seasonal decomposition
-        (for future implementation)
-        """
-        logger.warning("Seasonal decomposition method not yet implemented")
-        logger.info("Falling back to simple_stats method")
-        return self._calculate_simple_stats(
-            metric_name, metric_column, source_table, lookback_days
-        )
-    
-    def save_baseline(self, baseline: BaselineStats):
-        """
-        Save baseline to BigQuery Baseline table
+        Calculate baseline using robust statistics
+        (median, MAD, IQR, trimmed mean/std dev)
         
-        Args:
-            baseline: BaselineStats object to save
+        Same single scan as simple_stats with a finer APPROX_QUANTILES grid
+        (at least 1000 buckets); the robust statistics are derived from the
+        grid (see robust.py). mean/std_dev hold the trimmed moments, so
+        incident spikes in the lookback window do not inflate sigma.
         """
-        table_id = f"{self.project_id}.{self.dataset_id}.Baseline"
+        time_filter, query_parameters = self._time_window_filter(timestamp_column, lookback_days)
+        resolution = robust_resolution(self._quantile_resolution())
         
-        logger.info(f"Saving baseline to BigQuery: {table_id}")
-        logger.debug(f"Baseline ID: {baseline.baseline_id}")
+        query = f"""
+        SELECT{self._stats_select_expressions(metric_column, resolution=resolution)}
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        WHERE `{metric_column}` IS NOT NULL
+          AND {time_filter}
+        """
         
         try:
-            # Insert row
-            errors = self.client.insert_rows_json(
-                table_id,
-                [baseline.to_bigquery_row()]
+            logger.debug(f"Executing robust baseline query for {metric_name}")
+            result = self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=metric_name
             )
+            row = next(result)
             
-            if errors:
-                logger.error(f"Failed to save baseline: {errors}")
-                raise Exception(f"Failed to save baseline: {errors}")
+            baseline = self._build_baseline_from_row(
+                row, metric_name, metric_column, source_table, lookback_days
+            )
+            robust = robust_from_quantiles(list(row['quantiles']), self.robust_trim_fraction)
+            baseline.median = robust['median']
+            baseline.mad = robust['mad']
+            baseline.iqr = robust['iqr']
+            baseline.trimmed_mean = robust['trimmed_mean']
+            baseline.trimmed_std_dev = robust['trimmed_std_dev']
+            baseline.mean = robust['trimmed_mean']
+            baseline.std_dev = robust['trimmed_std_dev']
+            baseline.notes = robust_notes(metric_column, self.robust_trim_fraction)
             
-            logger.info(f"Baseline saved successfully: {baseline.baseline_id}")
+            logger.info(f"Robust baseline for {metric_name}: median {baseline.median:.4f}, "
+                        f"MAD {baseline.mad:.4f}, IQR {baseline.iqr:.4f}")
+            return baseline
             
+        except StopIteration:
+            logger.error(f"Query returned no results for {metric_name}")
+            raise ValueError(f"No data returned from query for {metric_name}")
         except GoogleCloudError as gce:
-            logger.error(f"BigQuery error saving baseline: {gce}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error saving baseline: {e}")
+            logger.error(f"BigQuery error calculating robust baseline: {gce}")
             raise
     
-    def get_latest_baseline(self, metric_name: str) -> Optional[BaselineStats]:
+    def calculate_baselines_batched(
+        self,
+        metrics: List[Dict[str, Any]],
+        lookback_days: Optional[int] = None
+    ) -> List[BaselineStats]:
         """
-        Retrieve the most recent baseline for a metric
-        
+        Calculate simple_stats baselines for many metrics with one scan per table
+
+        Metrics are grouped by source table (and timestamp column, when time
+        windows are enabled) and every column of a group is aggregated in a
+        single query, so N metrics on the same table cost one scan and one
+        job round trip instead of N.
+
         Args:
-            metric_name: Name of the metric
-        
+            metrics: Metric configs (name, column, table) as in baseline.metrics
+            lookback_days: Number of days of historical data to analyze (uses config if None)
+
         Returns:
-            BaselineStats object or None if not found
+            List of BaselineStats objects (metrics without data are skipped)
         """
-        query = f"""
-        SELECT *
-        FROM `{self.project_id}.{self.dataset_id}.Baseline`
-        WHERE metric_name = @metric_name
-        ORDER BY calculated_at DESC
-        LIMIT 1
+        lookback_days = lookback_days or self.lookback_days
+
+        if self.local_backend is not None:
+            return self.local_backend.calculate_baselines(metrics, lookback_days)
+
+        baselines = []
+        for (source_table, timestamp_column), table_metrics in self._group_by_scan(metrics).items():
+            try:
+                baselines.extend(self._calculate_table_batch(
+                    source_table, table_metrics, lookback_days, timestamp_column
+                ))
+            except Exception as e:
+                names = ", ".join(m['name'] for m in table_metrics)
+                print(f"[ERROR] Failed to calculate batched baselines for {source_table} ({names}): {e}")
+
+        return baselines
+
+    def _group_by_scan(
+        self,
+        metrics: List[Dict[str, Any]]
+    ) -> Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]]:
+        """Group metrics that can share one scan (same table and window column), preserving order"""
+        tables: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+        for metric in metrics:
+            timestamp_column = metric.get('timestamp_column') if self.time_window_enabled else None
+            tables.setdefault((metric['table'], timestamp_column), []).append(metric)
+        return tables
+
+    def _calculate_table_batch(
+        self,
+        source_table: str,
+        metrics: List[Dict[str, Any]],
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
+    ) -> List[BaselineStats]:
         """
+        Run one statistics query covering every metric of a single table
+        and fan the result row out into BaselineStats objects
         
+        The dry-run budget for the shared scan is the sum of the member
+        metrics' budgets; it is skipped if any member is unlimited.
+        """
+        # Column aliases are index based: metric names are not guaranteed
+        # to be valid SQL identifiers
+        select_list = ",".join(
+            self._stats_select_expressions(metric['column'], prefix=f"m{i}_")
+            for i, metric in enumerate(metrics)
+        )
+        time_filter, query_parameters = self._time_window_filter(timestamp_column, lookback_days)
+        query = f"""
+        SELECT{select_list}
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        WHERE {time_filter}
+        """
+
+        budgets = [self._bytes_budget(metric['name']) for metric in metrics]
+        bytes_budget = sum(budgets) if all(budgets) else None
+
+        logger.info(f"Calculating {len(metrics)} baselines from {source_table} in one query")
+
         try:
-            job_config = bigquery.QueryJobConfig(
-                query_parameters=[
-                    bigquery.ScalarQueryParameter("metric_name", "STRING", metric_name)
-                ]
+            result = self._run_query(
+                query, query_parameters,
+                bytes_budget=bytes_budget,
+                label=source_table
             )
-            
-            result = self.client.query(query, job_config=job_config).result()
-            
-            try:
-                row = next(result)
-                logger.info(f"Retrieved latest baseline for {metric_name}")
-                return BaselineStats(
-                    baseline_id=row['baseline_id'],
-                    metric_name=row['metric_name'],
-                    mean=float(row['mean']),
-                    std_dev=float(row['std_dev']),
-                    min_value=float(row['min_value']),
-                    max_value=float(row['max_value']),
-                    p50=float(row['p50']),
-                    p95=float(row['p95']),
-                    p99=float(row['p99']),
-                    calculated_at=row['calculated_at'],
-                    lookback_days=int(row['lookback_days']),
-                    sample_count=int(row['sample_count']),
-                    data_source=row['data_source'],
-                    notes=row.get('notes')
-                )
-            except StopIteration:
-                logger.warning(f"No baseline found for {metric_name}")
-                return None
-                
+            row = next(result)
+        except StopIteration:
+            logger.error(f"Batched query returned no results for {source_table}")
+            raise ValueError(f"No data returned from batched query for {source_table}")
         except GoogleCloudError as gce:
-            logger.error(f"BigQuery error retrieving baseline: {gce}")
+            logger.error(f"BigQuery error calculating batched baselines: {gce}")
             raise
-        except Exception as e:
-            logger.error(f"Unexpected error retrieving baseline: {e}")
-            raise
-    
-    def calculate_and_save_all_baselines(self) -> List[BaselineStats]:
+
+        baselines = []
+        for i, metric in enumerate(metrics):
+            try:
+                baselines.append(self._build_baseline_from_row(
+                    row,
+                    metric_name=metric['name'],
+                    metric_column=metric['column'],
+                    source_table=source_table,
+                    lookback_days=lookback_days,
+                    prefix=f"m{i}_"
+                ))
+            except ValueError as e:
+                print(f"[ERROR] Failed to calculate baseline for {metric['name']}: {e}")
+
+        return baselines
+
+    def calculate_segmented_baselines(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        group_by: List[str],
+        lookback_days: Optional[int] = None,
+        timestamp_column: Optional[str] = None
+    ) -> BaselineBatch:
         """
-        Calculate and save baselines for all configured metrics
+        Calculate simple_stats baselines for every segment of a metric
+        
+        One GROUP BY query computes all segments (e.g. one per cluster and
+        machine), over raw rows or, with the incremental tier enabled, over
+        the metric's per-segment day rollups. The result is read as Arrow and kept columnar, so tens of
+        thousands of segments never become per-row Python objects.
+        
+        Args:
+            metric_name: Name for the baselines (e.g., "cpu_utilization")
+            metric_column: Column name in source table
+            source_table: Source table name
+            group_by: Dimension columns defining a segment
+            lookback_days: Number of days of historical data to analyze (uses config if None)
+            timestamp_column: Column used to restrict the scan to the lookback window
         
         Returns:
-            List of BaselineStats objects
+            BaselineBatch with one entry per segment
         """
-        logger.info("=" * 80)
-        logger.info("CALCULATING ALL BASELINES")
-        logger.info("=" * 80)
-        logger.info(f"Method: {self.calculation_method}")
-        logger.info(f"Lookback: {self.lookback_days} days")
+        lookback_days = lookback_days or self.lookback_days
         
-        baselines = []
-        failed_metrics = []
+        logger.info(f"Calculating segment baselines for {metric_name} by {', '.join(group_by)}")
         
-        # Get metrics from config
+        if self.local_backend is not None:
+            return self.local_backend.calculate_segmented_baselines(
+                metric_name, metric_column, source_table, group_by, lookback_days, timestamp_column
+            )
+        
+        group_columns = ", ".join(f"segment_{i}" for i in range(len(group_by)))
+        
+        if self._uses_rollups(timestamp_column):
+            # Merge the metric's per-segment day rollups instead of scanning raw rows
+            window_start, _ = self._update_rollups(
+                metric_name, metric_column, source_table, timestamp_column, lookback_days, group_by
+            )
+            rollups, query_parameters = self._rollup_source(
+                metric_name, metric_column, source_table, window_start, group_by=group_by
+            )
+            dimensions = ",".join(
+                f"\n            segment_values[OFFSET({i})] as segment_{i}" for i in range(len(group_by))
+            )
+            query = f"""
+        SELECT{dimensions},
+            SUM(s) / SUM(n) as mean,
+            SQRT(SAFE_DIVIDE(GREATEST(SUM(m2) + SUM(s * s / n) - SUM(s) * SUM(s) / SUM(n), 0), SUM(n) - 1)) as std_dev,
+            MIN(min_value) as min_value,
+            MAX(max_value) as max_value,
+            KLL_QUANTILES.MERGE_FLOAT64(sketch, {self._quantile_resolution()}) as quantiles,
+            SUM(n) as sample_count
+        FROM {rollups}
+        GROUP BY {group_columns}
+        """
+        else:
+            time_filter, query_parameters = self._time_window_filter(timestamp_column, lookback_days)
+            dimensions = ",".join(
+                f"\n            IFNULL(CAST(`{dimension}` AS STRING), 'NULL') as segment_{i}"
+                for i, dimension in enumerate(group_by)
+            )
+            query = f"""
+        SELECT{dimensions},{self._stats_select_expressions(metric_column)}
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        WHERE `{metric_column}` IS NOT NULL
+          AND {time_filter}
+        GROUP BY {group_columns}
+        """
+        
+        try:
+            logger.debug(f"Executing segmented baseline query for {metric_name}")
+            table = self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=metric_name
+            ).to_arrow()
+            
+            batch = self._batch_from_arrow(
+                table, metric_name, metric_column, source_table, group_by, lookback_days,
+                notes=(f"Calculated from {metric_column} column using simple_stats method "
+                       f"per {', '.join(group_by)} segment")
+            )
+            
+            logger.info(f"Calculated {len(batch):,} segment baselines for {metric_name}")
+            return batch
+            
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error calculating segment baselines: {gce}")
+            raise
+    
+    def _batch_from_arrow(
+        self,
+        table,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        group_by: List[str],
+        lookback_days: int,
+        notes: str
+    ) -> BaselineBatch:
+        """
+        Build a BaselineBatch from a segment statistics result
+        
+        Args:
+            table: Arrow table with segment_<i> columns and the simple_stats aliases
+        
+        Raises:
+            ValueError: If the result has no rows
+        """
+        if table.num_rows == 0:
+            logger.warning(f"No data found for {metric_name} in {source_table}")
+            raise ValueError(f"No data found for metric {metric_name}")
+        
+        def column(name: str) -> np.ndarray:
+            return table.column(name).to_numpy(zero_copy_only=False)
+        
+        # APPROX_QUANTILES arrays all have resolution + 1 entries
+        resolution = self._quantile_resolution()
+        quantiles = np.asarray(
+            table.column('quantiles').combine_chunks().flatten(), dtype=np.float64
+        ).reshape(table.num_rows, resolution + 1)
+        ranks = sorted(set([50.0, 95.0, 99.0] + self.percentiles))
+        
+        return BaselineBatch(
+            metric_name=metric_name,
+            metric_column=metric_column,
+            data_source=source_table,
+            method="simple_stats",
+            lookback_days=lookback_days,
+            calculated_at=datetime.now(),
+            group_by=list(group_by),
+            segment_values=[column(f"segment_{i}") for i in range(len(group_by))],
+            mean=column('mean').astype(np.float64),
+            std_dev=np.nan_to_num(column('std_dev').astype(np.float64)),
+            min_value=column('min_value').astype(np.float64),
+            max_value=column('max_value').astype(np.float64),
+            sample_count=column('sample_count').astype(np.int64),
+            percentiles={r: quantiles[:, int(round(r / 100.0 * resolution))] for r in ranks},
+            notes=notes
+        )
+    
+    def save_baseline_batch(self, batch: BaselineBatch, run_id: Optional[str] = None):
+        """
+        Save a segment batch to the Baseline table with one load job
+        
+        Args:
+            batch: BaselineBatch to save
+            run_id: Refresh run ID (see create_writer)
+        """
+        writer = self.create_writer(run_id)
+        writer.add_batch(batch)
+        writer.flush()
+    
+    def _ensure_partials_table(self):
+        """Create the BaselinePartials table if it doesn't exist (once per schema version)"""
+        table_id = f"{self.project_id}.{self.dataset_id}.{self.partials_table}"
+        self.schema_verifier.ensure(table_id, BASELINE_PARTIALS_TABLE_SCHEMA, self._verify_partials_table)
+    
+    def _verify_partials_table(self):
+        table_id = f"{self.project_id}.{self.dataset_id}.{self.partials_table}"
+        
+        try:
+            table = self.client.get_table(table_id)
+            self._add_missing_columns(table, BASELINE_PARTIALS_TABLE_SCHEMA)
+        except NotFound:
+            logger.info(f"Creating partials table: {table_id}")
+            try:
+                schema = [bigquery.SchemaField(**field) for field in BASELINE_PARTIALS_TABLE_SCHEMA]
+                table = bigquery.Table(table_id, schema=schema)
+                table.time_partitioning = bigquery.TimePartitioning(field="partition_date")
+                table.clustering_fields = ["metric_name"]
+                self.client.create_table(table, exists_ok=True)
+                logger.info(f"Successfully created partials table: {table_id}")
+            except GoogleCloudError as gce:
+                logger.error(f"Failed to create partials table: {gce}")
+                raise
+    
+    def _get_partials_watermark(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        group_by: Optional[List[str]] = None
+    ) -> Optional[date]:
+        """
+        Get the most recent day partition already stored for a metric
+        
+        Every rollup level the metric needs (day, hourly if enabled, its
+        segments if group_by is set) must be present; the oldest of their
+        latest days is the watermark.
+        
+        Returns:
+            Latest partition_date, or None if a needed level has no rows yet
+        """
+        query = f"""
+        SELECT
+            MAX(IF(hour IS NULL AND ARRAY_LENGTH(group_by) = 0, partition_date, NULL)) as day_watermark,
+            MAX(IF(hour IS NOT NULL, partition_date, NULL)) as hour_watermark,
+            MAX(IF(ARRAY_TO_STRING(group_by, '/') = @rollup_group_by, partition_date, NULL)) as segment_watermark
+        FROM `{self.project_id}.{self.dataset_id}.{self.partials_table}`
+        WHERE metric_name = @metric_name
+          AND metric_column = @metric_column
+          AND data_source = @data_source
+        """
+        query_parameters = [
+            bigquery.ScalarQueryParameter("metric_name", "STRING", metric_name),
+            bigquery.ScalarQueryParameter("metric_column", "STRING", metric_column),
+            bigquery.ScalarQueryParameter("data_source", "STRING", source_table),
+            bigquery.ScalarQueryParameter("rollup_group_by", "STRING", "/".join(group_by or []))
+        ]
+        row = next(self._run_query(
+            query, query_parameters,
+            bytes_budget=self._bytes_budget(metric_name),
+            label=f"{metric_name} partials watermark"
+        ), None)
+        if row is None:
+            return None
+        watermarks = [row['day_watermark']]
+        if self.rollup_hourly:
+            watermarks.append(row['hour_watermark'])
+        if group_by:
+            watermarks.append(row['segment_watermark'])
+        return None if None in watermarks else min(watermarks)
+    
+    def _refresh_partials(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        timestamp_column: str,
+        since: date,
+        group_by: Optional[List[str]] = None
+    ):
+        """
+        Recompute rollups for partitions on or after `since`
+        
+        Runs as one server-side script: the watermark day is replaced
+        because it may have been incomplete when it was last aggregated,
+        and the raw scan is limited to the new partitions. The new rows are
+        aggregated once at the finest level needed (day, plus hour and
+        segment when enabled) into a temporary table, and the day, hourly
+        and per-segment rollups are merged from it (Chan's formula for M2,
+        KLL_QUANTILES.MERGE_PARTIAL for the sketches).
+        """
+        partials_id = f"{self.project_id}.{self.dataset_id}.{self.partials_table}"
+        column = f"`{metric_column}`"
+        group_by = list(group_by or [])
+        
+        # Finest level: day, hour (hourly rollups), segment dimensions (segment rollups)
+        fine_keys = {'day': f"DATE(`{timestamp_column}`)"}
+        if self.rollup_hourly:
+            fine_keys['hour'] = f"EXTRACT(HOUR FROM `{timestamp_column}`)"
+        segments = [f"segment_{i}" for i in range(len(group_by))]
+        for name, dimension in zip(segments, group_by):
+            fine_keys[name] = f"IFNULL(CAST(`{dimension}` AS STRING), 'NULL')"
+        fine_select = "".join(f"\n            {expression} as {name}," for name, expression in fine_keys.items())
+        
+        def insert(hour: str, rollup_group_by: str, segment_values: str, keys: str) -> str:
+            return f"""
+        INSERT INTO `{partials_id}` (
+            metric_name, metric_column, data_source, partition_date, hour, group_by, segment_values,
+            sample_count, sum_value, m2, min_value, max_value,
+            quantile_sketch, calculated_at
+        )
+        SELECT
+            @metric_name,
+            @metric_column,
+            @data_source,
+            day,
+            {hour},
+            {rollup_group_by},
+            {segment_values},
+            SUM(n),
+            SUM(s),
+            GREATEST(SUM(m2) + SUM(s * s / n) - SUM(s) * SUM(s) / SUM(n), 0),
+            MIN(min_value),
+            MAX(max_value),
+            KLL_QUANTILES.MERGE_PARTIAL(sketch),
+            CURRENT_TIMESTAMP()
+        FROM fine
+        GROUP BY {keys};
+        """
+        
+        # Only the levels inserted below are replaced; other levels keep their rows
+        levels = ["(hour IS NULL AND ARRAY_LENGTH(group_by) = 0)"]
+        if self.rollup_hourly:
+            levels.append("(hour IS NOT NULL AND ARRAY_LENGTH(group_by) = 0)")
+        if group_by:
+            levels.append("(hour IS NULL AND ARRAY_TO_STRING(group_by, '/') = ARRAY_TO_STRING(@group_by, '/'))")
+        
+        script = f"""
+        DELETE FROM `{partials_id}`
+        WHERE metric_name = @metric_name
+          AND metric_column = @metric_column
+          AND data_source = @data_source
+          AND partition_date >= @since
+          AND ({" OR ".join(levels)});
+        
+        CREATE TEMP TABLE fine AS
+        SELECT{fine_select}
+            COUNT({column}) as n,
+            SUM({column}) as s,
+            IFNULL(VAR_POP({column}), 0) * COUNT({column}) as m2,
+            MIN({column}) as min_value,
+            MAX({column}) as max_value,
+            KLL_QUANTILES.INIT_FLOAT64(CAST({column} AS FLOAT64), {self.sketch_precision}) as sketch
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        WHERE `{timestamp_column}` >= TIMESTAMP(@since)
+          AND {column} IS NOT NULL
+        GROUP BY {", ".join(fine_keys)};
+        """
+        script += insert("NULL", "ARRAY<STRING>[]", "ARRAY<STRING>[]", "day")
+        if self.rollup_hourly:
+            script += insert("hour", "ARRAY<STRING>[]", "ARRAY<STRING>[]", "day, hour")
+        if group_by:
+            script += insert("NULL", "@group_by", f"[{', '.join(segments)}]", ", ".join(["day"] + segments))
+        
+        query_parameters = [
+            bigquery.ScalarQueryParameter("metric_name", "STRING", metric_name),
+            bigquery.ScalarQueryParameter("metric_column", "STRING", metric_column),
+            bigquery.ScalarQueryParameter("data_source", "STRING", source_table),
+            bigquery.ScalarQueryParameter("since", "DATE", since),
+            bigquery.ArrayQueryParameter("group_by", "STRING", group_by)
+        ]
+        
+        logger.info(f"Refreshing partials for {metric_name} since {since.isoformat()}")
+        self._run_query(
+            script, query_parameters,
+            bytes_budget=self._bytes_budget(metric_name),
+            label=f"{metric_name} partials"
+        )
+    
+    def _update_rollups(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        timestamp_column: str,
+        lookback_days: int,
+        group_by: Optional[List[str]] = None
+    ) -> Tuple[date, date]:
+        """
+        Bring a metric's rollups up to date (only partitions after the watermark are scanned)
+        
+        Returns:
+            (window_start, since): first day of the lookback window and
+            first day that was rescanned
+        """
+        window_start = datetime.now(timezone.utc).date() - timedelta(days=lookback_days)
+        self._ensure_partials_table()
+        
+        watermark = self._get_partials_watermark(metric_name, metric_column, source_table, group_by)
+        since = max(watermark, window_start) if watermark else window_start
+        self._refresh_partials(
+            metric_name, metric_column, source_table, timestamp_column, since, group_by
+        )
+        return window_start, since
+    
+    def _rollup_source(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        window_start: date,
+        hourly: bool = False,
+        group_by: Optional[List[str]] = None
+    ) -> Tuple[str, List[bigquery.ScalarQueryParameter]]:
+        """
+        Subquery reading one rollup level of a metric's lookback window
+        
+        Columns: bucket_start (TIMESTAMP), segment_values, n, s, m2, ss
+        (sum of squares), min_value, max_value, sketch; the same shape as
+        raw rows bucketed with COUNT/SUM/MIN/MAX/KLL_QUANTILES.INIT.
+        """
+        query = f"""(
+            SELECT
+                TIMESTAMP_ADD(TIMESTAMP(partition_date), INTERVAL IFNULL(hour, 0) HOUR) as bucket_start,
+                segment_values,
+                sample_count as n,
+                sum_value as s,
+                m2,
+                m2 + sum_value * sum_value / sample_count as ss,
+                min_value,
+                max_value,
+                quantile_sketch as sketch
+            FROM `{self.project_id}.{self.dataset_id}.{self.partials_table}`
+            WHERE metric_name = @metric_name
+              AND metric_column = @metric_column
+              AND data_source = @data_source
+              AND partition_date >= @window_start
+              AND hour IS {"NOT " if hourly else ""}NULL
+              AND ARRAY_TO_STRING(group_by, '/') = @rollup_group_by
+        )"""
+        query_parameters = [
+            bigquery.ScalarQueryParameter("metric_name", "STRING", metric_name),
+            bigquery.ScalarQueryParameter("metric_column", "STRING", metric_column),
+            bigquery.ScalarQueryParameter("data_source", "STRING", source_table),
+            bigquery.ScalarQueryParameter("window_start", "DATE", window_start),
+            bigquery.ScalarQueryParameter("rollup_group_by", "STRING", "/".join(group_by or []))
+        ]
+        return query, query_parameters
+    
+    def _uses_rollups(self, timestamp_column: Optional[str], bucket: str = 'day') -> bool:
+        """Whether a bucketed method reads the rollup table instead of raw rows"""
+        return (self.incremental_enabled and self.local_backend is None and bool(timestamp_column)
+                and (bucket == 'day' or self.rollup_hourly))
+    
+    def _bucket_source(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        timestamp_column: str,
+        lookback_days: int,
+        bucket: str = 'day'
+    ) -> Tuple[str, List[bigquery.ScalarQueryParameter]]:
+        """
+        Subquery with one row per day or hour bucket of a metric
+        
+        Columns: bucket_start, n, s, ss, min_value, max_value, sketch. Read
+        from the rollups when the incremental tier is enabled (cost grows
+        with the number of buckets, not rows), otherwise aggregated from
+        raw rows in the lookback window.
+        """
+        if self._uses_rollups(timestamp_column, bucket):
+            window_start, _ = self._update_rollups(
+                metric_name, metric_column, source_table, timestamp_column, lookback_days
+            )
+            return self._rollup_source(
+                metric_name, metric_column, source_table, window_start, hourly=(bucket == 'hour')
+            )
+        
+        time_filter, query_parameters = self._time_window_filter(timestamp_column, lookback_days)
+        column = f"`{metric_column}`"
+        query = f"""(
+            SELECT
+                TIMESTAMP_TRUNC(`{timestamp_column}`, {bucket.upper()}) as bucket_start,
+                COUNT({column}) as n,
+                SUM({column}) as s,
+                SUM({column} * {column}) as ss,
+                MIN({column}) as min_value,
+                MAX({column}) as max_value,
+                KLL_QUANTILES.INIT_FLOAT64(CAST({column} AS FLOAT64), {self.sketch_precision}) as sketch
+            FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+            WHERE {column} IS NOT NULL
+              AND `{timestamp_column}` IS NOT NULL
+              AND {time_filter}
+            GROUP BY bucket_start
+        )"""
+        return query, query_parameters
+    
+    def calculate_incremental_baseline(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        timestamp_column: str,
+        lookback_days: Optional[int] = None
+    ) -> BaselineStats:
+        """
+        Calculate a lookback-window baseline from stored day partials
+        
+        Only partitions newer than the last watermark are scanned; older
+        days are read back from the partials table and merged (Chan's
+        formula for mean/variance, KLL sketch merge for quantiles).
+        
+        Args:
+            metric_name: Name for the baseline (e.g., "error_rate")
+            metric_column: Column name in source table
+            source_table: Source table name
+            timestamp_column: Column used to assign rows to day partitions
+            lookback_days: Number of days in the baseline window (uses config if None)
+        
+        Returns:
+            BaselineStats object with calculated statistics
+        """
+        lookback_days = lookback_days or self.lookback_days
+        
+        try:
+            window_start, since = self._update_rollups(
+                metric_name, metric_column, source_table, timestamp_column, lookback_days
+            )
+            
+            query = f"""
+            SELECT
+                ARRAY_AGG(STRUCT(sample_count, sum_value, m2, min_value, max_value)) as partials,
+                KLL_QUANTILES.MERGE_FLOAT64(quantile_sketch, {self._quantile_resolution()}) as quantiles
+            FROM `{self.project_id}.{self.dataset_id}.{self.partials_table}`
+            WHERE metric_name = @metric_name
+              AND metric_column = @metric_column
+              AND data_source = @data_source
+              AND partition_date >= @window_start
+              AND hour IS NULL
+              AND ARRAY_LENGTH(group_by) = 0
+            """
+            query_parameters = [
+                bigquery.ScalarQueryParameter("metric_name", "STRING", metric_name),
+                bigquery.ScalarQueryParameter("metric_column", "STRING", metric_column),
+                bigquery.ScalarQueryParameter("data_source", "STRING", source_table),
+                bigquery.ScalarQueryParameter("window_start", "DATE", window_start)
+            ]
+            row = next(self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=f"{metric_name} partials merge"
+            ))
+            
+            total = PartialAggregate.merge_all([
+                PartialAggregate(
+                    count=int(p['sample_count']),
+                    sum=float(p['sum_value']),
+                    m2=float(p['m2']),
+                    min_value=float(p['min_value']),
+                    max_value=float(p['max_value'])
+                )
+                for p in (row['partials'] or [])
+            ])
+            
+            if total.count == 0:
+                logger.warning(f"No data found for {metric_name} in {source_table}")
+                raise ValueError(f"No data found for metric {metric_name}")
+            
+            quantiles = list(row['quantiles'])
+            baseline_id = f"baseline-{metric_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            
+            baseline = BaselineStats(
+                baseline_id=baseline_id,
+                metric_name=metric_name,
+                mean=total.mean,
+                std_dev=total.std_dev,
+                min_value=total.min_value,
+                max_value=total.max_value,
+                p50=self._quantile_at(quantiles, 50),
+                p95=self._quantile_at(quantiles, 95),
+                p99=self._quantile_at(quantiles, 99),
+                calculated_at=datetime.now(),
+                lookback_days=lookback_days,
+                sample_count=total.count,
+                data_source=source_table,
+                notes=(f"Calculated from {metric_column} column using incremental "
+                       f"day partials (scanned since {since.isoformat()})"),
+                percentiles={p: self._quantile_at(quantiles, p) for p in self.percentiles}
+            )
+            
+            logger.info(f"Incremental baseline calculated for {metric_name}")
+            logger.info(f"  Mean: {baseline.mean:.4f}, Std Dev: {baseline.std_dev:.4f}")
+            logger.info(f"  Samples: {baseline.sample_count:,}")
+            
+            return baseline
+            
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error calculating incremental baseline: {gce}")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to calculate incremental baseline for {metric_name}: {e}")
+            raise
+    
+    def _calculate_rolling_average(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
+    ) -> BaselineStats:
+        """
+        Calculate baseline using a daily-bucketed rolling window
+        
+        Runs as one query: rows are bucketed per day (count, sum, sum of
+        squares, KLL sketch; read from the day rollups when the incremental
+        tier is enabled), window functions roll the buckets over
+        advanced_models.rolling_average.window_size days, and a final
+        aggregate returns the rolling series plus the current window's
+        quantiles. The baseline band (mean/std_dev/percentiles) is the most
+        recent window; the daily series is attached as rolling_series.
+        """
+        timestamp_column = timestamp_column or self._metric_config(metric_name).get('timestamp_column')
+        if not timestamp_column:
+            logger.warning(f"Rolling average needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self._calculate_simple_stats(
+                metric_name, metric_column, source_table, lookback_days
+            )
+        
+        window_size = self.rolling_window_size
+        min_periods = self.rolling_min_periods
+        buckets, query_parameters = self._bucket_source(
+            metric_name, metric_column, source_table, timestamp_column, lookback_days
+        )
+        
+        query = f"""
+        WITH daily AS (
+            SELECT DATE(bucket_start) as day, n, s, ss, min_value, max_value, sketch
+            FROM {buckets}
+        ),
+        rolling AS (
+            SELECT
+                *,
+                SUM(n) OVER w as window_n,
+                SUM(s) OVER w as window_s,
+                SUM(ss) OVER w as window_ss,
+                COUNT(*) OVER w as window_days,
+                DATE_DIFF(MAX(day) OVER (), day, DAY) < {window_size} as in_current_window
+            FROM daily
+            WINDOW w AS (ORDER BY UNIX_DATE(day) RANGE BETWEEN {window_size - 1} PRECEDING AND CURRENT ROW)
+        )
+        SELECT
+            ARRAY_AGG(
+                IF(window_days >= {min_periods}, STRUCT(
+                    day,
+                    window_n as sample_count,
+                    window_s / window_n as mean,
+                    IFNULL(SQRT(GREATEST(
+                        SAFE_DIVIDE(window_ss - window_s * window_s / window_n, window_n - 1), 0
+                    )), 0) as std_dev
+                ), NULL)
+                IGNORE NULLS ORDER BY day
+            ) as series,
+            KLL_QUANTILES.MERGE_FLOAT64(
+                IF(in_current_window, sketch, NULL), {self._quantile_resolution()}
+            ) as quantiles,
+            MIN(IF(in_current_window, min_value, NULL)) as min_value,
+            MAX(IF(in_current_window, max_value, NULL)) as max_value
+        FROM rolling
+        """
+        
+        try:
+            logger.debug(f"Executing rolling average query for {metric_name}")
+            row = next(self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=metric_name
+            ))
+            
+            series = [dict(point) for point in (row['series'] or [])]
+            if not series:
+                logger.warning(f"Not enough daily data for a {window_size}-day window for {metric_name}")
+                raise ValueError(f"No data found for metric {metric_name}")
+            
+            current = series[-1]
+            quantiles = list(row['quantiles'])
+            baseline_id = f"baseline-{metric_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            
+            baseline = BaselineStats(
+                baseline_id=baseline_id,
+                metric_name=metric_name,
+                mean=float(current['mean']),
+                std_dev=float(current['std_dev']),
+                min_value=float(row['min_value']),
+                max_value=float(row['max_value']),
+                p50=self._quantile_at(quantiles, 50),
+                p95=self._quantile_at(quantiles, 95),
+                p99=self._quantile_at(quantiles, 99),
+                calculated_at=datetime.now(),
+                lookback_days=lookback_days,
+                sample_count=int(current['sample_count']),
+                data_source=source_table,
+                notes=(f"Calculated from {metric_column} column using rolling_average method "
+                       f"({window_size}-day window, min {min_periods} days)"),
+                percentiles={p: self._quantile_at(quantiles, p) for p in self.percentiles},
+                rolling_series=series
+            )
+            
+            logger.info(f"Rolling baseline calculated for {metric_name} ({len(series)} windows)")
+            logger.info(f"  Current mean: {baseline.mean:.4f}, Std Dev: {baseline.std_dev:.4f}")
+            
+            return baseline
+            
+        except StopIteration:
+            logger.error(f"Query returned no results for {metric_name}")
+            raise ValueError(f"No data returned from query for {metric_name}")
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error calculating rolling baseline: {gce}")
+            raise
+    
+    def _calculate_seasonal_decomposition(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
+    ) -> BaselineStats:
+        """
+        Calculate baseline using seasonal decomposition
+        
+        One query buckets the metric by day or hour (count, sum, sum of
+        squares, KLL sketch; read from the rollups when the incremental
+        tier is enabled) and returns the bucket series with the merged
+        quantiles. The series is decomposed with the vectorized engine in
+        seasonal.py using advanced_models.seasonal_decomposition.period/model,
+        and one mean/std per phase (e.g. day-of-week) is stored with the
+        baseline. std_dev is the spread around the seasonal fit.
+        """
+        timestamp_column = timestamp_column or self._metric_config(metric_name).get('timestamp_column')
+        if not timestamp_column:
+            logger.warning(f"Seasonal decomposition needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self._calculate_simple_stats(
+                metric_name, metric_column, source_table, lookback_days
+            )
+        
+        unit = SEASONAL_BUCKET_UNITS[self.seasonal_bucket]
+        bucket_source, query_parameters = self._bucket_source(
+            metric_name, metric_column, source_table, timestamp_column, lookback_days, self.seasonal_bucket
+        )
+        
+        query = f"""
+        WITH buckets AS (
+            SELECT bucket_start, n, s, ss, min_value, max_value, sketch
+            FROM {bucket_source}
+        )
+        SELECT
+            ARRAY_AGG(STRUCT(bucket_start, n, s, ss) ORDER BY bucket_start) as buckets,
+            KLL_QUANTILES.MERGE_FLOAT64(sketch, {self._quantile_resolution()}) as quantiles,
+            MIN(min_value) as min_value,
+            MAX(max_value) as max_value,
+            SUM(n) as sample_count
+        FROM buckets
+        """
+        
+        try:
+            logger.debug(f"Executing seasonal bucket query for {metric_name}")
+            row = next(self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=metric_name
+            ))
+            
+            if not row['sample_count']:
+                logger.warning(f"No data found for {metric_name} in {source_table}")
+                raise ValueError(f"No data found for metric {metric_name}")
+            
+            bucket_rows = row['buckets']
+            grid = bucket_grid(
+                np.array([b['bucket_start'].replace(tzinfo=None) for b in bucket_rows], dtype='datetime64[us]'),
+                [b['n'] for b in bucket_rows],
+                [b['s'] for b in bucket_rows],
+                [b['ss'] for b in bucket_rows],
+                unit=unit
+            )
+            components = decompose(grid, self.seasonal_period, self.seasonal_model, unit)
+            phase_means, phase_std_devs, fit_std = phase_baselines(components)
+            
+            sample_count = int(row['sample_count'])
+            mean = float(sum(b['s'] for b in bucket_rows)) / sample_count
+            quantiles = list(row['quantiles'])
+            baseline_id = f"baseline-{metric_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            
+            baseline = BaselineStats(
+                baseline_id=baseline_id,
+                metric_name=metric_name,
+                mean=mean,
+                std_dev=fit_std,
+                min_value=float(row['min_value']),
+                max_value=float(row['max_value']),
+                p50=self._quantile_at(quantiles, 50),
+                p95=self._quantile_at(quantiles, 95),
+                p99=self._quantile_at(quantiles, 99),
+                calculated_at=datetime.now(),
+                lookback_days=lookback_days,
+                sample_count=sample_count,
+                data_source=source_table,
+                notes=(f"Calculated from {metric_column} column using seasonal_decomposition method "
+                       f"({self.seasonal_model}, period {self.seasonal_period} x {self.seasonal_bucket})"),
+                percentiles={p: self._quantile_at(quantiles, p) for p in self.percentiles},
+                seasonal_period=self.seasonal_period,
+                seasonal_bucket=self.seasonal_bucket,
+                phase_means=phase_means,
+                phase_std_devs=phase_std_devs
+            )
+            
+            logger.info(f"Seasonal baseline calculated for {metric_name} ({len(bucket_rows)} buckets)")
+            logger.info(f"  Mean: {baseline.mean:.4f}, Fit Std Dev: {baseline.std_dev:.4f}")
+            
+            return baseline
+            
+        except StopIteration:
+            logger.error(f"Query returned no results for {metric_name}")
+            raise ValueError(f"No data returned from query for {metric_name}")
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error calculating seasonal baseline: {gce}")
+            raise
+    
+    def _calculate_hour_of_week(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
+    ) -> BaselineStats:
+        """
+        Calculate baseline per hour of the week (168 phases, Monday 00:00 UTC first)
+        
+        One scan groups the metric by hour of the week with ROLLUP, so the
+        same query returns the 168 per-phase rows (mean, std dev,
+        quantiles) and the overall row. With hourly rollups enabled the
+        same rows are merged from the hourly rollups instead of raw rows.
+        The profile is stored with the baseline as fixed-length arrays;
+        detectors look up the expected value of a timestamp by index
+        (BaselineStats.expected_at).
+        """
+        timestamp_column = timestamp_column or self._metric_config(metric_name).get('timestamp_column')
+        if not timestamp_column:
+            logger.warning(f"hour_of_week needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self._calculate_simple_stats(
+                metric_name, metric_column, source_table, lookback_days
+            )
+        
+        if self._uses_rollups(timestamp_column, 'hour'):
+            bucket_source, query_parameters = self._bucket_source(
+                metric_name, metric_column, source_table, timestamp_column, lookback_days, 'hour'
+            )
+            query = f"""
+        SELECT
+            phase,
+            SUM(s) / SUM(n) as mean,
+            SQRT(GREATEST(SAFE_DIVIDE(SUM(ss) - SUM(s) * SUM(s) / SUM(n), SUM(n) - 1), 0)) as std_dev,
+            MIN(min_value) as min_value,
+            MAX(max_value) as max_value,
+            KLL_QUANTILES.MERGE_FLOAT64(sketch, {self._quantile_resolution()}) as quantiles,
+            SUM(n) as sample_count
+        FROM (
+            SELECT
+                MOD(TIMESTAMP_DIFF(bucket_start, TIMESTAMP '1970-01-05 00:00:00+00', HOUR),
+                    {HOURS_PER_WEEK}) as phase,
+                *
+            FROM {bucket_source}
+        )
+        GROUP BY ROLLUP(phase)
+        """
+            return self._hour_of_week_from_rows(
+                query, query_parameters, metric_name, metric_column, source_table, lookback_days
+            )
+        
+        time_filter, query_parameters = self._time_window_filter(timestamp_column, lookback_days)
+        
+        query = f"""
+        SELECT
+            phase,{self._stats_select_expressions(metric_column)}
+        FROM (
+            SELECT
+                MOD(TIMESTAMP_DIFF(`{timestamp_column}`, TIMESTAMP '1970-01-05 00:00:00+00', HOUR),
+                    {HOURS_PER_WEEK}) as phase,
+                `{metric_column}`
+            FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+            WHERE `{metric_column}` IS NOT NULL
+              AND `{timestamp_column}` IS NOT NULL
+              AND {time_filter}
+        )
+        GROUP BY ROLLUP(phase)
+        """
+        return self._hour_of_week_from_rows(
+            query, query_parameters, metric_name, metric_column, source_table, lookback_days
+        )
+    
+    def _hour_of_week_from_rows(
+        self,
+        query: str,
+        query_parameters: List[bigquery.ScalarQueryParameter],
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int
+    ) -> BaselineStats:
+        """Run an hour_of_week query (one row per phase plus the ROLLUP row) and build the baseline"""
+        try:
+            logger.debug(f"Executing hour_of_week query for {metric_name}")
+            rows = list(self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=metric_name
+            ))
+            overall = next((row for row in rows if row['phase'] is None), None)
+            if overall is None:
+                logger.error(f"Query returned no results for {metric_name}")
+                raise ValueError(f"No data returned from query for {metric_name}")
+            
+            baseline = self._build_baseline_from_row(
+                overall, metric_name, metric_column, source_table, lookback_days
+            )
+            
+            counts = np.zeros(HOURS_PER_WEEK, dtype=np.int64)
+            means = np.full(HOURS_PER_WEEK, np.nan)
+            std_devs = np.full(HOURS_PER_WEEK, np.nan)
+            quantiles = {p: np.full(HOURS_PER_WEEK, np.nan) for p in self.percentiles}
+            for row in rows:
+                if row['phase'] is None:
+                    continue
+                phase = int(row['phase'])
+                counts[phase] = row['sample_count']
+                means[phase] = row['mean'] if row['mean'] is not None else np.nan
+                std_devs[phase] = row['std_dev'] if row['std_dev'] is not None else np.nan
+                for p in self.percentiles:
+                    quantiles[p][phase] = self._quantile_at(list(row['quantiles']), p)
+            
+            profile = fill_phase_profile(
+                counts, means, std_devs, quantiles,
+                baseline.mean, baseline.std_dev, baseline.percentiles
+            )
+            baseline.seasonal_period = HOURS_PER_WEEK
+            baseline.seasonal_bucket = 'hour'
+            baseline.phase_counts = profile['phase_counts']
+            baseline.phase_means = profile['phase_means']
+            baseline.phase_std_devs = profile['phase_std_devs']
+            baseline.phase_percentiles = profile['phase_percentiles']
+            baseline.notes = f"Calculated from {metric_column} column using hour_of_week method"
+            
+            logger.info(f"Hour-of-week baseline for {metric_name}: "
+                        f"{int((counts > 0).sum())}/{HOURS_PER_WEEK} hours with data")
+            return baseline
+            
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error calculating hour_of_week baseline: {gce}")
+            raise
+    
+    def _ensure_smoothing_state_table(self):
+        """Create the smoothing state table if it doesn't exist (once per schema version)"""
+        table_id = f"{self.project_id}.{self.dataset_id}.{self.smoothing_state_table}"
+        self.schema_verifier.ensure(table_id, BASELINE_SMOOTHING_STATE_TABLE_SCHEMA,
+                                    self._verify_smoothing_state_table)
+    
+    def _verify_smoothing_state_table(self):
+        table_id = f"{self.project_id}.{self.dataset_id}.{self.smoothing_state_table}"
+        
+        try:
+            self.client.get_table(table_id)
+        except Exception:
+            logger.info(f"Creating smoothing state table: {table_id}")
+            try:
+                schema = [bigquery.SchemaField(**field) for field in BASELINE_SMOOTHING_STATE_TABLE_SCHEMA]
+                table = bigquery.Table(table_id, schema=schema)
+                table.clustering_fields = ["metric_name"]
+                self.client.create_table(table, exists_ok=True)
+                logger.info(f"Successfully created smoothing state table: {table_id}")
+            except GoogleCloudError as gce:
+                logger.error(f"Failed to create smoothing state table: {gce}")
+                raise
+    
+    def _load_smoothing_state(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str
+    ) -> Optional[SmoothingState]:
+        """
+        Load the stored Holt-Winters state for a metric
+        
+        Returns:
+            The state, or None if none is stored or it was fitted with a
+            different period/bucket (the metric is then refitted)
+        """
+        query = f"""
+        SELECT *
+        FROM `{self.project_id}.{self.dataset_id}.{self.smoothing_state_table}`
+        WHERE metric_name = @metric_name
+          AND metric_column = @metric_column
+          AND data_source = @data_source
+        ORDER BY updated_at DESC
+        LIMIT 1
+        """
+        query_parameters = [
+            bigquery.ScalarQueryParameter("metric_name", "STRING", metric_name),
+            bigquery.ScalarQueryParameter("metric_column", "STRING", metric_column),
+            bigquery.ScalarQueryParameter("data_source", "STRING", source_table)
+        ]
+        row = next(self._run_query(query, query_parameters, bytes_budget=None,
+                                   label=f"smoothing state of {metric_name}"), None)
+        if row is None:
+            return None
+        
+        state = SmoothingState.from_bigquery_row(row)
+        if state.period != self.smoothing_period or state.bucket != self.smoothing_bucket:
+            logger.info(f"Stored smoothing state for {metric_name} uses a different period/bucket, refitting")
+            return None
+        return state
+    
+    def _save_smoothing_state(self, state: SmoothingState):
+        """Replace the stored Holt-Winters state of a metric"""
+        state_id = f"{self.project_id}.{self.dataset_id}.{self.smoothing_state_table}"
+        
+        script = f"""
+        DELETE FROM `{state_id}`
+        WHERE metric_name = @metric_name
+          AND metric_column = @metric_column
+          AND data_source = @data_source;
+        
+        INSERT INTO `{state_id}` (
+            metric_name, metric_column, data_source, bucket, period, last_bucket,
+            level, trend, season, resid_var, sample_count, min_value, max_value, updated_at
+        )
+        VALUES (
+            @metric_name, @metric_column, @data_source, @bucket, @period, @last_bucket,
+            @level, @trend, @season, @resid_var, @sample_count, @min_value, @max_value,
+            CURRENT_TIMESTAMP()
+        );
+        """
+        query_parameters = [
+            bigquery.ScalarQueryParameter("metric_name", "STRING", state.metric_name),
+            bigquery.ScalarQueryParameter("metric_column", "STRING", state.metric_column),
+            bigquery.ScalarQueryParameter("data_source", "STRING", state.data_source),
+            bigquery.ScalarQueryParameter("bucket", "STRING", state.bucket),
+            bigquery.ScalarQueryParameter("period", "INT64", state.period),
+            bigquery.ScalarQueryParameter("last_bucket", "TIMESTAMP", state.last_bucket),
+            bigquery.ScalarQueryParameter("level", "FLOAT64", state.level),
+            bigquery.ScalarQueryParameter("trend", "FLOAT64", state.trend),
+            bigquery.ArrayQueryParameter("season", "FLOAT64", state.season),
+            bigquery.ScalarQueryParameter("resid_var", "FLOAT64", state.resid_var),
+            bigquery.ScalarQueryParameter("sample_count", "INT64", state.sample_count),
+            bigquery.ScalarQueryParameter("min_value", "FLOAT64", state.min_value),
+            bigquery.ScalarQueryParameter("max_value", "FLOAT64", state.max_value)
+        ]
+        self._run_query(script, query_parameters, label=f"{state.metric_name} smoothing state")
+    
+    @staticmethod
+    def _utc_datetime(value: np.datetime64) -> datetime:
+        """Convert a naive-UTC datetime64 to an aware datetime"""
+        return value.astype('datetime64[us]').astype(datetime).replace(tzinfo=timezone.utc)
+    
+    def _calculate_exponential_smoothing(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
+    ) -> BaselineStats:
+        """
+        Calculate baseline using Holt-Winters exponential smoothing
+        
+        The level/trend/season state is stored in the smoothing state table.
+        Each run aggregates only the complete buckets after the stored state
+        (the lookback window, or all history without baseline.time_window,
+        on the first run), feeds them through
+        the recursion and stores the new state, so a refresh costs
+        O(new buckets). Uses advanced_models.exponential_smoothing
+        alpha/beta/gamma/period/bucket.
+        """
+        timestamp_column = timestamp_column or self._metric_config(metric_name).get('timestamp_column')
+        if not timestamp_column:
+            logger.warning(f"Exponential smoothing needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self._calculate_simple_stats(
+                metric_name, metric_column, source_table, lookback_days
+            )
+        
+        unit = SEASONAL_BUCKET_UNITS[self.smoothing_bucket]
+        column = f"`{metric_column}`"
+        
+        try:
+            self._ensure_smoothing_state_table()
+            previous = self._load_smoothing_state(metric_name, metric_column, source_table)
+            since, until = refresh_window(previous, lookback_days, unit, self.time_window_enabled)
+            since_filter = f"`{timestamp_column}` >= @since" if since is not None else "TRUE"
+            
+            query = f"""
+            WITH buckets AS (
+                SELECT
+                    TIMESTAMP_TRUNC(`{timestamp_column}`, {self.smoothing_bucket.upper()}) as bucket_start,
+                    COUNT({column}) as n,
+                    SUM({column}) as s,
+                    SUM({column} * {column}) as ss,
+                    MIN({column}) as min_value,
+                    MAX({column}) as max_value
+                FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+                WHERE {column} IS NOT NULL
+                  AND {since_filter}
+                  AND `{timestamp_column}` < @until
+                GROUP BY bucket_start
+            )
+            SELECT
+                ARRAY_AGG(STRUCT(bucket_start, n, s, ss) ORDER BY bucket_start) as buckets,
+                MIN(min_value) as min_value,
+                MAX(max_value) as max_value
+            FROM buckets
+            """
+            query_parameters = [bigquery.ScalarQueryParameter("until", "TIMESTAMP", self._utc_datetime(until))]
+            if since is not None:
+                query_parameters.append(
+                    bigquery.ScalarQueryParameter("since", "TIMESTAMP", self._utc_datetime(since))
+                )
+            
+            logger.debug(f"Executing smoothing bucket query for {metric_name} since {since}")
+            row = next(self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=metric_name
+            ))
+            
+            bucket_rows = row['buckets'] or []
+            if bucket_rows:
+                buckets = bucket_grid(
+                    np.array([b['bucket_start'].replace(tzinfo=None) for b in bucket_rows], dtype='datetime64[us]'),
+                    [b['n'] for b in bucket_rows],
+                    [b['s'] for b in bucket_rows],
+                    [b['ss'] for b in bucket_rows],
+                    unit=unit
+                )
+            else:
+                buckets = {'days': np.array([], dtype=f'datetime64[{unit}]')}
+            
+            state = refresh_state(
+                previous, buckets,
+                row['min_value'] if row['min_value'] is not None else np.nan,
+                row['max_value'] if row['max_value'] is not None else np.nan,
+                metric_name, metric_column, source_table,
+                self.smoothing_bucket, self.smoothing_period,
+                self.smoothing_alpha, self.smoothing_beta, self.smoothing_gamma,
+                since=since
+            )
+            if state is None:
+                logger.warning(f"No data found for {metric_name} in {source_table}")
+                raise ValueError(f"No data found for metric {metric_name}")
+            
+            if bucket_rows:
+                self._save_smoothing_state(state)
+            
+            baseline = state_to_baseline(
+                state, self.percentiles, lookback_days,
+                self.smoothing_alpha, self.smoothing_beta, self.smoothing_gamma
+            )
+            
+            logger.info(f"Smoothing baseline calculated for {metric_name} ({len(bucket_rows)} new buckets)")
+            logger.info(f"  Forecast: {baseline.mean:.4f}, Std Dev: {baseline.std_dev:.4f}")
+            
+            return baseline
+            
+        except StopIteration:
+            logger.error(f"Query returned no results for {metric_name}")
+            raise ValueError(f"No data returned from query for {metric_name}")
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error calculating smoothing baseline: {gce}")
+            raise
+    
+    def _backfill_table_chunk(
+        self,
+        source_table: str,
+        metrics: List[Dict[str, Any]],
+        timestamp_column: str,
+        first_day: date,
+        last_day: date,
+        lookback_days: int
+    ) -> List[BaselineStats]:
+        """
+        Baselines as of every day in [first_day, last_day] for the metrics of one table
+        
+        One query: the raw rows of the chunk's range (plus the lookback
+        before it) are bucketed per day with moments and a KLL sketch per
+        metric, then each as-of day merges the buckets of its window.
+        Days whose window has no data get no baseline.
+        """
+        day = f"DATE(`{timestamp_column}`)"
+        daily_columns = ",".join(
+            f"""
+                COUNT(`{m['column']}`) as m{i}_n,
+                SUM(`{m['column']}`) as m{i}_s,
+                SUM(`{m['column']}` * `{m['column']}`) as m{i}_ss,
+                MIN(`{m['column']}`) as m{i}_min,
+                MAX(`{m['column']}`) as m{i}_max,
+                KLL_QUANTILES.INIT_FLOAT64(CAST(`{m['column']}` AS FLOAT64), {self.sketch_precision}) as m{i}_sketch"""
+            for i, m in enumerate(metrics)
+        )
+        window_columns = ",".join(
+            f"""
+            SUM(m{i}_s) / NULLIF(SUM(m{i}_n), 0) as m{i}_mean,
+            IFNULL(SQRT(GREATEST(SAFE_DIVIDE(
+                SUM(m{i}_ss) - SUM(m{i}_s) * SUM(m{i}_s) / NULLIF(SUM(m{i}_n), 0), SUM(m{i}_n) - 1
+            ), 0)), 0) as m{i}_std_dev,
+            MIN(m{i}_min) as m{i}_min_value,
+            MAX(m{i}_max) as m{i}_max_value,
+            KLL_QUANTILES.MERGE_FLOAT64(m{i}_sketch, {self._quantile_resolution()}) as m{i}_quantiles,
+            SUM(m{i}_n) as m{i}_sample_count"""
+            for i in range(len(metrics))
+        )
+        
+        query = f"""
+        WITH daily AS (
+            SELECT
+                {day} as day,{daily_columns}
+            FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+            WHERE `{timestamp_column}` >= TIMESTAMP(DATE_SUB(@first_day, INTERVAL @lookback_days DAY))
+              AND `{timestamp_column}` < TIMESTAMP(@last_day)
+            GROUP BY day
+        )
+        SELECT
+            as_of,{window_columns}
+        FROM UNNEST(GENERATE_DATE_ARRAY(@first_day, @last_day)) as as_of
+        JOIN daily
+          ON daily.day >= DATE_SUB(as_of, INTERVAL @lookback_days DAY)
+         AND daily.day < as_of
+        GROUP BY as_of
+        ORDER BY as_of
+        """
+        query_parameters = [
+            bigquery.ScalarQueryParameter("first_day", "DATE", first_day),
+            bigquery.ScalarQueryParameter("last_day", "DATE", last_day),
+            bigquery.ScalarQueryParameter("lookback_days", "INT64", lookback_days)
+        ]
+        budgets = [self._bytes_budget(metric['name']) for metric in metrics]
+        
+        try:
+            rows = list(self._run_query(
+                query, query_parameters,
+                bytes_budget=sum(budgets) if all(budgets) else None,
+                label=f"{source_table} backfill"
+            ))
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error backfilling baselines from {source_table}: {gce}")
+            raise
+        
+        baselines = []
+        for row in rows:
+            for i, metric in enumerate(metrics):
+                if not row[f"m{i}_sample_count"]:
+                    continue
+                baseline = self._build_baseline_from_row(
+                    row, metric['name'], metric['column'], source_table, lookback_days, prefix=f"m{i}_"
+                )
+                baselines.append(as_of_baseline(baseline, row['as_of'], metric['column'], lookback_days))
+        return baselines
+    
+    def backfill_baselines(
+        self,
+        start_date: date,
+        end_date: date,
+        metric_names: Optional[List[str]] = None,
+        lookback_days: Optional[int] = None,
+        checkpoint_path: Optional[str] = None
+    ) -> int:
+        """
+        Compute and save the baseline in effect on every day of a date range
+        
+        The baseline as of day D covers the lookback_days before D and is
+        saved with calculated_at = D 00:00 UTC. Work is split into chunks of
+        baseline.backfill.chunk_days days per source table; each chunk is
+        one query (or one NumPy pass locally) and one load job, and is
+        recorded in the checkpoint file when saved. Running the same
+        backfill again after an interruption continues with the first
+        unfinished chunk; finished jobs stay in the checkpoint file, so
+        running a completed backfill again computes and writes nothing.
+        
+        Metrics without a timestamp_column and segmented metrics (group_by)
+        are skipped.
+        
+        Args:
+            start_date: First as-of day
+            end_date: Last as-of day (inclusive)
+            metric_names: Metrics to backfill (all enabled metrics if None)
+            lookback_days: Window length in days (uses config if None)
+            checkpoint_path: Checkpoint file (uses baseline.backfill.checkpoint_path if None)
+        
+        Returns:
+            Number of baselines written by this call (rows of chunks saved
+            by an earlier run are not counted)
+        """
+        lookback_days = lookback_days or self.lookback_days
+        
+        metrics = []
+        for metric in self._get_enabled_metrics():
+            if metric_names is not None and metric['name'] not in metric_names:
+                continue
+            if metric.get('group_by'):
+                print(f"[SKIP] {metric['name']} (segmented metrics are not backfilled)")
+            elif not metric.get('timestamp_column'):
+                print(f"[SKIP] {metric['name']} (backfill needs a timestamp_column)")
+            else:
+                metrics.append(metric)
+        if not metrics:
+            logger.warning("No metrics to backfill")
+            return 0
+        
+        job_key = backfill_job_key(start_date, end_date, lookback_days, self.percentiles, metrics)
+        checkpoint = BackfillCheckpoint(checkpoint_path or self.backfill_checkpoint_path, job_key)
+        chunks = date_chunks(start_date, end_date, self.backfill_chunk_days)
+        tables: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for metric in metrics:
+            tables.setdefault((metric['table'], metric['timestamp_column']), []).append(metric)
+        
+        logger.info(f"Backfilling {len(metrics)} metrics from {start_date} to {end_date} "
+                    f"({len(tables) * len(chunks)} chunks, job {job_key})")
+        if len(checkpoint):
+            logger.info(f"Resuming: {len(checkpoint)} chunks already done")
+        
+        written = 0
+        skipped = 0
+        for (source_table, timestamp_column), table_metrics in tables.items():
+            for first_day, last_day in chunks:
+                unit = f"{source_table}/{timestamp_column}/{first_day.isoformat()}"
+                if checkpoint.is_done(unit):
+                    skipped += 1
+                    continue
+                
+                if self.local_backend is not None:
+                    baselines = self.local_backend.backfill_baselines(
+                        source_table, table_metrics, timestamp_column, first_day, last_day, lookback_days
+                    )
+                else:
+                    baselines = self._backfill_table_chunk(
+                        source_table, table_metrics, timestamp_column, first_day, last_day, lookback_days
+                    )
+                
+                # Run ID per chunk: a chunk saved before an interruption is not appended again
+                writer = self.create_writer(run_id=f"backfill-{job_key}-{unit}")
+                # Backfilled rows are older than the latest baselines; do not cache them as latest
+                writer.on_commit = None
+                for baseline in baselines:
+                    writer.add(baseline)
+                saved = writer.flush()
+                written += saved
+                checkpoint.mark_done(unit)
+                print(f"[OK] Backfilled {source_table} {first_day} to {last_day}: {saved} baselines"
+                      + (f" ({len(baselines) - saved} already saved)" if saved < len(baselines) else ""))
+        
+        if skipped:
+            print(f"[SKIP] {skipped} chunks already backfilled (checkpoint job {job_key})")
+        if self.baseline_cache is not None:
+            for metric in metrics:
+                self.baseline_cache.invalidate_metric(metric['name'])
+        logger.info(f"Backfill complete: {written} baselines written")
+        return written
+    
+    def create_writer(self, run_id: Optional[str] = None) -> BaselineWriter:
+        """
+        Create a bulk writer for one refresh run
+        
+        Args:
+            run_id: Run ID stamped on every row; passing the same ID again
+                    (e.g. when retrying a scheduled refresh) does not duplicate rows
+        
+        Returns:
+            BaselineWriter targeting the Baseline table (or the local store)
+        """
+        return BaselineWriter(
+            self.client,
+            f"{self.project_id}.{self.dataset_id}.Baseline",
+            run_id=run_id,
+            local_store=self.local_backend.store if self.local_backend is not None else None,
+            on_commit=self._update_cache,
+            before_load=self._ensure_baseline_table
+        )
+    
+    def _update_cache(self, baselines: List[BaselineStats], batches: List[BaselineBatch]):
+        """Make saved baselines visible to cached lookups"""
+        if self.baseline_cache is None:
+            return
+        for baseline in baselines:
+            self.baseline_cache.put_if_newer((baseline.metric_name, baseline.segment_key), baseline)
+            if baseline.segment_key is not None:
+                self.baseline_cache.invalidate((baseline.metric_name, ALL_SEGMENTS))
+        for batch in batches:
+            self.baseline_cache.invalidate_metric(batch.metric_name)
+    
+    def save_baselines(self, baselines: List[BaselineStats], run_id: Optional[str] = None) -> int:
+        """
+        Save several baselines with one load job
+        
+        Args:
+            baselines: BaselineStats objects to save
+            run_id: Refresh run ID (see create_writer)
+        
+        Returns:
+            Number of rows written (0 if the run was already saved)
+        """
+        writer = self.create_writer(run_id)
+        for baseline in baselines:
+            writer.add(baseline)
+        return writer.flush()
+    
+    def save_baseline(self, baseline: BaselineStats):
+        """
+        Save baseline to BigQuery Baseline table
+        
+        Streams a single row; refreshes that produce many baselines should
+        use save_baselines or create_writer instead.
+        
+        Args:
+            baseline: BaselineStats object to save
+        """
+        if self.local_backend is not None:
+            self.local_backend.store.save([baseline])
+            self._update_cache([baseline], [])
+            logger.info(f"Baseline saved locally: {baseline.baseline_id}")
+            return
+        
+        table_id = f"{self.project_id}.{self.dataset_id}.Baseline"
+        self._ensure_baseline_table()
+        
+        logger.info(f"Saving baseline to BigQuery: {table_id}")
+        logger.debug(f"Baseline ID: {baseline.baseline_id}")
+        
+        try:
+            # Insert row
+            errors = self.client.insert_rows_json(
+                table_id,
+                [baseline.to_bigquery_row()]
+            )
+            
+            if errors:
+                logger.error(f"Failed to save baseline: {errors}")
+                raise Exception(f"Failed to save baseline: {errors}")
+            
+            self._update_cache([baseline], [])
+            logger.info(f"Baseline saved successfully: {baseline.baseline_id}")
+            
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error saving baseline: {gce}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error saving baseline: {e}")
+            raise
+    
+    def get_latest_baseline(
+        self,
+        metric_name: str,
+        segment_key: Optional[str] = None
+    ) -> Optional[BaselineStats]:
+        """
+        Retrieve the most recent baseline for a metric
+        
+        Served from the in-process cache when possible (see get_latest_baselines).
+        
+        Args:
+            metric_name: Name of the metric
+            segment_key: Segment to retrieve (e.g. "cluster=3"); None for the global baseline
+        
+        Returns:
+            BaselineStats object or None if not found
+        """
+        baseline = self.get_latest_baselines([metric_name], segment_key)[metric_name]
+        if baseline is None:
+            logger.warning(f"No baseline found for {metric_name}")
+        return baseline
+    
+    def get_latest_baselines(
+        self,
+        metric_names: List[str],
+        segment_key: Optional[str] = None
+    ) -> Dict[str, Optional[BaselineStats]]:
+        """
+        Retrieve the most recent baseline of several metrics
+        
+        Cached entries are returned without a query; all remaining metrics
+        are fetched together in one QUALIFY ROW_NUMBER() query and cached
+        (including metrics that have no baseline yet).
+        
+        Args:
+            metric_names: Names of the metrics
+            segment_key: Segment to retrieve; None for the global baselines
+        
+        Returns:
+            Dictionary mapping each metric name to its BaselineStats (or None)
+        """
+        results: Dict[str, Optional[BaselineStats]] = {}
+        missing = []
+        for metric_name in dict.fromkeys(metric_names):
+            if self.baseline_cache is not None:
+                found, baseline = self.baseline_cache.get((metric_name, segment_key))
+                if found:
+                    results[metric_name] = baseline
+                    continue
+            missing.append(metric_name)
+        
+        if not missing:
+            return results
+        
+        if self.local_backend is not None:
+            fetched = self.local_backend.store.get_latest_many(missing, segment_key)
+        else:
+            fetched = self._query_latest_baselines(missing, segment_key)
+        
+        for metric_name in missing:
+            baseline = fetched.get(metric_name)
+            if self.baseline_cache is not None:
+                self.baseline_cache.put((metric_name, segment_key), baseline)
+            results[metric_name] = baseline
+        
+        return results
+    
+    def _query_latest_baselines(
+        self,
+        metric_names: List[str],
+        segment_key: Optional[str]
+    ) -> Dict[str, BaselineStats]:
+        """Fetch the latest Baseline row of each metric with one query"""
+        self._ensure_baseline_table()
+        query = f"""
+        SELECT *
+        FROM `{self.project_id}.{self.dataset_id}.Baseline`
+        WHERE metric_name IN UNNEST(@metric_names)
+          AND segment_key IS NOT DISTINCT FROM @segment_key
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY metric_name ORDER BY calculated_at DESC) = 1
+        """
+        
+        try:
+            query_parameters = [
+                bigquery.ArrayQueryParameter("metric_names", "STRING", list(metric_names)),
+                bigquery.ScalarQueryParameter("segment_key", "STRING", segment_key)
+            ]
+            
+            result = self._run_query(query, query_parameters, bytes_budget=None, label="latest baselines")
+            baselines = {row['metric_name']: BaselineStats.from_bigquery_row(row) for row in result}
+            logger.info(f"Retrieved latest baselines for {len(baselines)}/{len(metric_names)} metrics")
+            return baselines
+            
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error retrieving baselines: {gce}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error retrieving baselines: {e}")
+            raise
+    
+    def get_segment_baselines(self, metric_name: str) -> List[BaselineStats]:
+        """
+        Retrieve the latest baseline of every segment of a metric
+        
+        Cached as one entry (key (metric_name, ALL_SEGMENTS)), which is
+        dropped when new segment baselines of the metric are saved.
+        
+        Args:
+            metric_name: Name of a metric with group_by dimensions
+        
+        Returns:
+            List of segment BaselineStats (empty if none are stored)
+        """
+        if self.baseline_cache is not None:
+            found, baselines = self.baseline_cache.get((metric_name, ALL_SEGMENTS))
+            if found:
+                return baselines
+        
+        if self.local_backend is not None:
+            baselines = self.local_backend.store.get_latest_segments(metric_name)
+        else:
+            baselines = self._query_segment_baselines(metric_name)
+        
+        if self.baseline_cache is not None:
+            self.baseline_cache.put((metric_name, ALL_SEGMENTS), baselines)
+        return baselines
+    
+    def _query_segment_baselines(self, metric_name: str) -> List[BaselineStats]:
+        """Fetch the latest Baseline row of each segment of a metric with one query"""
+        self._ensure_baseline_table()
+        query = f"""
+        SELECT *
+        FROM `{self.project_id}.{self.dataset_id}.Baseline`
+        WHERE metric_name = @metric_name
+          AND segment_key IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY segment_key ORDER BY calculated_at DESC) = 1
+        """
+        
+        try:
+            query_parameters = [
+                bigquery.ScalarQueryParameter("metric_name", "STRING", metric_name)
+            ]
+            
+            result = self._run_query(query, query_parameters, bytes_budget=None,
+                                     label=f"segment baselines of {metric_name}")
+            baselines = [BaselineStats.from_bigquery_row(row) for row in result]
+            logger.info(f"Retrieved {len(baselines)} segment baselines for {metric_name}")
+            return baselines
+            
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error retrieving segment baselines: {gce}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error retrieving segment baselines: {e}")
+            raise
+    
+    def _ensure_covariance_table(self):
+        """Create the covariance table if it doesn't exist (once per schema version)"""
+        table_id = f"{self.project_id}.{self.dataset_id}.{self.covariance_table}"
+        self.schema_verifier.ensure(table_id, BASELINE_COVARIANCE_TABLE_SCHEMA,
+                                    self._verify_covariance_table)
+    
+    def _verify_covariance_table(self):
+        table_id = f"{self.project_id}.{self.dataset_id}.{self.covariance_table}"
+        
+        try:
+            table = self.client.get_table(table_id)
+        except Exception:
+            table = None
+        
+        if table is not None:
+            self._add_missing_columns(table, BASELINE_COVARIANCE_TABLE_SCHEMA)
+        else:
+            logger.info(f"Creating covariance table: {table_id}")
+            try:
+                schema = [bigquery.SchemaField(**field) for field in BASELINE_COVARIANCE_TABLE_SCHEMA]
+                table = bigquery.Table(table_id, schema=schema)
+                table.clustering_fields = ["group_name"]
+                self.client.create_table(table, exists_ok=True)
+                logger.info(f"Successfully created covariance table: {table_id}")
+            except GoogleCloudError as gce:
+                logger.error(f"Failed to create covariance table: {gce}")
+                raise
+    
+    def _covariance_group_metrics(self, group_name: str) -> List[Dict[str, Any]]:
+        """
+        Metric configs of a baseline.covariance.groups entry, in group order
+        
+        Raises:
+            ValueError: Unknown group, fewer than two metrics, a metric
+                        missing from baseline.metrics, or metrics of
+                        different source tables
+        """
+        group = next((g for g in self.covariance_groups if g.get('name') == group_name), None)
+        if group is None:
+            raise ValueError(f"Unknown covariance group {group_name}")
+        metrics = [self._metric_config(name) for name in group.get('metrics', [])]
+        missing = [name for name, metric in zip(group.get('metrics', []), metrics) if not metric]
+        if missing:
+            raise ValueError(f"Covariance group {group_name}: metrics not configured: {', '.join(missing)}")
+        if len(metrics) < 2:
+            raise ValueError(f"Covariance group {group_name} needs at least two metrics")
+        if len({metric['table'] for metric in metrics}) > 1:
+            raise ValueError(f"Covariance group {group_name}: metrics must share one source table")
+        return metrics
+    
+    def calculate_covariance_baseline(
+        self,
+        group_name: str,
+        lookback_days: Optional[int] = None
+    ) -> CovarianceBaseline:
+        """
+        Calculate the joint baseline of a metric group
+        
+        Means and the full covariance matrix of the group's metrics come
+        from one scan of their source table: AVG per column plus
+        VAR_SAMP/COVAR_SAMP per pair, over the rows where every metric is
+        present (so the matrix is a proper covariance of the same rows).
+        The bytes-scanned budget is the sum of the members' budgets.
+        
+        Args:
+            group_name: Name of a baseline.covariance.groups entry
+            lookback_days: Number of days of historical data (uses config if None)
+        
+        Returns:
+            CovarianceBaseline object
+        """
+        lookback_days = lookback_days or self.lookback_days
+        metrics = self._covariance_group_metrics(group_name)
+        source_table = metrics[0]['table']
+        columns = [metric['column'] for metric in metrics]
+        logger.info(f"Calculating covariance baseline for {group_name} ({len(metrics)} metrics, {source_table})")
+        
+        if self.local_backend is not None:
+            return self.local_backend.calculate_covariance_baseline(group_name, metrics, lookback_days)
+        
+        time_filter, query_parameters = self._time_window_filter(metrics[0].get('timestamp_column'), lookback_days)
+        size = len(columns)
+        expressions = [f"AVG(`{column}`) as mean_{i}" for i, column in enumerate(columns)]
+        for i in range(size):
+            for j in range(i, size):
+                aggregate = (f"VAR_SAMP(`{columns[i]}`)" if i == j
+                             else f"COVAR_SAMP(`{columns[i]}`, `{columns[j]}`)")
+                expressions.append(f"{aggregate} as cov_{i}_{j}")
+        present = " AND ".join(f"`{column}` IS NOT NULL" for column in columns)
+        select = ",\n            ".join(expressions)
+        # One scan reads every member's column: the members' budgets add up
+        # (no limit if any member has none)
+        budgets = [self._bytes_budget(metric['name']) for metric in metrics]
+        
+        query = f"""
+        SELECT
+            COUNT(*) as sample_count,
+            {select}
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        WHERE {present}
+          AND {time_filter}
+        """
+        
+        try:
+            row = next(self._run_query(
+                query, query_parameters,
+                bytes_budget=sum(budgets) if all(budgets) else None,
+                label=f"covariance group {group_name}"
+            ))
+            if not row['sample_count'] or row['sample_count'] < 2:
+                raise ValueError(f"No data found for metric group {group_name}")
+            
+            covariance = np.zeros((size, size))
+            for i in range(size):
+                for j in range(i, size):
+                    covariance[i, j] = covariance[j, i] = float(row[f"cov_{i}_{j}"] or 0.0)
+            
+            baseline = CovarianceBaseline(
+                baseline_id=f"covariance-{group_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+                group_name=group_name,
+                metric_names=[metric['name'] for metric in metrics],
+                metric_columns=columns,
+                data_source=source_table,
+                means=[float(row[f"mean_{i}"]) for i in range(size)],
+                covariance=covariance.ravel().tolist(),
+                sample_count=int(row['sample_count']),
+                lookback_days=lookback_days,
+                calculated_at=datetime.now()
+            )
+            logger.info(f"Covariance baseline calculated for {group_name} ({baseline.sample_count:,} rows)")
+            return baseline
+            
+        except StopIteration:
+            logger.error(f"Query returned no results for covariance group {group_name}")
+            raise ValueError(f"No data returned from query for metric group {group_name}")
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error calculating covariance baseline: {gce}")
+            raise
+    
+    def save_covariance_baseline(self, baseline: CovarianceBaseline):
+        """
+        Save a covariance baseline (covariance table or local store)
+        
+        Args:
+            baseline: CovarianceBaseline object to save
+        """
+        if self.local_backend is not None:
+            self.local_backend.store.save_covariance(baseline)
+        else:
+            table_id = f"{self.project_id}.{self.dataset_id}.{self.covariance_table}"
+            self._ensure_covariance_table()
+            try:
+                errors = self.client.insert_rows_json(table_id, [baseline.to_bigquery_row()])
+                if errors:
+                    logger.error(f"Failed to save covariance baseline: {errors}")
+                    raise Exception(f"Failed to save covariance baseline: {errors}")
+            except GoogleCloudError as gce:
+                logger.error(f"BigQuery error saving covariance baseline: {gce}")
+                raise
+        
+        if self.baseline_cache is not None:
+            self.baseline_cache.put((baseline.group_name, COVARIANCE), baseline)
+        logger.info(f"Covariance baseline saved: {baseline.baseline_id}")
+    
+    def get_covariance_baseline(self, group_name: str) -> Optional[CovarianceBaseline]:
+        """
+        Retrieve the latest covariance baseline of a metric group
+        
+        Cached like latest baselines (key (group_name, COVARIANCE)).
+        
+        Args:
+            group_name: Name of a baseline.covariance.groups entry
+        
+        Returns:
+            CovarianceBaseline object or None if not found
+        """
+        if self.baseline_cache is not None:
+            found, baseline = self.baseline_cache.get((group_name, COVARIANCE))
+            if found:
+                return baseline
+        
+        if self.local_backend is not None:
+            baseline = self.local_backend.store.get_latest_covariance(group_name)
+        else:
+            baseline = self._query_covariance_baseline(group_name)
+        
+        if self.baseline_cache is not None:
+            self.baseline_cache.put((group_name, COVARIANCE), baseline)
+        return baseline
+    
+    def _query_covariance_baseline(self, group_name: str) -> Optional[CovarianceBaseline]:
+        """Fetch the latest covariance row of a group"""
+        self._ensure_covariance_table()
+        query = f"""
+        SELECT *
+        FROM `{self.project_id}.{self.dataset_id}.{self.covariance_table}`
+        WHERE group_name = @group_name
+        ORDER BY calculated_at DESC
+        LIMIT 1
+        """
+        
+        try:
+            query_parameters = [bigquery.ScalarQueryParameter("group_name", "STRING", group_name)]
+            row = next(self._run_query(query, query_parameters, bytes_budget=None,
+                                       label=f"covariance baseline of {group_name}"), None)
+            return CovarianceBaseline.from_bigquery_row(row) if row is not None else None
+            
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error retrieving covariance baseline: {gce}")
+            raise
+    
+    def _detected_covariance_groups(self) -> List[Dict[str, Any]]:
+        """Enabled covariance groups scored by an enabled mahalanobis detector"""
+        detected = {
+            entry.get('group', entry.get('name'))
+            for entry in self.config.get('detection.detectors', []) or []
+            if entry.get('method') == 'mahalanobis' and entry.get('enabled', True)
+        }
+        return [group for group in self.covariance_groups
+                if group.get('enabled', True) and group.get('name') in detected]
+    
+    def _covariance_signature(self, group_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Source signature and input fingerprint of a covariance group
+        
+        Same fields as _input_signatures records on BaselineStats; None
+        when the source table has no signature (always recomputed).
+        """
+        metrics = self._covariance_group_metrics(group_name)
+        signature = self._source_signature(metrics[0]['table'])
+        if signature is None:
+            return None
+        inputs = {
+            'group_name': group_name,
+            'metric_names': [metric['name'] for metric in metrics],
+            'columns': [metric['column'] for metric in metrics],
+            'table': metrics[0]['table'],
+            'timestamp_column': metrics[0].get('timestamp_column'),
+            'lookback_days': self.lookback_days,
+            'window_date': (datetime.now(timezone.utc).date().isoformat()
+                            if self.time_window_enabled else None)
+        }
+        return {
+            'source_modified': signature['modified'],
+            'source_num_rows': signature['num_rows'],
+            'input_fingerprint': hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+        }
+    
+    def calculate_and_save_covariance_baselines(self) -> List[CovarianceBaseline]:
+        """
+        Calculate and save the covariance baselines used for detection
+        
+        Only groups scored by an enabled mahalanobis detector are computed.
+        With baseline.skip_unchanged.enabled, a group whose source table and
+        inputs match its latest covariance baseline keeps that baseline.
+        
+        Returns:
+            List of saved CovarianceBaseline objects (failed and unchanged
+            groups are reported and skipped)
+        """
+        baselines = []
+        for group in self._detected_covariance_groups():
+            try:
+                signature = self._covariance_signature(group['name']) if self.skip_unchanged else None
+                if signature is not None:
+                    latest = self.get_covariance_baseline(group['name'])
+                    if latest is not None and all(
+                        getattr(latest, field) == value for field, value in signature.items()
+                    ):
+                        print(f"\n[SKIP] covariance group {group['name']} "
+                              f"(inputs unchanged since {latest.calculated_at})")
+                        continue
+                baseline = self.calculate_covariance_baseline(group['name'])
+                for field, value in (signature or {}).items():
+                    setattr(baseline, field, value)
+                self.save_covariance_baseline(baseline)
+                baselines.append(baseline)
+            except Exception as e:
+                print(f"[ERROR] Failed to calculate covariance baseline for {group.get('name')}: {e}")
+        return baselines
+    
+    def _daily_means(
+        self,
+        metric: Dict[str, Any],
+        lookback_days: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Daily mean of every series of a metric
+        
+        One series per segment for metrics with group_by, else a single
+        global series (key ""). One GROUP BY query over the day rollups when
+        the incremental tier is enabled, otherwise over raw rows in the
+        lookback window; the grid covers the last lookback_days days with data.
+        
+        Returns:
+            (segment_keys, days, means): (S,) series keys, (D,) datetime64[D]
+            days and the (S, D) grid of daily means (NaN for days without data)
+        """
+        metric_name, metric_column, source_table = metric['name'], metric['column'], metric['table']
+        timestamp_column = metric['timestamp_column']
+        group_by = list(metric.get('group_by') or [])
+        
+        if self.local_backend is not None:
+            return self.local_backend.daily_means(metric, lookback_days)
+        
+        segments = [f"segment_{i}" for i in range(len(group_by))]
+        if self._uses_rollups(timestamp_column):
+            window_start, _ = self._update_rollups(
+                metric_name, metric_column, source_table, timestamp_column, lookback_days, group_by or None
+            )
+            rollups, query_parameters = self._rollup_source(
+                metric_name, metric_column, source_table, window_start, group_by=group_by or None
+            )
+            dimensions = "".join(
+                f"\n            segment_values[OFFSET({i})] as {segment}," for i, segment in enumerate(segments)
+            )
+            query = f"""
+        SELECT{dimensions}
+            DATE(bucket_start) as day,
+            SUM(s) / SUM(n) as mean
+        FROM {rollups}
+        GROUP BY {", ".join(segments + ["day"])}
+        """
+        else:
+            time_filter, query_parameters = self._time_window_filter(timestamp_column, lookback_days)
+            dimensions = "".join(
+                f"\n            IFNULL(CAST(`{dimension}` AS STRING), 'NULL') as {segment},"
+                for dimension, segment in zip(group_by, segments)
+            )
+            query = f"""
+        SELECT{dimensions}
+            DATE(`{timestamp_column}`) as day,
+            AVG(`{metric_column}`) as mean
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        WHERE `{metric_column}` IS NOT NULL
+          AND `{timestamp_column}` IS NOT NULL
+          AND {time_filter}
+        GROUP BY {", ".join(segments + ["day"])}
+        """
+        
+        try:
+            table = self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=f"{metric_name} daily means"
+            ).to_arrow()
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error reading daily means: {gce}")
+            raise
+        
+        def column(name: str) -> np.ndarray:
+            return table.column(name).to_numpy(zero_copy_only=False)
+        
+        keys = (make_segment_keys(group_by, [column(segment) for segment in segments]) if group_by
+                else np.full(table.num_rows, "", dtype=object))
+        return daily_grid(keys, column('day'), column('mean').astype(np.float64), lookback_days)
+    
+    def _migration_days(self, first_day: date, last_day: date) -> List[Tuple[date, str]]:
+        """
+        (day, migration_id) of the migrations between two days
+        
+        Read from the migrations table (baseline.changepoint.migrations_table);
+        without it, change points are found with the plain penalty.
+        """
+        if not self.migrations_table:
+            return []
+        if self.local_backend is not None:
+            return self.local_backend.migration_days(self.migrations_table, first_day, last_day)
+        
+        query = f"""
+        SELECT migration_id, DATE(migration_timestamp) as day
+        FROM `{self.project_id}.{self.dataset_id}.{self.migrations_table}`
+        WHERE migration_timestamp >= TIMESTAMP(@first_day)
+          AND migration_timestamp < TIMESTAMP(DATE_ADD(@last_day, INTERVAL 1 DAY))
+        """
+        query_parameters = [
+            bigquery.ScalarQueryParameter("first_day", "DATE", first_day),
+            bigquery.ScalarQueryParameter("last_day", "DATE", last_day)
+        ]
+        try:
+            return [(row['day'], row['migration_id'])
+                    for row in self._run_query(query, query_parameters, label="migrations")]
+        except Exception as e:
+            logger.warning(f"Failed to query migrations: {e}")
+            return []
+    
+    def detect_regime_shifts(
+        self,
+        metric_names: Optional[List[str]] = None,
+        lookback_days: Optional[int] = None
+    ) -> List[RegimeShift]:
+        """
+        Find series whose level shifted permanently (e.g. after a migration)
+        
+        The daily means of every series of a metric (one per segment for
+        metrics with group_by) are read with one query and segmented at
+        once (see changepoint.find_last_regime); days around a migration
+        have a lower penalty. Metrics without a timestamp_column are skipped.
+        
+        Args:
+            metric_names: Metrics to check (default: all enabled metrics)
+            lookback_days: Days of daily means (uses baseline.changepoint.lookback_days if None)
+        
+        Returns:
+            One RegimeShift per shifted series (failed metrics are reported and skipped)
+        """
+        lookback_days = lookback_days or self.changepoint_lookback_days
+        shifts = []
+        
+        for metric in self._get_enabled_metrics():
+            if metric_names and metric['name'] not in metric_names:
+                continue
+            if not metric.get('timestamp_column'):
+                logger.info(f"Skipping regime shifts for {metric['name']} (no timestamp_column)")
+                continue
+            
+            try:
+                keys, days, means = self._daily_means(metric, lookback_days)
+            except Exception as e:
+                print(f"[ERROR] Failed to read daily means for {metric['name']}: {e}")
+                continue
+            if days.size < 2 * self.changepoint_min_days:
+                logger.info(f"Not enough days for regime shifts in {metric['name']} ({days.size} days)")
+                continue
+            
+            migrations = self._migration_days(days[0].item(), days[-1].item())
+            penalty, migration_ids = changepoint_penalty(
+                days, self.changepoint_penalty, migrations,
+                self.migration_window_days, self.migration_penalty_factor
+            )
+            result = find_last_regime(means, penalty, self.changepoint_min_days, self.changepoint_max)
+            
+            detected_at = datetime.now()
+            shifted = np.flatnonzero(result['start'] >= 0)
+            for i in shifted:
+                start = int(result['start'][i])
+                shifts.append(RegimeShift(
+                    metric_name=metric['name'],
+                    segment_key=keys[i] or None,
+                    change_date=days[start].item(),
+                    before_mean=float(result['before'][i]),
+                    after_mean=float(result['after'][i]),
+                    shift_sigma=float(result['shift_sigma'][i]),
+                    regime_days=days.size - start,
+                    changepoints=int(result['changepoints'][i]),
+                    detected_at=detected_at,
+                    migration_id=migration_ids[start]
+                ))
+            logger.info(f"Regime shifts for {metric['name']}: {shifted.size:,} of {keys.size:,} series")
+        
+        return shifts
+    
+    def recompute_shifted_baselines(self, shifts: List[RegimeShift]) -> List[Union[BaselineStats, BaselineBatch]]:
+        """
+        Recalculate the baselines of shifted series over their new regime only
+        
+        Only the affected series are recomputed, with simple_stats over the
+        rows since each change (whatever time_window says): one query for a
+        metric's global series and one for all its shifted segments, which
+        joins the segment keys and change days passed as array parameters.
+        
+        Args:
+            shifts: Output of detect_regime_shifts
+        
+        Returns:
+            BaselineStats (global series) and BaselineBatch (segments) to
+            save; failed metrics are reported and skipped
+        """
+        by_metric: Dict[str, List[RegimeShift]] = {}
+        for shift in shifts:
+            by_metric.setdefault(shift.metric_name, []).append(shift)
+        
+        results: List[Union[BaselineStats, BaselineBatch]] = []
+        for metric_name, metric_shifts in by_metric.items():
+            metric = self._metric_config(metric_name)
+            try:
+                if self.local_backend is not None:
+                    results.extend(self.local_backend.calculate_regime_baselines(metric, metric_shifts))
+                    continue
+                for shift in metric_shifts:
+                    if shift.segment_key is None:
+                        results.append(self._calculate_since(metric, shift))
+                segment_shifts = [shift for shift in metric_shifts if shift.segment_key is not None]
+                if segment_shifts and metric.get('group_by'):
+                    results.append(self._calculate_segments_since(metric, segment_shifts))
+            except Exception as e:
+                print(f"[ERROR] Failed to recalculate shifted baselines for {metric_name}: {e}")
+        return results
+    
+    def _calculate_since(self, metric: Dict[str, Any], shift: RegimeShift) -> BaselineStats:
+        """simple_stats baseline of a metric's global series since its change date"""
+        metric_name, metric_column, source_table = metric['name'], metric['column'], metric['table']
+        query = f"""
+        SELECT{self._stats_select_expressions(metric_column)}
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        WHERE `{metric_column}` IS NOT NULL
+          AND `{metric['timestamp_column']}` >= TIMESTAMP(@since)
+        """
+        query_parameters = [bigquery.ScalarQueryParameter("since", "DATE", shift.change_date)]
+        
+        try:
+            row = next(self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=f"{metric_name} since {shift.change_date.isoformat()}"
+            ))
+            baseline = self._build_baseline_from_row(
+                row, metric_name, metric_column, source_table, shift.regime_days
+            )
+            baseline.notes = regime_notes(metric_column, shift)
+            return baseline
+        except StopIteration:
+            raise ValueError(f"No data returned from query for {metric_name}")
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error recalculating baseline: {gce}")
+            raise
+    
+    def _calculate_segments_since(self, metric: Dict[str, Any], shifts: List[RegimeShift]) -> BaselineBatch:
+        """simple_stats baselines of shifted segments, each since its own change date"""
+        metric_name, metric_column, source_table = metric['name'], metric['column'], metric['table']
+        timestamp_column = metric['timestamp_column']
+        group_by = list(metric['group_by'])
+        segments = [f"segment_{i}" for i in range(len(group_by))]
+        values = [f"IFNULL(CAST(`{dimension}` AS STRING), 'NULL')" for dimension in group_by]
+        segment_key = "CONCAT(" + ", '/', ".join(
+            f"'{dimension}=', {value}" for dimension, value in zip(group_by, values)
+        ) + ")"
+        dimensions = ",".join(f"\n            {value} as {segment}" for value, segment in zip(values, segments))
+        
+        query = f"""
+        WITH shifted AS (
+            SELECT shift_key, shift_since
+            FROM UNNEST(@segment_keys) as shift_key WITH OFFSET key_position
+            JOIN UNNEST(@since_days) as shift_since WITH OFFSET since_position
+              ON key_position = since_position
+        )
+        SELECT{dimensions},{self._stats_select_expressions(metric_column)}
+        FROM `{self.project_id}.{self.dataset_id}.{source_table}`
+        JOIN shifted ON {segment_key} = shifted.shift_key
+        WHERE `{metric_column}` IS NOT NULL
+          AND `{timestamp_column}` >= TIMESTAMP(@earliest)
+          AND `{timestamp_column}` >= TIMESTAMP(shifted.shift_since)
+        GROUP BY {", ".join(segments)}
+        """
+        query_parameters = [
+            bigquery.ArrayQueryParameter("segment_keys", "STRING", [shift.segment_key for shift in shifts]),
+            bigquery.ArrayQueryParameter("since_days", "DATE", [shift.change_date for shift in shifts]),
+            bigquery.ScalarQueryParameter("earliest", "DATE", min(shift.change_date for shift in shifts))
+        ]
+        
+        try:
+            table = self._run_query(
+                query, query_parameters,
+                bytes_budget=self._bytes_budget(metric_name),
+                label=f"{metric_name} shifted segments"
+            ).to_arrow()
+            batch = self._batch_from_arrow(
+                table, metric_name, metric_column, source_table, group_by,
+                max(shift.regime_days for shift in shifts), notes=regime_notes(metric_column, None)
+            )
+            logger.info(f"Recalculated {len(batch):,} shifted segment baselines for {metric_name}")
+            return batch
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error recalculating segment baselines: {gce}")
+            raise
+    
+    def refresh_shifted_baselines(
+        self,
+        metric_names: Optional[List[str]] = None,
+        lookback_days: Optional[int] = None,
+        run_id: Optional[str] = None
+    ) -> List[RegimeShift]:
+        """
+        Detect regime shifts and save new baselines for the shifted series only
+        
+        Runs between full refreshes: after a migration, the baselines of
+        the affected series (and no others) move to the new level, so
+        detection stops flagging it. The saved baselines are visible to
+        cached lookups immediately.
+        
+        Args:
+            metric_names: Metrics to check (default: all enabled metrics)
+            lookback_days: Days of daily means (uses baseline.changepoint.lookback_days if None)
+            run_id: Refresh run ID (see create_writer)
+        
+        Returns:
+            Detected RegimeShift objects
+        """
+        shifts = self.detect_regime_shifts(metric_names, lookback_days)
+        if not shifts:
+            print("\n[OK] No regime shifts found")
+            return shifts
+        
+        writer = self.create_writer(run_id)
+        for result in self.recompute_shifted_baselines(shifts):
+            if isinstance(result, BaselineBatch):
+                writer.add_batch(result)
+            else:
+                writer.add(result)
+        written = writer.flush()
+        print(f"\n[OK] {len(shifts):,} regime shifts, {written:,} baselines recalculated")
+        return shifts
+    
+    def _get_enabled_metrics(self) -> List[Dict[str, Any]]:
+        """
+        Get enabled metric configs, falling back to the default metric set
+
+        Returns:
+            List of metric config dictionaries
+        """
+        # Get metrics from config
         metrics = self.config.baseline_metrics
         
         if not metrics:
@@ -399,44 +3013,441 @@ class BaselineCalculator:
                 }
             ]
         
+        enabled = []
         for metric in metrics:
             # Skip disabled metrics
             if not metric.get('enabled', True):
                 print(f"\n[SKIP] {metric['name']} (disabled in config)")
                 continue
-            
+            enabled.append(metric)
+        
+        return enabled
+    
+    def _source_signature(self, source_table: str) -> Optional[Dict[str, Any]]:
+        """
+        Change signature of a source table
+        
+        BigQuery: table metadata (last-modified time and row count), no
+        query. A table with a streaming buffer has rows that are not in
+        num_rows yet, so it has no signature and is always recomputed.
+        
+        Returns:
+            Dictionary with modified and num_rows, or None if unavailable
+        """
+        try:
+            if self.local_backend is not None:
+                return self.local_backend.reader.table_signature(source_table)
+            table = self.client.get_table(f"{self.project_id}.{self.dataset_id}.{source_table}")
+        except Exception as e:
+            logger.warning(f"Could not read metadata of {source_table}: {e}")
+            return None
+        if table.streaming_buffer is not None or table.modified is None:
+            return None
+        return {'modified': table.modified, 'num_rows': table.num_rows}
+    
+    def _input_fingerprint(self, metric: Dict[str, Any]) -> str:
+        """
+        Hash of everything besides the source data that determines a metric's baseline
+        
+        When the data read moves with the calendar (time_window enabled, the
+        rollup window of the incremental tier, the smoothing state feeding
+        buckets up to now), the UTC date is part of the fingerprint and a
+        baseline is reused within a day only. The sketch settings, the
+        incremental and hourly rollup flags and the covariance groups the
+        metric belongs to change what is stored too, so they are hashed as well.
+        """
+        method = metric.get('calculation_method') or self.calculation_method
+        parameters = {}
+        if method == "rolling_average":
+            parameters = {'window_size': self.rolling_window_size, 'min_periods': self.rolling_min_periods}
+        elif method == "seasonal_decomposition":
+            parameters = {'period': self.seasonal_period, 'model': self.seasonal_model,
+                          'bucket': self.seasonal_bucket}
+        elif method == "exponential_smoothing":
+            parameters = {'alpha': self.smoothing_alpha, 'beta': self.smoothing_beta,
+                          'gamma': self.smoothing_gamma, 'period': self.smoothing_period,
+                          'bucket': self.smoothing_bucket}
+        elif method == "robust_stats":
+            parameters = {'trim_fraction': self.robust_trim_fraction}
+        inputs = {
+            'metric_name': metric['name'],
+            'column': metric['column'],
+            'table': metric['table'],
+            'timestamp_column': metric.get('timestamp_column'),
+            'group_by': list(metric.get('group_by') or []),
+            'method': method,
+            'parameters': parameters,
+            'lookback_days': self.lookback_days,
+            'percentiles': self.percentiles,
+            'sketch_k': self.local_backend.sketch_k if self.local_backend is not None else None,
+            'sketch_precision': self.sketch_precision,
+            'incremental': self.incremental_enabled,
+            'hourly': self.rollup_hourly,
+            'covariance_groups': sorted(group.get('name') for group in self.covariance_groups
+                                        if group.get('enabled', True)
+                                        and metric['name'] in (group.get('metrics') or [])),
+            'window_date': (datetime.now(timezone.utc).date().isoformat()
+                            if self._date_windowed(metric, method) else None)
+        }
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _date_windowed(self, metric: Dict[str, Any], method: str) -> bool:
+        """Whether a metric's baseline reads a window relative to today"""
+        if self.time_window_enabled or method == "exponential_smoothing":
+            return True
+        return self.incremental_enabled and self.local_backend is None and bool(metric.get('timestamp_column'))
+    
+    def _input_signatures(self, metrics: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Source signature and input fingerprint of each metric, keyed by metric name
+        
+        Table metadata is read once per source table. Metrics whose table
+        has no signature are left out (always recomputed, never stamped).
+        """
+        tables: Dict[str, Optional[Dict[str, Any]]] = {}
+        signatures = {}
+        for metric in metrics:
+            table = metric['table']
+            if table not in tables:
+                tables[table] = self._source_signature(table)
+            if tables[table] is None:
+                continue
+            signatures[metric['name']] = {
+                'source_modified': tables[table]['modified'],
+                'source_num_rows': tables[table]['num_rows'],
+                'input_fingerprint': self._input_fingerprint(metric)
+            }
+        return signatures
+    
+    def _unchanged_baselines(
+        self,
+        metrics: List[Dict[str, Any]],
+        signatures: Dict[str, Dict[str, Any]]
+    ) -> List[BaselineStats]:
+        """
+        Latest baselines whose recorded inputs match the current signatures
+        
+        Looked up for all candidate metrics with one get_latest_baselines
+        call. Segmented metrics are not considered.
+        """
+        candidates = [m['name'] for m in metrics if not m.get('group_by') and m['name'] in signatures]
+        if not candidates:
+            return []
+        latest = self.get_latest_baselines(candidates)
+        unchanged = []
+        for metric_name in candidates:
+            baseline, signature = latest[metric_name], signatures[metric_name]
+            if baseline is not None and all(
+                getattr(baseline, field) == value for field, value in signature.items()
+            ):
+                unchanged.append(baseline)
+        return unchanged
+    
+    def _mark_validated(self, baselines: List[BaselineStats]):
+        """Bump validated_at of reused baselines (one UPDATE statement)"""
+        if not baselines:
+            return
+        validated_at = datetime.now(timezone.utc)
+        baseline_ids = [b.baseline_id for b in baselines]
+        
+        if self.local_backend is not None:
+            self.local_backend.store.mark_validated(baseline_ids, validated_at)
+        else:
+            self._ensure_baseline_table()
+            query = f"""
+            UPDATE `{self.project_id}.{self.dataset_id}.Baseline`
+            SET validated_at = @validated_at
+            WHERE baseline_id IN UNNEST(@baseline_ids)
+            """
+            query_parameters = [
+                bigquery.ScalarQueryParameter("validated_at", "TIMESTAMP", validated_at),
+                bigquery.ArrayQueryParameter("baseline_ids", "STRING", baseline_ids)
+            ]
             try:
-                baseline = self.calculate_baseline(
-                    metric_name=metric['name'],
-                    metric_column=metric['column'],
-                    source_table=metric['table']
-                )
-                
-                self.save_baseline(baseline)
-                baselines.append(baseline)
-                
-            except Exception as e:
-                print(f"[ERROR] Failed to calculate baseline for {metric['name']}: {e}")
+                self._run_query(query, query_parameters, bytes_budget=None, label="validated_at update")
+            except GoogleCloudError as gce:
+                logger.error(f"BigQuery error updating validated_at: {gce}")
+                raise
+        
+        # Cached entries are the same objects returned by get_latest_baselines
+        for baseline in baselines:
+            baseline.validated_at = validated_at
+        logger.info(f"Marked {len(baselines)} unchanged baselines as validated")
+    
+    def _refresh_tasks(
+        self,
+        metrics: List[Dict[str, Any]],
+        batched: bool
+    ) -> List[Tuple[int, str, Callable[[], List[Union[BaselineStats, BaselineBatch]]]]]:
+        """
+        Split a refresh into independent units of work
+        
+        Each task is (priority, label, callable) and the callable returns the
+        baselines or segment batches it produced. Metrics that share a scan
+        form one task whose priority is the most urgent of its members.
+        Tasks are sorted by priority (lower first, then config order).
+        Metrics with their own calculation_method (e.g. hour_of_week for
+        metrics with a strong daily/weekly cycle) always get their own task.
+        """
+        tasks = []
+        
+        def priority(metric: Dict[str, Any]) -> int:
+            return metric.get('priority', 100)
+        
+        # Metrics with group_by dimensions get one baseline per segment
+        segmented = [m for m in metrics if m.get('group_by')]
+        metrics = [m for m in metrics if not m.get('group_by')]
+        for metric in segmented:
+            tasks.append((priority(metric), metric['name'], lambda m=metric: [self.calculate_segmented_baselines(
+                metric_name=m['name'],
+                metric_column=m['column'],
+                source_table=m['table'],
+                group_by=list(m['group_by']),
+                timestamp_column=m.get('timestamp_column')
+            )]))
+        
+        # Metrics overriding baseline.calculation_method
+        overridden = [m for m in metrics
+                      if m.get('calculation_method') not in (None, self.calculation_method)]
+        metrics = [m for m in metrics if m not in overridden]
+        for metric in overridden:
+            tasks.append((priority(metric), metric['name'], lambda m=metric: [self.calculate_baseline(
+                metric_name=m['name'],
+                metric_column=m['column'],
+                source_table=m['table'],
+                calculation_method=m['calculation_method'],
+                timestamp_column=m.get('timestamp_column')
+            )]))
+        
+        if self.incremental_enabled and self.local_backend is None and self.calculation_method == "simple_stats":
+            # Metrics with a timestamp column refresh from day partials
+            # (other methods read the rollups inside calculate_baseline)
+            incremental = [m for m in metrics if m.get('timestamp_column')]
+            metrics = [m for m in metrics if not m.get('timestamp_column')]
+            for metric in incremental:
+                tasks.append((priority(metric), metric['name'], lambda m=metric: [self.calculate_incremental_baseline(
+                    metric_name=m['name'],
+                    metric_column=m['column'],
+                    source_table=m['table'],
+                    timestamp_column=m['timestamp_column']
+                )]))
+        
+        if batched and self.local_backend is not None:
+            if metrics:
+                tasks.append((min(priority(m) for m in metrics), "local batch",
+                              lambda ms=metrics: self.calculate_baselines_batched(ms)))
+        elif batched:
+            for (source_table, timestamp_column), table_metrics in self._group_by_scan(metrics).items():
+                label = f"{source_table} ({', '.join(m['name'] for m in table_metrics)})"
+                tasks.append((min(priority(m) for m in table_metrics), label,
+                              lambda t=source_table, ms=table_metrics, ts=timestamp_column:
+                              self._calculate_table_batch(t, ms, self.lookback_days, ts)))
+        else:
+            for metric in metrics:
+                tasks.append((priority(metric), metric['name'], lambda m=metric: [self.calculate_baseline(
+                    metric_name=m['name'],
+                    metric_column=m['column'],
+                    source_table=m['table'],
+                    timestamp_column=m.get('timestamp_column')
+                )]))
+        
+        # sorted() is stable, so equal priorities keep config order
+        return sorted(tasks, key=lambda task: task[0])
+    
+    def calculate_and_save_all_baselines(
+        self,
+        batched: Optional[bool] = None,
+        run_id: Optional[str] = None,
+        concurrent: Optional[bool] = None
+    ) -> List[BaselineStats]:
+        """
+        Calculate and save baselines for all configured metrics
+        
+        All baselines of the refresh are committed together by one bulk
+        load at the end (see create_writer). In concurrent mode the metric
+        queries run on a bounded thread pool (baseline.concurrency.max_workers),
+        submitted in priority order and collected as they finish, so the
+        refresh takes about as long as its slowest query. The queries of a
+        metric (dry run, partials refresh, merge, ...) share one
+        baseline.concurrency.metric_timeout_seconds deadline; the running
+        query is cancelled when it passes and later ones are not started.
+        
+        Args:
+            batched: Compute simple_stats metrics with one query per source table
+                     (uses baseline.batch_by_table from config if None)
+            run_id: Refresh run ID; reuse it when retrying a refresh so rows
+                    are not written twice (generated if None)
+            concurrent: Run metric queries concurrently
+                        (uses baseline.concurrency.enabled from config if None)
+        
+        With baseline.skip_unchanged.enabled, metrics whose source table
+        (last-modified time, row count) and inputs (see _input_fingerprint)
+        match their latest baseline are not recomputed: that baseline is
+        kept, its validated_at bumped, and it is included in the result.
+        The covariance baselines of the groups scored by an enabled
+        mahalanobis detector are then refreshed (see
+        calculate_and_save_covariance_baselines).
+        
+        Returns:
+            List of BaselineStats objects (global baselines; segment
+            baselines of metrics with group_by are saved as batches and
+            only counted)
+        """
+        if batched is None:
+            batched = self.config.get('baseline.batch_by_table', True)
+        # Only simple_stats can share a scan; other methods need their own query
+        batched = batched and self.calculation_method == "simple_stats"
+        if concurrent is None:
+            concurrent = self.concurrency_enabled
+        
+        logger.info("=" * 80)
+        logger.info("CALCULATING ALL BASELINES")
+        logger.info("=" * 80)
+        logger.info(f"Method: {self.calculation_method}")
+        logger.info(f"Lookback: {self.lookback_days} days")
+        logger.info(f"Batched by table: {batched}")
+        logger.info(f"Incremental: {self.incremental_enabled}")
+        logger.info(f"Concurrent: {concurrent}" + (f" ({self.max_workers} workers)" if concurrent else ""))
+        
+        baselines = []
+        segment_count = 0
+        writer = self.create_writer(run_id)
+        logger.info(f"Run ID: {writer.run_id}")
+        
+        metrics = self._get_enabled_metrics()
+        signatures = self._input_signatures(metrics) if self.skip_unchanged else {}
+        unchanged = self._unchanged_baselines(metrics, signatures) if signatures else []
+        if unchanged:
+            for baseline in unchanged:
+                print(f"\n[SKIP] {baseline.metric_name} (inputs unchanged since {baseline.calculated_at})")
+            skipped = {b.metric_name for b in unchanged}
+            metrics = [m for m in metrics if m['name'] not in skipped]
+        
+        tasks = self._refresh_tasks(metrics, batched)
+        
+        def collect(results: List[Union[BaselineStats, BaselineBatch]]):
+            nonlocal segment_count
+            for result in results:
+                # Record the inputs so the next refresh can detect changes
+                for field, value in signatures.get(result.metric_name, {}).items():
+                    setattr(result, field, value)
+                if isinstance(result, BaselineBatch):
+                    writer.add_batch(result)
+                    segment_count += len(result)
+                else:
+                    writer.add(result)
+                    baselines.append(result)
+        
+        if concurrent and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="baseline") as pool:
+                futures = {pool.submit(self._run_task, task): label for _, label, task in tasks}
+                for future in as_completed(futures):
+                    label = futures[future]
+                    try:
+                        collect(future.result())
+                    except Exception as e:
+                        print(f"[ERROR] Failed to calculate baseline for {label}: {e}")
+        else:
+            for _, label, task in tasks:
+                try:
+                    collect(self._run_task(task))
+                except Exception as e:
+                    print(f"[ERROR] Failed to calculate baseline for {label}: {e}")
+        
+        try:
+            writer.flush()
+        except Exception as e:
+            print(f"[ERROR] Failed to save baselines for run {writer.run_id}: {e}")
+            raise
+        
+        try:
+            self._mark_validated(unchanged)
+        except Exception as e:
+            print(f"[ERROR] Failed to mark unchanged baselines as validated: {e}")
+        
+        covariance_count = len(self.calculate_and_save_covariance_baselines()) if self.covariance_groups else 0
         
         print("\n" + "=" * 80)
-        print(f"BASELINE CALCULATION COMPLETE - {len(baselines)} baselines saved")
+        print(f"BASELINE CALCULATION COMPLETE - {len(baselines)} baselines saved"
+              + (f" (+{segment_count:,} segment baselines)" if segment_count else "")
+              + (f" (+{covariance_count} covariance baselines)" if covariance_count else "")
+              + (f", {len(unchanged)} unchanged" if unchanged else ""))
         print("=" * 80)
         
-        return baselines
+        return baselines + unchanged
+    
+    def sample_metric_values(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        timestamp_column: Optional[str] = None,
+        sample_size: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Fixed-size uniform random sample of a metric column
+        
+        Tables of at least baseline.sampling.min_system_bytes are sampled
+        with TABLESAMPLE SYSTEM, so only about sample_size rows' worth of
+        blocks is scanned; smaller tables use row sampling (see sampling.py).
+        The sample is read as Arrow, not row by row.
+        
+        Args:
+            metric_name: Name used in log and error messages
+            metric_column: Column to sample
+            source_table: Source table name
+            timestamp_column: If set, the sample is returned in time order
+            sample_size: Number of values (uses baseline.sampling.sample_size if None)
+        
+        Returns:
+            float64 NumPy array of at most sample_size non-NULL values
+        """
+        sample_size = sample_size or self.sample_size
+        
+        if self.local_backend is not None:
+            return self.local_backend.sample_values(metric_column, source_table, sample_size, timestamp_column)
+        
+        table_id = f"{self.project_id}.{self.dataset_id}.{source_table}"
+        table = self.client.get_table(table_id)
+        fraction = sample_fraction(table.num_rows, sample_size, self.sample_oversample)
+        method = choose_method(table.num_bytes, self.sample_min_system_bytes)
+        query = build_sample_query(table_id, metric_column, fraction, method, timestamp_column)
+        
+        logger.info(f"Sampling {sample_size:,} values of {metric_name} "
+                    f"({method}, {fraction:.4%} of {table.num_rows:,} rows)")
+        
+        try:
+            result = self._run_query(
+                query,
+                [bigquery.ScalarQueryParameter("sample_size", "INT64", sample_size)],
+                bytes_budget=self._bytes_budget(metric_name),
+                label=f"{metric_name} sample"
+            )
+            values, _ = arrow_to_values(result.to_arrow())
+            return values
+        
+        except GoogleCloudError as gce:
+            logger.error(f"BigQuery error sampling {metric_name}: {gce}")
+            raise
     
     def calculate_baseline_with_ai(
         self,
         metric_name: str,
         metric_column: str,
-        source_table: str
+        source_table: str,
+        timestamp_column: Optional[str] = None
     ) -> BaselineStats:
         """
         Calculate baseline using AI-recommended method
         
+        The recommendation is based on a random sample of the metric
+        (see sample_metric_values), not on the whole column.
+        
         Args:
             metric_name: Name for the baseline (e.g., "error_rate")
             metric_column: Column name in source table
             source_table: Source table name
+            timestamp_column: Event time column (orders the sample for trend analysis)
         
         Returns:
             BaselineStats object with calculated statistics
@@ -446,28 +3457,20 @@ class BaselineCalculator:
         logger.info(f"Using AI to determine optimal method for {metric_name}")
         
         try:
-            # Get sample data for analysis (limit to 10K rows for performance)
-            query = f"""
-            SELECT `{metric_column}` as value
-            FROM `{self.project_id}.{self.dataset_id}.{source_table}`
-            WHERE `{metric_column}` IS NOT NULL
-            LIMIT 10000
-            """
-            
             logger.debug(f"Fetching sample data for AI analysis")
-            df = self.client.query(query).to_dataframe()
+            values = self.sample_metric_values(metric_name, metric_column, source_table, timestamp_column)
             
-            if len(df) == 0:
+            if values.size == 0:
                 logger.warning(f"No data found for {metric_name}, using default method")
                 return self.calculate_baseline(
-                    metric_name, metric_column, source_table
+                    metric_name, metric_column, source_table, timestamp_column=timestamp_column
                 )
             
             # Get AI recommendation
             optimizer = AIBaselineOptimizer(self.config)
             recommendation = optimizer.analyze_metric(
                 metric_name=metric_name,
-                data=df['value']
+                data=values
             )
             
             logger.info(f"AI recommends: {recommendation['recommended_method']} "
@@ -479,14 +3482,15 @@ class BaselineCalculator:
                 metric_column=metric_column,
                 source_table=source_table,
                 calculation_method=recommendation['recommended_method'],
-                lookback_days=recommendation['parameters']['lookback_days']
+                lookback_days=recommendation['parameters']['lookback_days'],
+                timestamp_column=timestamp_column
             )
             
         except Exception as e:
             logger.error(f"AI-driven calculation failed for {metric_name}: {e}")
             logger.info("Falling back to standard calculation")
             return self.calculate_baseline(
-                metric_name, metric_column, source_table
+                metric_name, metric_column, source_table, timestamp_column=timestamp_column
             )
     
     def _get_table_columns(self, table_name: str) -> List[str]:
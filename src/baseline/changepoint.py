@@ -0,0 +1,228 @@
+"""
+Change-Point Kernels
+
+Vectorized NumPy kernels that find regime shifts (permanent level
+changes, e.g. after a migration) in the daily means of many series at
+once, so only the baselines of shifted series need recomputing.
+
+- Input is a (series x days) grid of daily means (NaN for days without
+  data), as produced from the day rollups (see rolling.bucket_daily)
+- The cost of a segment is its Gaussian mean-shift cost, evaluated for
+  every split of every series from cumulative sums along the day axis:
+  splitting [lo, D) at t gains n1 n2 / (n1 + n2) (mean1 - mean2)^2 / sigma^2
+- sigma is each series' day-to-day noise, estimated robustly from the
+  median absolute first difference (MAD / sqrt(2)), so the shift itself
+  does not inflate it
+- A split is accepted when its gain exceeds the penalty (per day, so
+  days around a migration can be cheaper) and both sides have at least
+  min_size days. Only the latest regime matters for a baseline, so the
+  binary segmentation recurses into the segment after each accepted
+  split; each round handles every series with one set of array passes
+- Days within a few days of a row of the migrations table get a lower
+  penalty (see changepoint_penalty): a shift there is expected, so a
+  smaller one is accepted and attributed to the migration
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.baseline import MAD_TO_SIGMA, RegimeShift
+
+
+def daily_grid(
+    keys: np.ndarray,
+    days: np.ndarray,
+    means: np.ndarray,
+    max_days: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Arrange (series, day, mean) rows as a (series x days) grid
+
+    Args:
+        keys: Series key of each row
+        days: Day of each row (anything convertible to datetime64[D])
+        means: Daily mean of each row
+        max_days: Keep only the last max_days days (ending on the latest day)
+
+    Returns:
+        (series_keys, grid_days, grid): sorted distinct keys (S,),
+        consecutive days (D,) and the (S, D) means, NaN for missing days
+    """
+    days = np.asarray(days).astype('datetime64[D]')
+    keys = np.asarray(keys, dtype=object)
+    means = np.asarray(means, dtype=np.float64)
+    if days.size == 0:
+        return np.array([], dtype=object), days, np.zeros((0, 0))
+
+    first, last = days.min(), days.max()
+    if max_days:
+        first = max(first, last - np.timedelta64(max_days - 1, 'D'))
+    keep = days >= first
+    series_keys, codes = np.unique(keys[keep].astype(str), return_inverse=True)
+    size = int((last - first).astype(np.int64)) + 1
+    grid = np.full((series_keys.size, size), np.nan)
+    grid[codes, (days[keep] - first).astype(np.int64)] = means[keep]
+    return series_keys.astype(object), first + np.arange(size), grid
+
+
+def changepoint_penalty(
+    days: np.ndarray,
+    penalty: float,
+    migrations: Optional[List[Tuple[date, str]]] = None,
+    window_days: int = 1,
+    factor: float = 0.5
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-day split penalty, lowered around migrations
+
+    Args:
+        days: (D,) datetime64[D] days of the grid
+        penalty: Penalty factor; the base penalty is penalty * ln(D)
+        migrations: (day, migration_id) of each migration
+        window_days: Days on either side of a migration with the lower penalty
+        factor: Multiplier applied to the penalty near a migration
+
+    Returns:
+        (penalty, migration_ids): (D,) penalties and (D,) object array
+        with the nearest migration of each day (None outside every window)
+    """
+    days = np.asarray(days).astype('datetime64[D]')
+    base = penalty * np.log(max(days.size, 2))
+    penalties = np.full(days.size, base)
+    migration_ids = np.full(days.size, None, dtype=object)
+    distance = np.full(days.size, np.inf)
+    for migration_day, migration_id in migrations or []:
+        offset = np.abs((days - np.datetime64(migration_day, 'D')).astype(np.int64))
+        near = offset <= window_days
+        penalties[near] = base * factor
+        closer = near & (offset < distance)
+        migration_ids[closer] = migration_id
+        distance[closer] = offset[closer]
+    return penalties, migration_ids
+
+
+def robust_noise(means: np.ndarray) -> np.ndarray:
+    """
+    Day-to-day noise of each series (MAD of first differences / sqrt(2))
+
+    Args:
+        means: (S, D) daily means, NaN for missing days
+
+    Returns:
+        (S,) noise estimates (NaN for series with fewer than two
+        consecutive days)
+    """
+    differences = np.diff(means, axis=1)
+    with np.errstate(invalid='ignore'):
+        valid = ~np.isnan(differences)
+        rows = valid.any(axis=1)
+        noise = np.full(means.shape[0], np.nan)
+        if rows.any():
+            noise[rows] = MAD_TO_SIGMA * np.nanmedian(np.abs(differences[rows]), axis=1) / np.sqrt(2.0)
+    return noise
+
+
+def find_last_regime(
+    means: np.ndarray,
+    penalty: np.ndarray,
+    min_size: int = 5,
+    max_changepoints: int = 3,
+    noise: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Start of the latest regime of every series
+
+    Args:
+        means: (S, D) daily means, NaN for missing days
+        penalty: (D,) gain a split at each day must exceed (in sigma^2 units)
+        min_size: Minimum days with data on each side of a split
+        max_changepoints: Maximum accepted splits per series
+        noise: (S,) day-to-day noise (estimated with robust_noise if None)
+
+    Returns:
+        Dictionary of (S,) arrays: start (day index where the latest regime
+        begins, -1 without a change), changepoints (accepted splits),
+        before/after (mean of the segment before/after the latest change),
+        shift_sigma ((after - before) / noise), gain, noise
+    """
+    means = np.asarray(means, dtype=np.float64)
+    series, days = means.shape
+    if noise is None:
+        noise = robust_noise(means)
+    scale = np.where(noise > 0, noise, np.nan)
+    # Penalty of each split t (the new regime starting on day t); t = D is never allowed
+    penalty = np.append(np.broadcast_to(np.asarray(penalty, dtype=np.float64), (days,)), np.inf)
+
+    present = ~np.isnan(means)
+    values = np.where(present, means, 0.0)
+    # Center each series before accumulating to limit cancellation
+    counts = present.sum(axis=1)
+    offset = np.where(counts > 0, values.sum(axis=1) / np.maximum(counts, 1), 0.0)
+    values = np.where(present, values - offset[:, None], 0.0)
+    cum_n = np.concatenate([np.zeros((series, 1)), np.cumsum(present, axis=1)], axis=1)
+    cum_s = np.concatenate([np.zeros((series, 1)), np.cumsum(values, axis=1)], axis=1)
+    total_n, total_s = cum_n[:, -1:], cum_s[:, -1:]
+
+    rows = np.arange(series)
+    lo = np.zeros(series, dtype=np.int64)
+    start = np.full(series, -1, dtype=np.int64)
+    changepoints = np.zeros(series, dtype=np.int64)
+    before = np.full(series, np.nan)
+    after = np.full(series, np.nan)
+    gain = np.zeros(series)
+    active = ~np.isnan(scale)
+    splits = np.arange(days + 1)
+
+    for _ in range(max_changepoints):
+        if not active.any():
+            break
+        # Split t puts days [lo, t) on the left and [t, D) on the right
+        base_n = cum_n[rows, lo][:, None]
+        base_s = cum_s[rows, lo][:, None]
+        n1 = cum_n - base_n
+        s1 = cum_s - base_s
+        n2 = total_n - cum_n
+        s2 = total_s - cum_s
+        with np.errstate(invalid='ignore', divide='ignore'):
+            split_gain = n1 * n2 / (n1 + n2) * (s1 / n1 - s2 / n2) ** 2 / scale[:, None] ** 2
+        allowed = (n1 >= min_size) & (n2 >= min_size) & (splits[None, :] > lo[:, None]) & active[:, None]
+        score = np.where(allowed, split_gain - penalty, -np.inf)
+        best = np.argmax(score, axis=1)
+        accepted = score[rows, best] > 0
+        if not accepted.any():
+            break
+
+        chosen = rows[accepted]
+        t = best[accepted]
+        before[chosen] = s1[chosen, t] / n1[chosen, t] + offset[chosen]
+        after[chosen] = s2[chosen, t] / n2[chosen, t] + offset[chosen]
+        gain[chosen] = split_gain[chosen, t]
+        start[chosen] = t
+        lo[chosen] = t
+        changepoints[chosen] += 1
+        active &= accepted
+
+    return {
+        'start': start,
+        'changepoints': changepoints,
+        'before': before,
+        'after': after,
+        'shift_sigma': (after - before) / scale,
+        'gain': gain,
+        'noise': noise
+    }
+
+
+def regime_notes(metric_column: str, shift: Optional[RegimeShift], backend_note: str = "") -> str:
+    """notes text of a baseline recalculated after a regime shift (shift None for a segment batch)"""
+    if shift is None:
+        since, details = "each segment's regime shift", []
+    else:
+        since, details = f"the regime shift on {shift.change_date.isoformat()}", [f"{shift.shift_sigma:+.1f} sigma"]
+        if shift.migration_id:
+            details.append(f"migration {shift.migration_id}")
+    detail = (", ".join(details) + backend_note).lstrip(", ")
+    return (f"Calculated from {metric_column} column using simple_stats method since {since}"
+            + (f" ({detail})" if detail else ""))
@@ -0,0 +1,1045 @@
+"""
+Local Baseline Backend
+
+Computes the same BaselineStats as the BigQuery path from local Parquet/CSV
+files, and keeps saved baselines in a local JSON-lines store.
+
+Used for offline work on the exported traces (borg_traces, cloud_workload)
+and for benchmarking calculation cost without BigQuery latency:
+- Columnar reads with pyarrow (only the referenced columns are loaded)
+- Vectorized NumPy kernels for every statistic
+- No network access or GCP project required
+"""
+
+import re
+import csv
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Tuple, Union
+
+import numpy as np
+
+from ..models.baseline import (
+    BaselineStats, BaselineBatch, SmoothingState, CovarianceBaseline, RegimeShift,
+    BASELINE_TIMESTAMP_COLUMNS, make_segment_keys
+)
+from .rolling import bucket_daily, bucket_series, rolling_window_stats, rolling_series_records
+from .seasonal import (
+    decompose, phase_baselines, phase_index, fill_phase_profile,
+    SEASONAL_BUCKET_UNITS, HOURS_PER_WEEK
+)
+from .smoothing import refresh_window, refresh_state, state_to_baseline
+from .sampling import sample_array
+from .sketch import KLLSketch, grouped_sketch_bytes, rank_error_bound
+from .robust import robust_summary, robust_notes
+from .backfill import trailing_window_stats, as_of_baseline
+from .changepoint import regime_notes
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_column(name: str) -> str:
+    """
+    Normalize a column name for matching
+
+    BigQuery rewrites CSV headers on load ("Error_Rate (%)" becomes
+    "Error_Rate _%_"), so config column names are matched against file
+    headers on their alphanumeric characters only.
+    """
+    return re.sub(r'[^0-9a-z]', '', name.lower())
+
+
+class LocalTableReader:
+    """
+    Reads source tables from a directory of Parquet/CSV files
+
+    A table named `cloud_workload_dataset` is looked up as
+    `<data_dir>/cloud_workload_dataset.parquet`, then `.csv`.
+    """
+
+    EXTENSIONS = ('.parquet', '.csv')
+
+    def __init__(self, data_dir: str):
+        self.data_dir = Path(data_dir)
+
+    def _find_file(self, table: str) -> Path:
+        for extension in self.EXTENSIONS:
+            path = self.data_dir / f"{table}{extension}"
+            if path.exists():
+                return path
+        raise FileNotFoundError(f"No Parquet/CSV file for table '{table}' in {self.data_dir}")
+
+    def table_signature(self, table: str) -> Dict[str, Any]:
+        """
+        Change signature of a table's file
+
+        Returns:
+            Dictionary with modified (file mtime, UTC) and num_rows (file
+            size in bytes; counting rows would mean reading the file)
+        """
+        stat = self._find_file(table).stat()
+        return {
+            'modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            'num_rows': stat.st_size
+        }
+
+    def read_columns(self, table: str, columns: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Read the requested columns of a table
+
+        Args:
+            table: Table name (file name without extension)
+            columns: Column names as used in config (BigQuery or original spelling)
+
+        Returns:
+            Dictionary mapping each requested name to a NumPy array
+        """
+        import pyarrow.parquet as pq
+        import pyarrow.csv as pcsv
+
+        path = self._find_file(table)
+
+        if path.suffix == '.parquet':
+            file_columns = pq.read_schema(path).names
+        else:
+            with open(path, 'r', newline='') as f:
+                file_columns = next(csv.reader(f))
+
+        lookup = {_normalize_column(name): name for name in file_columns}
+        resolved = {}
+        for column in columns:
+            if column in file_columns:
+                resolved[column] = column
+            elif _normalize_column(column) in lookup:
+                resolved[column] = lookup[_normalize_column(column)]
+            else:
+                raise KeyError(f"Column '{column}' not found in {path.name}")
+
+        wanted = sorted(set(resolved.values()))
+        if path.suffix == '.parquet':
+            arrow_table = pq.read_table(path, columns=wanted)
+        else:
+            arrow_table = pcsv.read_csv(
+                path, convert_options=pcsv.ConvertOptions(include_columns=wanted)
+            )
+
+        logger.debug(f"Read {arrow_table.num_rows:,} rows x {len(wanted)} columns from {path.name}")
+
+        return {
+            column: arrow_table.column(file_column).to_numpy(zero_copy_only=False)
+            for column, file_column in resolved.items()
+        }
+
+
+def summarize(
+    values: np.ndarray,
+    percentiles: List[float],
+    sketch_k: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Vectorized simple_stats kernel
+
+    Args:
+        values: Raw column values (NaN/None are ignored)
+        percentiles: Percentile ranks (0-100) to compute
+        sketch_k: If set, also build a KLL sketch with this k
+
+    Returns:
+        Dictionary of statistics, or None if there are no values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    count = values.size
+    if count == 0:
+        return None
+
+    ranks = sorted(set([50.0, 95.0, 99.0] + [float(p) for p in percentiles]))
+    quantiles = np.percentile(values, ranks)
+
+    stats = {
+        'mean': float(values.mean()),
+        'std_dev': float(values.std(ddof=1)) if count > 1 else 0.0,
+        'min_value': float(values.min()),
+        'max_value': float(values.max()),
+        'quantiles': dict(zip(ranks, (float(q) for q in quantiles))),
+        'sample_count': int(count)
+    }
+    if sketch_k:
+        sketch = KLLSketch(sketch_k).update(values)
+        stats['quantile_sketch'] = sketch.to_bytes()
+        stats['quantile_rank_error'] = sketch.rank_error
+    return stats
+
+
+def grouped_summarize(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    percentiles: List[float],
+    sketch_k: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Vectorized simple_stats kernel for many segments at once
+
+    Args:
+        values: Raw column values (NaN are ignored)
+        codes: Segment index (0..n_groups-1) of each value
+        n_groups: Number of segments
+        percentiles: Percentile ranks (0-100) to compute
+        sketch_k: If set, also build one KLL sketch per segment with this k
+
+    Returns:
+        Dictionary of (n_groups,) arrays: mean, std_dev, min_value,
+        max_value, sample_count, plus quantiles mapping each rank to an
+        array (linear interpolation, as numpy.percentile); with sketch_k
+        also quantile_sketches (list of bytes) and quantile_rank_error
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    values, codes = values[valid], np.asarray(codes)[valid]
+
+    # Sort by segment, then value: each segment becomes a sorted slice
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+
+    count = np.bincount(codes, minlength=n_groups).astype(np.float64)
+    starts = np.concatenate([[0], np.cumsum(count)[:-1]]).astype(np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(codes, weights=values, minlength=n_groups) / count
+        deviation = values - mean[codes]
+        variance = np.bincount(codes, weights=deviation * deviation, minlength=n_groups) / (count - 1)
+    std_dev = np.where(count > 1, np.sqrt(variance), 0.0)
+
+    nonempty = count > 0
+    # Empty groups at the end start past the last value
+    last = np.minimum(starts + np.maximum(count.astype(np.int64) - 1, 0), max(values.size - 1, 0))
+    safe = np.minimum(starts, max(values.size - 1, 0))
+    quantiles = {}
+    for rank in sorted(set([50.0, 95.0, 99.0] + [float(p) for p in percentiles])):
+        position = rank / 100.0 * np.maximum(count - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        if values.size:
+            low_value = values[np.minimum(starts + lower, last)]
+            high_value = values[np.minimum(starts + upper, last)]
+            quantiles[rank] = np.where(nonempty, low_value + (position - lower) * (high_value - low_value), np.nan)
+        else:
+            quantiles[rank] = np.full(n_groups, np.nan)
+
+    stats = {
+        'mean': mean,
+        'std_dev': std_dev,
+        'min_value': values[safe] if values.size else np.full(n_groups, np.nan),
+        'max_value': values[last] if values.size else np.full(n_groups, np.nan),
+        'sample_count': count.astype(np.int64),
+        'quantiles': quantiles
+    }
+    if sketch_k:
+        # Segments are already sorted slices; small ones serialize directly
+        stats['quantile_sketches'] = grouped_sketch_bytes(values, starts, count.astype(np.int64), sketch_k)
+        stats['quantile_rank_error'] = np.where(count > sketch_k, rank_error_bound(sketch_k), 0.0)
+    return stats
+
+
+def segment_codes(dimensions: List[np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    One integer code per distinct combination of dimension values
+
+    Args:
+        dimensions: One string array per group_by dimension (same length)
+
+    Returns:
+        (codes, segment_values): segment index of each row and, per
+        dimension, the value of each segment
+    """
+    uniques, inverses = zip(*(np.unique(d, return_inverse=True) for d in dimensions))
+    combined = np.ravel_multi_index(inverses, [u.size for u in uniques])
+    segments, codes = np.unique(combined, return_inverse=True)
+    segment_values = [u[i] for u, i in zip(uniques, np.unravel_index(segments, [u.size for u in uniques]))]
+    return codes, segment_values
+
+
+class LocalBaselineStore:
+    """
+    Local stand-in for the BigQuery Baseline table
+
+    Baselines are appended as JSON lines in `<store_dir>/Baseline.jsonl`,
+    using the same row format as the BigQuery table. Holt-Winters states
+    are kept in `<store_dir>/SmoothingState.json`, one entry per metric,
+    and covariance baselines are appended to `<store_dir>/BaselineCovariance.jsonl`.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = Path(store_dir)
+        self.path = self.store_dir / "Baseline.jsonl"
+        self.state_path = self.store_dir / "SmoothingState.json"
+        self.covariance_path = self.store_dir / "BaselineCovariance.jsonl"
+
+    def save(self, baselines: List[BaselineStats]):
+        """Append baselines to the store"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            for baseline in baselines:
+                f.write(json.dumps(baseline.to_bigquery_row()) + "\n")
+
+    def has_run(self, run_id: str) -> bool:
+        """Whether baselines of a refresh run were already saved"""
+        if not self.path.exists():
+            return False
+        marker = f'"run_id": {json.dumps(run_id)}'
+        with open(self.path, 'r') as f:
+            return any(marker in line for line in f)
+
+    def save_batch(self, batch: BaselineBatch):
+        """Append a segment batch to the store"""
+        self.save(batch.to_baselines())
+
+    def get_latest(self, metric_name: str, segment_key: Optional[str] = None) -> Optional[BaselineStats]:
+        """Return the most recently calculated baseline for a metric (global or one segment)"""
+        return self.get_latest_many([metric_name], segment_key)[metric_name]
+
+    def get_latest_many(
+        self,
+        metric_names: List[str],
+        segment_key: Optional[str] = None
+    ) -> Dict[str, Optional[BaselineStats]]:
+        """Return the latest baseline of several metrics in one pass over the store"""
+        wanted = set(metric_names)
+        latest: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                for line in f:
+                    row = json.loads(line)
+                    name = row['metric_name']
+                    if name not in wanted or row.get('segment_key') != segment_key:
+                        continue
+                    if name not in latest or row['calculated_at'] > latest[name]['calculated_at']:
+                        latest[name] = row
+
+        results: Dict[str, Optional[BaselineStats]] = {name: None for name in metric_names}
+        for name, row in latest.items():
+            for column in BASELINE_TIMESTAMP_COLUMNS:
+                if row.get(column):
+                    row[column] = datetime.fromisoformat(row[column])
+            results[name] = BaselineStats.from_bigquery_row(row)
+        return results
+
+    def get_latest_segments(self, metric_name: str) -> List[BaselineStats]:
+        """Return the latest baseline of every segment of a metric"""
+        latest: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                for line in f:
+                    row = json.loads(line)
+                    key = row.get('segment_key')
+                    if row['metric_name'] != metric_name or key is None:
+                        continue
+                    if key not in latest or row['calculated_at'] > latest[key]['calculated_at']:
+                        latest[key] = row
+
+        baselines = []
+        for row in latest.values():
+            for column in BASELINE_TIMESTAMP_COLUMNS:
+                if row.get(column):
+                    row[column] = datetime.fromisoformat(row[column])
+            baselines.append(BaselineStats.from_bigquery_row(row))
+        return baselines
+
+    def mark_validated(self, baseline_ids: List[str], validated_at: datetime) -> int:
+        """
+        Set validated_at on stored baselines (rewrites the store file)
+
+        Returns:
+            Number of rows updated
+        """
+        if not baseline_ids or not self.path.exists():
+            return 0
+        wanted = set(baseline_ids)
+        updated = 0
+        with open(self.path, 'r') as f:
+            rows = [json.loads(line) for line in f]
+        for row in rows:
+            if row['baseline_id'] in wanted:
+                row['validated_at'] = validated_at.isoformat()
+                updated += 1
+        with open(self.path, 'w') as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        return updated
+
+    @staticmethod
+    def _state_key(metric_name: str, metric_column: str, source_table: str) -> str:
+        return f"{source_table}/{metric_column}/{metric_name}"
+
+    def _load_states(self) -> Dict[str, Any]:
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def load_state(self, metric_name: str, metric_column: str, source_table: str) -> Optional[SmoothingState]:
+        """Return the stored Holt-Winters state for a metric, if any"""
+        row = self._load_states().get(self._state_key(metric_name, metric_column, source_table))
+        if row is None:
+            return None
+        row['last_bucket'] = datetime.fromisoformat(row['last_bucket'])
+        row['updated_at'] = datetime.fromisoformat(row['updated_at'])
+        return SmoothingState.from_bigquery_row(row)
+
+    def save_state(self, state: SmoothingState):
+        """Replace the stored Holt-Winters state for a metric"""
+        states = self._load_states()
+        states[self._state_key(state.metric_name, state.metric_column, state.data_source)] = state.to_bigquery_row()
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, 'w') as f:
+            json.dump(states, f, indent=2)
+
+    def save_covariance(self, baseline: CovarianceBaseline):
+        """Append a covariance baseline to the store"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.covariance_path, 'a') as f:
+            f.write(json.dumps(baseline.to_bigquery_row()) + "\n")
+
+    def get_latest_covariance(self, group_name: str) -> Optional[CovarianceBaseline]:
+        """Return the most recently calculated covariance baseline of a group"""
+        latest = None
+        if self.covariance_path.exists():
+            with open(self.covariance_path, 'r') as f:
+                for line in f:
+                    row = json.loads(line)
+                    if row['group_name'] == group_name and \
+                            (latest is None or row['calculated_at'] > latest['calculated_at']):
+                        latest = row
+        if latest is None:
+            return None
+        for column in ('calculated_at', 'source_modified'):
+            if latest.get(column):
+                latest[column] = datetime.fromisoformat(latest[column])
+        return CovarianceBaseline.from_bigquery_row(latest)
+
+
+class LocalBaselineBackend:
+    """
+    Local calculation engine + store used by BaselineCalculator
+    when baseline.backend is "local"
+    """
+
+    def __init__(self, config, percentiles: List[float]):
+        """
+        Initialize local backend
+
+        Args:
+            config: Config object
+            percentiles: Configured percentile ranks (baseline.percentiles)
+        """
+        self.config = config
+        self.percentiles = percentiles
+        self.reader = LocalTableReader(self.config.get('local.data_dir', 'data'))
+        self.store = LocalBaselineStore(self.config.get('local.store_dir', 'local_baselines'))
+        self.time_window_enabled = self.config.get('baseline.time_window.enabled', False)
+        self.sketch_k = (self.config.get('baseline.sketch.k', 200)
+                         if self.config.get('baseline.sketch.enabled', True) else None)
+
+        logger.info(f"Local backend data dir: {self.reader.data_dir}")
+        logger.info(f"Local backend store: {self.store.path}")
+
+    def _window_mask(self, timestamps: np.ndarray, lookback_days: int) -> np.ndarray:
+        """Boolean mask selecting rows inside the lookback window"""
+        timestamps = np.asarray(timestamps, dtype='datetime64[us]')
+        window_start = np.datetime64(
+            (datetime.now(timezone.utc) - timedelta(days=lookback_days)).replace(tzinfo=None), 'us'
+        )
+        return timestamps >= window_start
+
+    def calculate_baselines(
+        self,
+        metrics: List[Dict[str, Any]],
+        lookback_days: int
+    ) -> List[BaselineStats]:
+        """
+        Calculate simple_stats baselines for metrics, reading each file once
+
+        Args:
+            metrics: Metric configs (name, column, table, optional timestamp_column)
+            lookback_days: Lookback window in days
+
+        Returns:
+            List of BaselineStats objects (metrics without data are skipped)
+        """
+        tables: Dict[str, List[Dict[str, Any]]] = {}
+        for metric in metrics:
+            tables.setdefault(metric['table'], []).append(metric)
+
+        baselines = []
+        for source_table, table_metrics in tables.items():
+            columns = [metric['column'] for metric in table_metrics]
+            if self.time_window_enabled:
+                columns += [m['timestamp_column'] for m in table_metrics if m.get('timestamp_column')]
+            data = self.reader.read_columns(source_table, columns)
+
+            for metric in table_metrics:
+                values = data[metric['column']]
+                timestamp_column = metric.get('timestamp_column')
+                if self.time_window_enabled and timestamp_column:
+                    values = values[self._window_mask(data[timestamp_column], lookback_days)]
+
+                stats = summarize(values, self.percentiles, self.sketch_k)
+                if stats is None:
+                    logger.warning(f"No data found for {metric['name']} in {source_table}")
+                    print(f"[ERROR] Failed to calculate baseline for {metric['name']}: "
+                          f"No data found for metric {metric['name']}")
+                    continue
+
+                baselines.append(self._to_baseline(
+                    stats, metric['name'], metric['column'], source_table, lookback_days
+                ))
+
+        return baselines
+
+    def calculate_covariance_baseline(
+        self,
+        group_name: str,
+        metrics: List[Dict[str, Any]],
+        lookback_days: int
+    ) -> CovarianceBaseline:
+        """
+        Calculate the covariance baseline of a metric group
+
+        Args:
+            group_name: Group name (baseline.covariance.groups)
+            metrics: Metric configs of the group (same table)
+            lookback_days: Lookback window in days
+
+        Returns:
+            CovarianceBaseline over the rows where every metric is present
+        """
+        source_table = metrics[0]['table']
+        columns = [metric['column'] for metric in metrics]
+        timestamp_column = metrics[0].get('timestamp_column')
+        data = self.reader.read_columns(
+            source_table, columns + ([timestamp_column] if self.time_window_enabled and timestamp_column else [])
+        )
+
+        matrix = np.column_stack([np.asarray(data[column], dtype=np.float64) for column in columns])
+        keep = ~np.isnan(matrix).any(axis=1)
+        if self.time_window_enabled and timestamp_column:
+            keep &= self._window_mask(data[timestamp_column], lookback_days)
+        matrix = matrix[keep]
+        if matrix.shape[0] < 2:
+            raise ValueError(f"No data found for metric group {group_name}")
+
+        covariance = np.cov(matrix, rowvar=False, ddof=1).reshape(len(columns), len(columns))
+        return CovarianceBaseline(
+            baseline_id=f"covariance-{group_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+            group_name=group_name,
+            metric_names=[metric['name'] for metric in metrics],
+            metric_columns=columns,
+            data_source=source_table,
+            means=matrix.mean(axis=0).tolist(),
+            covariance=covariance.ravel().tolist(),
+            sample_count=int(matrix.shape[0]),
+            lookback_days=lookback_days,
+            calculated_at=datetime.now()
+        )
+
+    def backfill_baselines(
+        self,
+        source_table: str,
+        metrics: List[Dict[str, Any]],
+        timestamp_column: str,
+        first_day: date,
+        last_day: date,
+        lookback_days: int
+    ) -> List[BaselineStats]:
+        """
+        Baselines as of every day in [first_day, last_day] (see backfill.py)
+
+        The file is read once; each metric is one sliding-window pass.
+        Days whose window has no data get no baseline.
+        """
+        data = self.reader.read_columns(source_table, [m['column'] for m in metrics] + [timestamp_column])
+        days = np.asarray(data[timestamp_column], dtype='datetime64[us]').astype('datetime64[D]')
+        as_of_days = np.arange(np.datetime64(first_day, 'D'), np.datetime64(last_day, 'D') + 1)
+
+        baselines = []
+        for metric in metrics:
+            stats = trailing_window_stats(days, data[metric['column']], as_of_days, lookback_days, self.percentiles)
+            for i in np.flatnonzero(stats['sample_count'] > 0).tolist():
+                day_stats = {
+                    'mean': float(stats['mean'][i]),
+                    'std_dev': float(stats['std_dev'][i]),
+                    'min_value': float(stats['min_value'][i]),
+                    'max_value': float(stats['max_value'][i]),
+                    'quantiles': {rank: float(values[i]) for rank, values in stats['quantiles'].items()},
+                    'sample_count': int(stats['sample_count'][i])
+                }
+                baseline = self._to_baseline(day_stats, metric['name'], metric['column'], source_table, lookback_days)
+                baselines.append(as_of_baseline(
+                    baseline, as_of_days[i].astype(object), metric['column'], lookback_days, ", local backend"
+                ))
+        return baselines
+
+    def calculate_baseline(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
+    ) -> BaselineStats:
+        """Calculate a simple_stats baseline for a single metric"""
+        baselines = self.calculate_baselines([{
+            'name': metric_name,
+            'column': metric_column,
+            'table': source_table,
+            'timestamp_column': timestamp_column
+        }], lookback_days)
+        if not baselines:
+            raise ValueError(f"No data found for metric {metric_name}")
+        return baselines[0]
+
+    def calculate_robust_baseline(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str] = None,
+        trim_fraction: float = 0.05
+    ) -> BaselineStats:
+        """
+        Calculate a robust_stats baseline (median, MAD, IQR, trimmed moments)
+
+        Exact statistics from the raw values; mean/std_dev hold the
+        trimmed moments.
+        """
+        columns = [metric_column]
+        if self.time_window_enabled and timestamp_column:
+            columns.append(timestamp_column)
+        data = self.reader.read_columns(source_table, columns)
+
+        values = np.asarray(data[metric_column], dtype=np.float64)
+        if self.time_window_enabled and timestamp_column:
+            values = values[self._window_mask(data[timestamp_column], lookback_days)]
+
+        stats = summarize(values, self.percentiles, self.sketch_k)
+        if stats is None:
+            logger.warning(f"No data found for {metric_name} in {source_table}")
+            raise ValueError(f"No data found for metric {metric_name}")
+
+        robust = robust_summary(values, trim_fraction)
+        baseline = self._to_baseline(stats, metric_name, metric_column, source_table, lookback_days)
+        baseline.median = robust['median']
+        baseline.mad = robust['mad']
+        baseline.iqr = robust['iqr']
+        baseline.trimmed_mean = robust['trimmed_mean']
+        baseline.trimmed_std_dev = robust['trimmed_std_dev']
+        baseline.mean = robust['trimmed_mean']
+        baseline.std_dev = robust['trimmed_std_dev']
+        baseline.notes = robust_notes(metric_column, trim_fraction, ", local backend")
+        return baseline
+
+    def sample_values(
+        self,
+        metric_column: str,
+        source_table: str,
+        sample_size: int,
+        timestamp_column: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> np.ndarray:
+        """Uniform random sample of a metric column as float64 (time-ordered if timestamp_column is set)"""
+        columns = [metric_column] + ([timestamp_column] if timestamp_column else [])
+        data = self.reader.read_columns(source_table, columns)
+        timestamps = data[timestamp_column] if timestamp_column else None
+        return sample_array(data[metric_column], sample_size, timestamps, seed)
+
+    def calculate_segmented_baselines(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        group_by: List[str],
+        lookback_days: int,
+        timestamp_column: Optional[str] = None
+    ) -> BaselineBatch:
+        """Calculate simple_stats baselines for every group_by segment in one pass"""
+        columns = [metric_column] + list(group_by)
+        if self.time_window_enabled and timestamp_column:
+            columns.append(timestamp_column)
+        data = self.reader.read_columns(source_table, columns)
+
+        values = np.asarray(data[metric_column], dtype=np.float64)
+        dimensions = [np.asarray(data[dimension]).astype(str) for dimension in group_by]
+        keep = ~np.isnan(values)
+        if self.time_window_enabled and timestamp_column:
+            keep &= self._window_mask(data[timestamp_column], lookback_days)
+        values = values[keep]
+        dimensions = [d[keep] for d in dimensions]
+        if values.size == 0:
+            logger.warning(f"No data found for {metric_name} in {source_table}")
+            raise ValueError(f"No data found for metric {metric_name}")
+
+        codes, segment_values = segment_codes(dimensions)
+        n_segments = segment_values[0].size
+
+        stats = grouped_summarize(values, codes, n_segments, self.percentiles, self.sketch_k)
+        logger.info(f"Calculated {n_segments:,} segment baselines for {metric_name} by {', '.join(group_by)}")
+
+        return BaselineBatch(
+            metric_name=metric_name,
+            metric_column=metric_column,
+            data_source=source_table,
+            method="simple_stats",
+            lookback_days=lookback_days,
+            calculated_at=datetime.now(),
+            group_by=list(group_by),
+            segment_values=segment_values,
+            mean=stats['mean'],
+            std_dev=stats['std_dev'],
+            min_value=stats['min_value'],
+            max_value=stats['max_value'],
+            sample_count=stats['sample_count'],
+            percentiles=stats['quantiles'],
+            notes=(f"Calculated from {metric_column} column using simple_stats method "
+                   f"per {', '.join(group_by)} segment (local backend)"),
+            quantile_sketches=stats.get('quantile_sketches'),
+            quantile_rank_error=stats.get('quantile_rank_error')
+        )
+
+    def daily_means(
+        self,
+        metric: Dict[str, Any],
+        lookback_days: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Daily mean of every series of a metric (see BaselineCalculator._daily_means)
+
+        The window is the last lookback_days days of the file, so static
+        exports are analyzed without a time_window setting.
+        """
+        group_by = list(metric.get('group_by') or [])
+        timestamp_column = metric['timestamp_column']
+        data = self.reader.read_columns(metric['table'], [metric['column'], timestamp_column] + group_by)
+
+        if group_by:
+            codes, segment_values = segment_codes([np.asarray(data[d]).astype(str) for d in group_by])
+            keys = make_segment_keys(group_by, segment_values)
+        else:
+            codes, keys = None, np.array([""], dtype=object)
+
+        buckets = bucket_daily(np.asarray(data[timestamp_column], dtype='datetime64[us]'), data[metric['column']], codes)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = buckets['sum'] / buckets['count'] + buckets['shift'][:, None]
+        return keys[:means.shape[0]], buckets['days'][-lookback_days:], means[:, -lookback_days:]
+
+    def migration_days(self, table: str, first_day: date, last_day: date) -> List[Tuple[date, str]]:
+        """(day, migration_id) of the migrations between two days (empty without a migrations file)"""
+        try:
+            data = self.reader.read_columns(table, ['migration_id', 'migration_timestamp'])
+        except (FileNotFoundError, KeyError) as e:
+            logger.info(f"No migrations available: {e}")
+            return []
+        days = np.asarray(data['migration_timestamp'], dtype='datetime64[us]').astype('datetime64[D]')
+        keep = (days >= np.datetime64(first_day, 'D')) & (days <= np.datetime64(last_day, 'D'))
+        return [(day.item(), str(migration_id))
+                for day, migration_id in zip(days[keep], np.asarray(data['migration_id'])[keep])]
+
+    def calculate_regime_baselines(
+        self,
+        metric: Dict[str, Any],
+        shifts: List[RegimeShift]
+    ) -> List[Union[BaselineStats, BaselineBatch]]:
+        """
+        Recalculate simple_stats baselines of shifted series over their new regime
+
+        Args:
+            metric: Metric config (with timestamp_column)
+            shifts: Regime shifts of the metric
+
+        Returns:
+            A BaselineStats for the global series and/or one BaselineBatch
+            with the shifted segments
+        """
+        group_by = list(metric.get('group_by') or [])
+        metric_name, metric_column, source_table = metric['name'], metric['column'], metric['table']
+        data = self.reader.read_columns(source_table, [metric_column, metric['timestamp_column']] + group_by)
+        values = np.asarray(data[metric_column], dtype=np.float64)
+        days = np.asarray(data[metric['timestamp_column']], dtype='datetime64[us]').astype('datetime64[D]')
+
+        results: List[Union[BaselineStats, BaselineBatch]] = []
+        for shift in shifts:
+            if shift.segment_key is not None:
+                continue
+            stats = summarize(values[days >= np.datetime64(shift.change_date, 'D')], self.percentiles, self.sketch_k)
+            if stats is None:
+                continue
+            baseline = self._to_baseline(stats, metric_name, metric_column, source_table, shift.regime_days)
+            baseline.notes = regime_notes(metric_column, shift, ", local backend")
+            results.append(baseline)
+
+        segment_shifts = [shift for shift in shifts if shift.segment_key is not None]
+        if not (group_by and segment_shifts):
+            return results
+
+        codes, segment_values = segment_codes([np.asarray(data[d]).astype(str) for d in group_by])
+        position = {key: i for i, key in enumerate(make_segment_keys(group_by, segment_values))}
+        since = np.full(segment_values[0].size, np.datetime64('NaT'), dtype='datetime64[D]')
+        for shift in segment_shifts:
+            if shift.segment_key in position:
+                since[position[shift.segment_key]] = np.datetime64(shift.change_date, 'D')
+
+        # Only rows of shifted segments on or after their change (NaT compares False)
+        selected = np.flatnonzero(~np.isnat(since))
+        compact = np.full(since.size, -1, dtype=np.int64)
+        compact[selected] = np.arange(selected.size)
+        keep = days >= since[codes]
+        stats = grouped_summarize(values[keep], compact[codes[keep]], selected.size, self.percentiles, self.sketch_k)
+
+        results.append(BaselineBatch(
+            metric_name=metric_name,
+            metric_column=metric_column,
+            data_source=source_table,
+            method="simple_stats",
+            lookback_days=max(shift.regime_days for shift in segment_shifts),
+            calculated_at=datetime.now(),
+            group_by=group_by,
+            segment_values=[dimension_values[selected] for dimension_values in segment_values],
+            mean=stats['mean'],
+            std_dev=stats['std_dev'],
+            min_value=stats['min_value'],
+            max_value=stats['max_value'],
+            sample_count=stats['sample_count'],
+            percentiles=stats['quantiles'],
+            notes=regime_notes(metric_column, None, ", local backend"),
+            quantile_sketches=stats.get('quantile_sketches'),
+            quantile_rank_error=stats.get('quantile_rank_error')
+        ))
+        return results
+
+    def calculate_rolling_baseline(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str],
+        window_size: int,
+        min_periods: int
+    ) -> BaselineStats:
+        """
+        Calculate a rolling_average baseline with cumulative-sum kernels
+
+        The band (mean/std_dev) is the most recent valid window; percentiles
+        and min/max are exact over the raw values of that window.
+        """
+        if not timestamp_column:
+            logger.warning(f"Rolling average needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self.calculate_baseline(metric_name, metric_column, source_table, lookback_days)
+
+        data = self.reader.read_columns(source_table, [metric_column, timestamp_column])
+        values = np.asarray(data[metric_column], dtype=np.float64)
+        timestamps = np.asarray(data[timestamp_column], dtype='datetime64[us]')
+        if self.time_window_enabled:
+            mask = self._window_mask(timestamps, lookback_days)
+            values, timestamps = values[mask], timestamps[mask]
+
+        stats = rolling_window_stats(bucket_daily(timestamps, values), window_size, min_periods)
+        series = rolling_series_records(stats)
+        if not series:
+            logger.warning(f"Not enough daily data for a {window_size}-day window for {metric_name}")
+            raise ValueError(f"No data found for metric {metric_name}")
+
+        current = series[-1]
+        window_start = np.datetime64(current['day']) - np.timedelta64(window_size - 1, 'D')
+        days = timestamps.astype('datetime64[D]')
+        in_window = (days >= window_start) & (days <= np.datetime64(current['day']))
+        window_stats = summarize(values[in_window], self.percentiles, self.sketch_k)
+
+        baseline = self._to_baseline(
+            window_stats, metric_name, metric_column, source_table, lookback_days
+        )
+        baseline.mean = current['mean']
+        baseline.std_dev = current['std_dev']
+        baseline.notes = (f"Calculated from {metric_column} column using rolling_average method "
+                          f"({window_size}-day window, min {min_periods} days, local backend)")
+        baseline.rolling_series = series
+        return baseline
+
+    def calculate_seasonal_baseline(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str],
+        period: int,
+        model: str,
+        bucket: str
+    ) -> BaselineStats:
+        """Calculate a seasonal_decomposition baseline with the vectorized engine"""
+        if not timestamp_column:
+            logger.warning(f"Seasonal decomposition needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self.calculate_baseline(metric_name, metric_column, source_table, lookback_days)
+
+        data = self.reader.read_columns(source_table, [metric_column, timestamp_column])
+        values = np.asarray(data[metric_column], dtype=np.float64)
+        timestamps = np.asarray(data[timestamp_column], dtype='datetime64[us]')
+        if self.time_window_enabled:
+            mask = self._window_mask(timestamps, lookback_days)
+            values, timestamps = values[mask], timestamps[mask]
+
+        stats = summarize(values, self.percentiles, self.sketch_k)
+        if stats is None:
+            logger.warning(f"No data found for {metric_name} in {source_table}")
+            raise ValueError(f"No data found for metric {metric_name}")
+
+        unit = SEASONAL_BUCKET_UNITS[bucket]
+        components = decompose(bucket_series(timestamps, values, unit=unit), period, model, unit)
+        phase_means, phase_std_devs, fit_std = phase_baselines(components)
+
+        baseline = self._to_baseline(stats, metric_name, metric_column, source_table, lookback_days)
+        baseline.std_dev = fit_std
+        baseline.notes = (f"Calculated from {metric_column} column using seasonal_decomposition method "
+                          f"({model}, period {period} x {bucket}, local backend)")
+        baseline.seasonal_period = period
+        baseline.seasonal_bucket = bucket
+        baseline.phase_means = phase_means
+        baseline.phase_std_devs = phase_std_devs
+        return baseline
+
+    def calculate_hour_of_week_baseline(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str]
+    ) -> BaselineStats:
+        """Calculate an hour_of_week baseline (168 phases) with the grouped kernel"""
+        if not timestamp_column:
+            logger.warning(f"hour_of_week needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self.calculate_baseline(metric_name, metric_column, source_table, lookback_days)
+
+        data = self.reader.read_columns(source_table, [metric_column, timestamp_column])
+        values = np.asarray(data[metric_column], dtype=np.float64)
+        timestamps = np.asarray(data[timestamp_column], dtype='datetime64[us]')
+        mask = ~np.isnat(timestamps)
+        if self.time_window_enabled:
+            mask &= self._window_mask(timestamps, lookback_days)
+        values, timestamps = values[mask], timestamps[mask]
+
+        stats = summarize(values, self.percentiles, self.sketch_k)
+        if stats is None:
+            logger.warning(f"No data found for {metric_name} in {source_table}")
+            raise ValueError(f"No data found for metric {metric_name}")
+
+        phases = grouped_summarize(values, phase_index(timestamps, 'h', HOURS_PER_WEEK),
+                                   HOURS_PER_WEEK, self.percentiles)
+        baseline = self._to_baseline(stats, metric_name, metric_column, source_table, lookback_days)
+        profile = fill_phase_profile(
+            phases['sample_count'], phases['mean'], phases['std_dev'],
+            {p: phases['quantiles'][float(p)] for p in self.percentiles},
+            baseline.mean, baseline.std_dev, baseline.percentiles
+        )
+        baseline.notes = f"Calculated from {metric_column} column using hour_of_week method (local backend)"
+        baseline.seasonal_period = HOURS_PER_WEEK
+        baseline.seasonal_bucket = 'hour'
+        baseline.phase_counts = profile['phase_counts']
+        baseline.phase_means = profile['phase_means']
+        baseline.phase_std_devs = profile['phase_std_devs']
+        baseline.phase_percentiles = profile['phase_percentiles']
+        return baseline
+
+    def calculate_smoothing_baseline(
+        self,
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int,
+        timestamp_column: Optional[str],
+        period: int,
+        bucket: str,
+        alpha: float,
+        beta: float,
+        gamma: float
+    ) -> BaselineStats:
+        """
+        Calculate an exponential_smoothing baseline, updating the stored state
+
+        Only complete buckets after the stored state are fed to the
+        Holt-Winters recursion; the file is still read in full since local
+        files are not partitioned.
+        """
+        if not timestamp_column:
+            logger.warning(f"Exponential smoothing needs a timestamp_column for {metric_name}")
+            logger.info("Falling back to simple_stats method")
+            return self.calculate_baseline(metric_name, metric_column, source_table, lookback_days)
+
+        previous = self.store.load_state(metric_name, metric_column, source_table)
+        if previous is not None and (previous.period != period or previous.bucket != bucket):
+            logger.info(f"Stored smoothing state for {metric_name} uses a different period/bucket, refitting")
+            previous = None
+
+        unit = SEASONAL_BUCKET_UNITS[bucket]
+        since, until = refresh_window(previous, lookback_days, unit, self.time_window_enabled)
+
+        data = self.reader.read_columns(source_table, [metric_column, timestamp_column])
+        values = np.asarray(data[metric_column], dtype=np.float64)
+        timestamps = np.asarray(data[timestamp_column], dtype='datetime64[us]')
+        mask = (timestamps < until) & ~np.isnan(values)
+        if since is not None:
+            mask &= timestamps >= since
+        values, timestamps = values[mask], timestamps[mask]
+
+        state = refresh_state(
+            previous, bucket_series(timestamps, values, unit=unit),
+            values.min() if values.size else np.nan,
+            values.max() if values.size else np.nan,
+            metric_name, metric_column, source_table,
+            bucket, period, alpha, beta, gamma,
+            since=since
+        )
+        if state is None:
+            logger.warning(f"No data found for {metric_name} in {source_table}")
+            raise ValueError(f"No data found for metric {metric_name}")
+
+        if values.size:
+            self.store.save_state(state)
+        return state_to_baseline(
+            state, self.percentiles, lookback_days, alpha, beta, gamma, ", local backend"
+        )
+
+    def _to_baseline(
+        self,
+        stats: Dict[str, Any],
+        metric_name: str,
+        metric_column: str,
+        source_table: str,
+        lookback_days: int
+    ) -> BaselineStats:
+        """Wrap kernel output in a BaselineStats object"""
+        quantiles = stats['quantiles']
+        return BaselineStats(
+            baseline_id=f"baseline-{metric_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+            metric_name=metric_name,
+            mean=stats['mean'],
+            std_dev=stats['std_dev'],
+            min_value=stats['min_value'],
+            max_value=stats['max_value'],
+            p50=quantiles[50.0],
+            p95=quantiles[95.0],
+            p99=quantiles[99.0],
+            calculated_at=datetime.now(),
+            lookback_days=lookback_days,
+            sample_count=stats['sample_count'],
+            data_source=source_table,
+            notes=f"Calculated from {metric_column} column using simple_stats method (local backend)",
+            percentiles={p: quantiles[float(p)] for p in self.percentiles},
+            quantile_sketch=stats.get('quantile_sketch'),
+            quantile_rank_error=stats.get('quantile_rank_error')
+        )
@@ -0,0 +1,100 @@
+"""
+Robust Statistics
+
+Median, MAD, IQR and trimmed mean/standard deviation for the robust_stats
+baseline method. Skewed metrics with past incidents in the lookback
+window (error rates, execution times) inflate the plain mean and standard
+deviation; these estimators ignore the tails.
+
+- Exact: from the raw values, one sort (local backend)
+- Approximate: from a fine APPROX_QUANTILES grid, so the BigQuery path
+  needs the same single scan as simple_stats. Each grid point stands for
+  1/N of the values, so the trimmed moments are averages over the grid
+  points inside the trimmed range and the MAD is the median distance of
+  the grid points from the median.
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+# Minimum APPROX_QUANTILES buckets for the grid-based estimates
+ROBUST_QUANTILE_RESOLUTION = 1000
+
+
+def robust_summary(values: np.ndarray, trim_fraction: float = 0.05) -> Dict[str, float]:
+    """
+    Exact robust statistics of raw values
+
+    Args:
+        values: Values (NaN are ignored)
+        trim_fraction: Share of values cut from each tail for the trimmed moments
+
+    Returns:
+        Dictionary with median, mad, iqr, trimmed_mean, trimmed_std_dev
+    """
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    values = values[~np.isnan(values)]
+    count = values.size
+    if count == 0:
+        raise ValueError("No values to summarize")
+
+    median, q25, q75 = np.quantile(values, [0.5, 0.25, 0.75])
+    cut = int(np.floor(trim_fraction * count))
+    trimmed = values[cut:count - cut] if count - 2 * cut > 0 else values
+
+    return {
+        'median': float(median),
+        'mad': float(np.median(np.abs(values - median))),
+        'iqr': float(q75 - q25),
+        'trimmed_mean': float(trimmed.mean()),
+        'trimmed_std_dev': float(trimmed.std(ddof=1)) if trimmed.size > 1 else 0.0
+    }
+
+
+def robust_from_quantiles(quantiles: Sequence[float], trim_fraction: float = 0.05) -> Dict[str, float]:
+    """
+    Approximate robust statistics from an APPROX_QUANTILES(x, N) array
+
+    Args:
+        quantiles: N + 1 values at ranks 0, 1/N, ..., 1
+        trim_fraction: Share of values cut from each tail for the trimmed moments
+
+    Returns:
+        Dictionary with median, mad, iqr, trimmed_mean, trimmed_std_dev
+    """
+    grid = np.asarray([np.nan if q is None else q for q in quantiles], dtype=np.float64)
+    buckets = grid.size - 1
+    if buckets < 4:
+        raise ValueError("Need at least 4 quantile buckets")
+
+    def at(rank: float) -> float:
+        return float(grid[int(round(rank * buckets))])
+
+    median = at(0.5)
+    # Bucket midpoints represent the values between adjacent quantiles
+    midpoints = (grid[:-1] + grid[1:]) / 2.0
+    ranks = (np.arange(buckets) + 0.5) / buckets
+    inside = midpoints[(ranks >= trim_fraction) & (ranks <= 1.0 - trim_fraction)]
+    if inside.size == 0:
+        inside = midpoints
+
+    return {
+        'median': median,
+        'mad': float(np.median(np.abs(midpoints - median))),
+        'iqr': at(0.75) - at(0.25),
+        'trimmed_mean': float(inside.mean()),
+        'trimmed_std_dev': float(inside.std(ddof=1)) if inside.size > 1 else 0.0
+    }
+
+
+def robust_resolution(base_resolution: int) -> int:
+    """Smallest multiple of base_resolution with at least ROBUST_QUANTILE_RESOLUTION buckets"""
+    return base_resolution * max(1, -(-ROBUST_QUANTILE_RESOLUTION // base_resolution))
+
+
+def robust_notes(metric_column: str, trim_fraction: float, backend_note: str = "") -> str:
+    """notes text of a robust_stats baseline"""
+    return (f"Calculated from {metric_column} column using robust_stats method "
+            f"(median/MAD, {trim_fraction:.0%} trimmed mean{backend_note})")
+
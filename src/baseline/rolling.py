@@ -0,0 +1,149 @@
+"""
+Rolling Window Kernels
+
+Vectorized NumPy kernels for the rolling_average baseline method.
+
+Values are bucketed per series per day into count/sum/sum-of-squares grids
+(series x days), and rolling windows are evaluated for every series at once
+with cumulative sums along the day axis, so the cost is independent of the
+number of series in Python terms (no per-series loops).
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def bucket_series(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    series_ids: Optional[np.ndarray] = None,
+    unit: str = 'D'
+) -> Dict[str, np.ndarray]:
+    """
+    Aggregate raw observations into per-series time buckets
+
+    Args:
+        timestamps: Observation timestamps (anything convertible to datetime64)
+        values: Observation values (NaN are ignored)
+        series_ids: Integer series index per observation (0..S-1); None for a single series
+        unit: Bucket width as a datetime64 unit ('D' for days, 'h' for hours)
+
+    Returns:
+        Dictionary with:
+        - days: datetime64[unit] array of length T covering min..max bucket
+        - count, sum, sum_sq: float64 arrays of shape (S, T)
+        - shift: per-series offset subtracted before summing (shape (S,))
+    """
+    values = np.asarray(values, dtype=np.float64)
+    buckets = np.asarray(timestamps).astype(f'datetime64[{unit}]')
+    series_ids = (np.zeros(values.size, dtype=np.int64) if series_ids is None
+                  else np.asarray(series_ids, dtype=np.int64))
+
+    valid = ~np.isnan(values) & ~np.isnat(buckets)
+    values, buckets, series_ids = values[valid], buckets[valid], series_ids[valid]
+
+    if values.size == 0:
+        empty = np.zeros((int(series_ids.max()) + 1 if series_ids.size else 1, 0))
+        return {'days': np.array([], dtype=f'datetime64[{unit}]'), 'count': empty,
+                'sum': empty, 'sum_sq': empty, 'shift': np.zeros(empty.shape[0])}
+
+    first = buckets.min()
+    n_buckets = int((buckets.max() - first).astype(np.int64)) + 1
+    n_series = int(series_ids.max()) + 1
+    flat = series_ids * n_buckets + (buckets - first).astype(np.int64)
+    size = n_series * n_buckets
+
+    # Center each series before summing squares to limit cancellation
+    series_count = np.bincount(series_ids, minlength=n_series)
+    shift = np.bincount(series_ids, weights=values, minlength=n_series) / np.maximum(series_count, 1)
+    centered = values - shift[series_ids]
+
+    return {
+        'days': first + np.arange(n_buckets),
+        'count': np.bincount(flat, minlength=size).reshape(n_series, n_buckets).astype(np.float64),
+        'sum': np.bincount(flat, weights=centered, minlength=size).reshape(n_series, n_buckets),
+        'sum_sq': np.bincount(flat, weights=centered * centered, minlength=size).reshape(n_series, n_buckets),
+        'shift': shift
+    }
+
+
+def bucket_daily(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    series_ids: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """Aggregate raw observations into per-series daily buckets (see bucket_series)"""
+    return bucket_series(timestamps, values, series_ids, unit='D')
+
+
+def _rolling_sum(grid: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sum along the last axis using cumulative sums"""
+    cumulative = np.cumsum(grid, axis=-1)
+    result = cumulative.copy()
+    if window < grid.shape[-1]:
+        result[..., window:] -= cumulative[..., :-window]
+    return result
+
+
+def rolling_window_stats(
+    buckets: Dict[str, np.ndarray],
+    window_size: int,
+    min_periods: int
+) -> Dict[str, np.ndarray]:
+    """
+    Trailing rolling-window mean/std for every series and day
+
+    Args:
+        buckets: Output of bucket_daily
+        window_size: Window length in days
+        min_periods: Minimum number of days with data for a window to be valid
+
+    Returns:
+        Dictionary of (S, D) arrays: count, mean, std_dev (NaN where the
+        window has fewer than min_periods days of data), plus days
+    """
+    count = _rolling_sum(buckets['count'], window_size)
+    total = _rolling_sum(buckets['sum'], window_size)
+    total_sq = _rolling_sum(buckets['sum_sq'], window_size)
+    active_days = _rolling_sum((buckets['count'] > 0).astype(np.float64), window_size)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centered_mean = total / count
+        variance = (total_sq - total * centered_mean) / (count - 1)
+    std_dev = np.sqrt(np.clip(variance, 0.0, None))
+    std_dev[count < 2] = 0.0
+
+    mean = centered_mean + buckets['shift'][:, None]
+    invalid = active_days < min_periods
+    mean[invalid] = np.nan
+    std_dev[invalid] = np.nan
+
+    return {
+        'days': buckets['days'],
+        'count': count,
+        'mean': mean,
+        'std_dev': std_dev
+    }
+
+
+def rolling_series_records(stats: Dict[str, np.ndarray], series: int = 0) -> list:
+    """
+    Convert one series of rolling_window_stats output into row dictionaries
+
+    Days whose window did not meet min_periods are omitted.
+    """
+    mean = stats['mean'][series]
+    valid = ~np.isnan(mean)
+    return [
+        {
+            'day': day.astype(object),
+            'sample_count': int(count),
+            'mean': float(m),
+            'std_dev': float(s)
+        }
+        for day, count, m, s in zip(
+            stats['days'][valid], stats['count'][series][valid],
+            mean[valid], stats['std_dev'][series][valid]
+        )
+    ]
@@ -0,0 +1,132 @@
+"""
+Metric Sampling
+
+Fixed-size random samples of a metric column, for analyses that need the
+shape of a metric's distribution rather than exact statistics (e.g. the
+AI optimizer's method recommendation).
+
+- Large tables: TABLESAMPLE SYSTEM reads only a fraction of the table's
+  storage blocks, so bytes scanned (and billed) shrink with the sample
+  rate instead of covering the whole column
+- Small tables (a few blocks, where block sampling would return all or
+  nothing): per-row Bernoulli sampling with RAND() over the full column,
+  which is cheap at that size
+- Both oversample slightly and trim to the requested size with
+  ORDER BY RAND() LIMIT n, then return rows in time order when a
+  timestamp column is known, so the sample spans the whole time range
+  instead of one storage-ordered slice
+- Results are read as Arrow and handed over as float64 NumPy arrays
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Sampling methods
+SYSTEM = "system"
+BERNOULLI = "bernoulli"
+
+
+def sample_fraction(num_rows: int, sample_size: int, oversample: float = 1.5) -> float:
+    """
+    Fraction of the table to sample for about sample_size rows
+
+    Oversampled so NULLs and uneven block sizes rarely leave the sample
+    short; 1.0 when the table has no more rows than requested.
+    """
+    if not num_rows or num_rows <= sample_size:
+        return 1.0
+    return min(1.0, oversample * sample_size / num_rows)
+
+
+def choose_method(num_bytes: int, min_system_bytes: int) -> str:
+    """Block sampling for tables large enough to have many blocks, row sampling otherwise"""
+    return SYSTEM if num_bytes and num_bytes >= min_system_bytes else BERNOULLI
+
+
+def build_sample_query(
+    table_id: str,
+    column: str,
+    fraction: float,
+    method: str = SYSTEM,
+    timestamp_column: Optional[str] = None
+) -> str:
+    """
+    SQL returning a random sample of a column
+
+    The query takes a @sample_size parameter. Output columns are `value`
+    and, with a timestamp column, `ts` (rows ordered by ts).
+
+    Args:
+        table_id: Fully qualified source table ID
+        column: Metric column
+        fraction: Share of the table to sample (0, 1]
+        method: SYSTEM (block sampling) or BERNOULLI (row sampling)
+        timestamp_column: Event time column used to order the sample
+    """
+    if method not in (SYSTEM, BERNOULLI):
+        raise ValueError(f"Unknown sampling method '{method}'")
+
+    ts_select = f", `{timestamp_column}` as ts" if timestamp_column else ""
+    sampled_from = f"`{table_id}`"
+    row_filter = ""
+    if fraction < 1.0:
+        if method == SYSTEM:
+            # TABLESAMPLE takes a literal percentage
+            percent = min(100.0, math.ceil(fraction * 100.0 * 1e4) / 1e4)
+            sampled_from += f" TABLESAMPLE SYSTEM ({percent} PERCENT)"
+        else:
+            row_filter = f"\n              AND RAND() < {fraction!r}"
+
+    order_by = "\n        ORDER BY ts" if timestamp_column else ""
+
+    return f"""
+        SELECT *
+        FROM (
+            SELECT `{column}` as value{ts_select}
+            FROM {sampled_from}
+            WHERE `{column}` IS NOT NULL{row_filter}
+            ORDER BY RAND()
+            LIMIT @sample_size
+        ){order_by}
+        """
+
+
+def arrow_to_values(table) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert a sample (Arrow table with `value` and optional `ts`) to NumPy
+
+    Returns:
+        (float64 values, datetime64[us] timestamps or None)
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    values = pc.cast(table.column('value'), pa.float64()).to_numpy(zero_copy_only=False)
+    timestamps = None
+    if 'ts' in table.column_names:
+        timestamps = np.asarray(table.column('ts').to_numpy(zero_copy_only=False), dtype='datetime64[us]')
+    return values, timestamps
+
+
+def sample_array(
+    values: np.ndarray,
+    sample_size: int,
+    timestamps: Optional[np.ndarray] = None,
+    seed: Optional[int] = None
+) -> np.ndarray:
+    """
+    Uniform sample without replacement of an in-memory column
+
+    NaN values are dropped first. The sample keeps time order (by
+    timestamps if given, otherwise by position).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(values))
+    if valid.size > sample_size:
+        valid = np.sort(np.random.default_rng(seed).choice(valid, size=sample_size, replace=False))
+    if timestamps is not None:
+        order = np.argsort(np.asarray(timestamps, dtype='datetime64[us]')[valid], kind='stable')
+        valid = valid[order]
+    return values[valid]
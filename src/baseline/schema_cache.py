@@ -0,0 +1,118 @@
+"""
+Schema Verification Cache
+
+Remembers which BigQuery tables were already checked against (or created
+with) their current schema definition, so table setup is not a blocking
+get_table/create_table round trip on every process start.
+
+- Once per process: verified tables are kept in a process-wide set
+- Across processes: a small JSON marker file maps table ID to the hash of
+  the schema definition it was verified with; a changed definition (e.g.
+  new columns) has a different hash and is verified again
+- Marker entries expire after max_age_hours, so a table dropped outside
+  the service is recreated after at most that long (delete the marker
+  file to force verification right away)
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def schema_hash(schema_definition: List[Dict[str, Any]]) -> str:
+    """Stable hash of a schema definition (list of SchemaField kwargs)"""
+    return hashlib.sha256(json.dumps(schema_definition, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class SchemaVerifier:
+    """
+    Runs a table's verification callable at most once per schema version
+    """
+
+    # (table_id, schema hash) pairs verified by this process
+    _verified: Set[Tuple[str, str]] = set()
+    _lock = threading.Lock()
+
+    def __init__(self, marker_path: str, max_age_hours: float = 24):
+        """
+        Initialize verifier
+
+        Args:
+            marker_path: JSON marker file (None disables the cross-process marker)
+            max_age_hours: Hours a marker entry is trusted (0 = no expiry)
+        """
+        self.marker_path = Path(marker_path).expanduser() if marker_path else None
+        self.max_age_hours = max_age_hours
+
+    def _read_marker(self) -> Dict[str, Dict[str, Any]]:
+        if self.marker_path is None or not self.marker_path.exists():
+            return {}
+        try:
+            with open(self.marker_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable schema marker {self.marker_path}: {e}")
+            return {}
+
+    def _write_marker(self, table_id: str, digest: str):
+        if self.marker_path is None:
+            return
+        entries = self._read_marker()
+        entries[table_id] = {'schema_hash': digest, 'verified_at': time.time()}
+        try:
+            self.marker_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.marker_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            tmp_path.replace(self.marker_path)
+        except OSError as e:
+            logger.warning(f"Could not write schema marker {self.marker_path}: {e}")
+
+    def _marker_valid(self, table_id: str, digest: str) -> bool:
+        entry = self._read_marker().get(table_id)
+        if entry is None or entry.get('schema_hash') != digest:
+            return False
+        if self.max_age_hours and time.time() - entry.get('verified_at', 0) > self.max_age_hours * 3600:
+            return False
+        return True
+
+    def ensure(
+        self,
+        table_id: str,
+        schema_definition: List[Dict[str, Any]],
+        verify: Callable[[], None]
+    ) -> bool:
+        """
+        Verify a table unless it was verified with this schema before
+
+        Args:
+            table_id: Fully qualified table ID
+            schema_definition: Schema the table must have
+            verify: Checks/creates/updates the table; raises on failure
+                    (nothing is recorded then)
+
+        Returns:
+            True if verify ran, False if a cached verification was used
+        """
+        key = (table_id, schema_hash(schema_definition))
+        if key in self._verified:
+            return False
+
+        with self._lock:
+            if key in self._verified:
+                return False
+            if self._marker_valid(*key):
+                logger.debug(f"Schema of {table_id} verified earlier (marker {self.marker_path})")
+                self._verified.add(key)
+                return False
+
+            verify()
+            self._verified.add(key)
+            self._write_marker(*key)
+            return True
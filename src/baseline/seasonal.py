@@ -0,0 +1,299 @@
+"""
+Seasonal Decomposition Engine
+
+Classical (moving-average) seasonal decomposition for many series at once.
+
+Input is a 2-D grid of bucket means (series x time buckets). Trend,
+seasonal and residual components are computed for every series in one
+vectorized pass (sliding-window matmul for the trend, one-hot matmul for
+the phase profile), and per-phase baselines (e.g. hour-of-week mean and
+standard deviation) are derived from the fitted model.
+
+Phases are absolute: phase 0 is the bucket starting Monday 1970-01-05
+00:00 UTC, so with hourly buckets and period 168 the phase of a timestamp
+is its hour-of-week and detectors can look it up with phase_index().
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# First Monday after the Unix epoch; phase 0 of every seasonal profile
+PHASE_ORIGIN = np.datetime64('1970-01-05T00:00:00')
+
+# Config bucket names -> datetime64 units
+SEASONAL_BUCKET_UNITS = {'day': 'D', 'hour': 'h'}
+
+# Phases of an hour-of-week profile (7 days x 24 hours)
+HOURS_PER_WEEK = 168
+
+
+def phase_index(timestamps: np.ndarray, unit: str, period: int) -> np.ndarray:
+    """
+    Seasonal phase of each timestamp
+
+    Args:
+        timestamps: Timestamps (anything convertible to datetime64)
+        unit: Bucket width as a datetime64 unit ('D' or 'h')
+        period: Number of buckets per season (7 for day-of-week, 168 for hour-of-week)
+
+    Returns:
+        Integer array of phases in [0, period)
+    """
+    buckets = np.asarray(timestamps).astype(f'datetime64[{unit}]')
+    offset = (buckets - PHASE_ORIGIN.astype(f'datetime64[{unit}]')).astype(np.int64)
+    return np.mod(offset, period)
+
+
+def _centered_moving_average(grid: np.ndarray, period: int) -> np.ndarray:
+    """
+    Centered moving average along the time axis (2 x MA for even periods)
+
+    Missing buckets (NaN) are skipped and the weights renormalized; a
+    window with no observed bucket yields NaN. Edges without a full
+    window are NaN, as in classical decomposition.
+    """
+    if period % 2:
+        weights = np.ones(period) / period
+    else:
+        weights = np.concatenate([[0.5], np.ones(period - 1), [0.5]]) / period
+
+    n_series, n_buckets = grid.shape
+    trend = np.full(grid.shape, np.nan)
+    if n_buckets < weights.size:
+        return trend
+
+    observed = ~np.isnan(grid)
+    values = sliding_window_view(np.where(observed, grid, 0.0), weights.size, axis=1)
+    mask = sliding_window_view(observed.astype(np.float64), weights.size, axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        core = (values @ weights) / (mask @ weights)
+
+    half = weights.size // 2
+    trend[:, half:n_buckets - half] = core
+    return trend
+
+
+def _fill_edges(grid: np.ndarray) -> np.ndarray:
+    """Forward- then backward-fill NaN along the time axis"""
+    n_series, n_buckets = grid.shape
+    index = np.arange(n_buckets)
+
+    valid = ~np.isnan(grid)
+    last = np.maximum.accumulate(np.where(valid, index, -1), axis=1)
+    filled = np.where(last >= 0, np.take_along_axis(grid, np.maximum(last, 0), axis=1), np.nan)
+
+    valid = ~np.isnan(filled)
+    nxt = np.minimum.accumulate(np.where(valid, index, n_buckets)[:, ::-1], axis=1)[:, ::-1]
+    return np.where(
+        np.isnan(filled),
+        np.take_along_axis(filled, np.minimum(nxt, n_buckets - 1), axis=1),
+        filled
+    )
+
+
+def decompose(
+    buckets: Dict[str, np.ndarray],
+    period: int,
+    model: str = "additive",
+    unit: str = 'D'
+) -> Dict[str, np.ndarray]:
+    """
+    Decompose every series into trend, seasonal and residual components
+
+    Args:
+        buckets: Output of rolling.bucket_series (count/sum/sum_sq grids, shape (S, T))
+        period: Number of buckets per season
+        model: "additive" or "multiplicative"
+        unit: Bucket width used to build `buckets`
+
+    Returns:
+        Dictionary with:
+        - trend, seasonal, resid: (S, T) components
+        - profile: (S, period) seasonal profile indexed by absolute phase
+        - level: (S,) latest trend value per series
+        - phase_mean, phase_std, phase_count: (S, period) per-phase baselines
+          (expected value at the current level and spread of raw observations
+          around the fitted model)
+    """
+    if model not in ("additive", "multiplicative"):
+        raise ValueError(f"Unknown decomposition model '{model}'")
+    multiplicative = model == "multiplicative"
+
+    count = buckets['count']
+    shift = buckets['shift'][:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(count > 0, buckets['sum'] / count, np.nan) + shift
+
+    phases = phase_index(buckets['days'], unit, period)
+    one_hot = np.zeros((phases.size, period))
+    one_hot[np.arange(phases.size), phases] = 1.0
+
+    # Trend and detrended series; a series shorter than one window gets a
+    # flat trend at its mean so it still yields a (single-season) profile
+    trend = _centered_moving_average(means, period)
+    no_trend = np.isnan(trend).all(axis=1)
+    if no_trend.any():
+        total = count.sum(axis=1)
+        series_mean = buckets['shift'] + buckets['sum'].sum(axis=1) / np.maximum(total, 1)
+        trend[no_trend] = series_mean[no_trend][:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        detrended = means / trend if multiplicative else means - trend
+
+    # Phase profile: mean detrended value per phase, normalized
+    observed = ~np.isnan(detrended)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profile = (np.where(observed, detrended, 0.0) @ one_hot) / (observed.astype(np.float64) @ one_hot)
+    neutral = 1.0 if multiplicative else 0.0
+    profile = np.where(np.isnan(profile), neutral, profile)
+    if multiplicative:
+        profile = profile / profile.mean(axis=1, keepdims=True)
+    else:
+        profile = profile - profile.mean(axis=1, keepdims=True)
+
+    seasonal = profile[:, phases]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resid = means / (trend * seasonal) if multiplicative else means - trend - seasonal
+
+    # Fitted value for every bucket (trend edges filled from the nearest window)
+    trend_filled = _fill_edges(trend)
+    fit = trend_filled * seasonal if multiplicative else trend_filled + seasonal
+    level = trend_filled[:, -1] if trend.shape[1] else np.full(trend.shape[0], np.nan)
+
+    # Squared deviation of raw observations from the fit, from bucket sums:
+    # sum((x - fit)^2) = sum_sq - 2 d sum + n d^2 with d = fit - shift
+    deviation = np.where(count > 0, fit - shift, 0.0)
+    squared_error = buckets['sum_sq'] - 2.0 * deviation * buckets['sum'] + count * deviation ** 2
+    squared_error = np.where(count > 0, np.clip(squared_error, 0.0, None), 0.0)
+
+    phase_count = count @ one_hot
+    with np.errstate(invalid='ignore', divide='ignore'):
+        phase_std = np.sqrt((squared_error @ one_hot) / (phase_count - 1))
+    phase_std[phase_count < 2] = np.nan
+
+    phase_mean = level[:, None] * profile if multiplicative else level[:, None] + profile
+
+    return {
+        'days': buckets['days'],
+        'trend': trend,
+        'seasonal': seasonal,
+        'resid': resid,
+        'profile': profile,
+        'level': level,
+        'phase_mean': phase_mean,
+        'phase_std': phase_std,
+        'phase_count': phase_count
+    }
+
+
+def residual_std(components: Dict[str, np.ndarray]) -> np.ndarray:
+    """Pooled standard deviation of raw observations around the seasonal fit, per series"""
+    count = components['phase_count'].sum(axis=1)
+    squared = np.nansum(components['phase_std'] ** 2 * (components['phase_count'] - 1), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt(squared / (count - 1))
+
+
+def phase_baselines(components: Dict[str, np.ndarray], series: int = 0):
+    """
+    Per-phase baselines of one series, ready to store
+
+    Phases never observed fall back to the current level (mean) and the
+    pooled residual standard deviation (std).
+
+    Returns:
+        (phase_means, phase_std_devs, residual_std) as lists/float
+    """
+    overall = float(residual_std(components)[series])
+    means = components['phase_mean'][series]
+    stds = components['phase_std'][series]
+    means = np.where(np.isnan(means), components['level'][series], means)
+    stds = np.where(np.isnan(stds), overall, stds)
+    return means.tolist(), stds.tolist(), overall
+
+
+def bucket_grid(
+    bucket_starts: np.ndarray,
+    counts: np.ndarray,
+    sums: np.ndarray,
+    sums_sq: np.ndarray,
+    unit: str = 'D',
+    series_ids: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Build bucket_series-shaped grids from pre-aggregated bucket rows
+
+    Used when buckets are aggregated server-side (one row per series per
+    bucket). Sums are re-centered on the per-series mean like
+    bucket_series does.
+    """
+    starts = np.asarray(bucket_starts).astype(f'datetime64[{unit}]')
+    counts = np.asarray(counts, dtype=np.float64)
+    sums = np.asarray(sums, dtype=np.float64)
+    sums_sq = np.asarray(sums_sq, dtype=np.float64)
+    series_ids = (np.zeros(starts.size, dtype=np.int64) if series_ids is None
+                  else np.asarray(series_ids, dtype=np.int64))
+
+    first = starts.min()
+    n_buckets = int((starts.max() - first).astype(np.int64)) + 1
+    n_series = int(series_ids.max()) + 1
+    flat = series_ids * n_buckets + (starts - first).astype(np.int64)
+    size = n_series * n_buckets
+
+    series_count = np.bincount(series_ids, weights=counts, minlength=n_series)
+    shift = np.bincount(series_ids, weights=sums, minlength=n_series) / np.maximum(series_count, 1)
+    s = shift[series_ids]
+    centered_sum = sums - counts * s
+    centered_sum_sq = sums_sq - 2.0 * s * sums + counts * s * s
+
+    def grid(weights):
+        return np.bincount(flat, weights=weights, minlength=size).reshape(n_series, n_buckets)
+
+    return {
+        'days': first + np.arange(n_buckets),
+        'count': grid(counts),
+        'sum': grid(centered_sum),
+        'sum_sq': grid(centered_sum_sq),
+        'shift': shift
+    }
+
+
+def fill_phase_profile(
+    counts: np.ndarray,
+    means: np.ndarray,
+    std_devs: np.ndarray,
+    quantiles: Dict[float, np.ndarray],
+    overall_mean: float,
+    overall_std: float,
+    overall_quantiles: Dict[float, float]
+) -> Dict[str, object]:
+    """
+    Per-phase profile ready to store, with gaps filled from the overall stats
+
+    Phases without data take the overall mean and quantiles; phases with
+    fewer than two values take the overall standard deviation.
+
+    Args:
+        counts, means, std_devs: (period,) arrays per phase (NaN where empty)
+        quantiles: Rank -> (period,) array of per-phase quantiles
+        overall_mean, overall_std, overall_quantiles: Statistics over all phases
+
+    Returns:
+        Dictionary with phase_counts, phase_means, phase_std_devs (lists)
+        and phase_percentiles (rank -> list)
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    empty = counts == 0
+    means = np.where(empty | np.isnan(means), overall_mean, means)
+    std_devs = np.where((counts < 2) | np.isnan(std_devs), overall_std, std_devs)
+    return {
+        'phase_counts': counts.tolist(),
+        'phase_means': means.tolist(),
+        'phase_std_devs': std_devs.tolist(),
+        'phase_percentiles': {
+            rank: np.where(empty | np.isnan(values), overall_quantiles[rank], values).tolist()
+            for rank, values in quantiles.items()
+        }
+    }
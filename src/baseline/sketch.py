@@ -0,0 +1,301 @@
+"""
+KLL Quantile Sketch
+
+Compact, mergeable quantile summary (Karnin, Lang & Liberty 2016) stored
+with baselines so percentiles can be combined across partitions and
+segments, and read at any rank, without rescanning raw rows.
+
+- Items live in levels; an item on level h stands for 2^h input values
+- A level over capacity is sorted and halved: every other item (random
+  offset) moves up one level, so the total weight stays exactly n
+- Capacities shrink geometrically (factor 2/3) below the top level, so
+  a sketch holds about 3k items regardless of n
+- Sketches with the same k merge by concatenating levels and compacting
+- Until the first compaction the sketch holds every value and is exact
+
+Serialized form (little endian): magic b'KLL1', k (uint16), n (int64),
+min and max (float64), number of levels (uint16), level sizes (uint32
+each), then all items as float64, level 0 first.
+"""
+
+import struct
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+MAGIC = b'KLL1'
+_HEADER = struct.Struct('<4sHqddH')
+
+# Default k: about 1.3% normalized rank error
+DEFAULT_K = 200
+
+# Smallest capacity of any level
+MIN_LEVEL_CAPACITY = 8
+
+# Capacity ratio between adjacent levels
+CAPACITY_RATIO = 2.0 / 3.0
+
+
+def rank_error_bound(k: int) -> float:
+    """
+    Normalized rank error of a KLL sketch with parameter k
+
+    Empirical bound for quantile queries at 99% confidence, as published
+    for the Apache DataSketches KLL implementation.
+    """
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch over float64 values
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        """
+        Initialize an empty sketch
+
+        Args:
+            k: Accuracy parameter (size ~3k items, rank error ~2.3/k)
+            seed: Seed for the compaction coin flips (None = random)
+        """
+        if not MIN_LEVEL_CAPACITY <= k <= 65535:
+            raise ValueError(f"k must be between {MIN_LEVEL_CAPACITY} and 65535, got {k}")
+        self.k = k
+        self.n = 0
+        self.min_value = float('nan')
+        self.max_value = float('nan')
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        """Number of values summarized"""
+        return self.n
+
+    @property
+    def is_exact(self) -> bool:
+        """True while no compaction has happened (all values are retained)"""
+        return len(self.levels) == 1
+
+    @property
+    def rank_error(self) -> float:
+        """Normalized rank error bound of quantile queries (0 while exact)"""
+        return 0.0 if self.is_exact else rank_error_bound(self.k)
+
+    @property
+    def num_retained(self) -> int:
+        """Number of items stored"""
+        return sum(level.size for level in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(MIN_LEVEL_CAPACITY, int(np.ceil(self.k * CAPACITY_RATIO ** depth)))
+
+    def _compress(self):
+        """Compact levels until every level is within capacity"""
+        while True:
+            level = next((h for h, items in enumerate(self.levels) if items.size > self._capacity(h)), None)
+            if level is None:
+                return
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(self.levels[level])
+            # With an odd count the smallest item stays behind
+            kept = items[:items.size % 2]
+            promoted = items[kept.size:][int(self._rng.integers(2))::2]
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def update(self, values) -> 'KLLSketch':
+        """
+        Add values (NaN are ignored)
+
+        Returns:
+            self, for chaining
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        low, high = float(values.min()), float(values.max())
+        self.min_value = low if self.n == 0 else min(self.min_value, low)
+        self.max_value = high if self.n == 0 else max(self.max_value, high)
+        self.n += int(values.size)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        Fold another sketch into this one
+
+        Returns:
+            self, for chaining
+        """
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with different k ({self.k} and {other.k})")
+        if other.n == 0:
+            return self
+
+        self.min_value = other.min_value if self.n == 0 else min(self.min_value, other.min_value)
+        self.max_value = other.max_value if self.n == 0 else max(self.max_value, other.max_value)
+        self.n += other.n
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+        return self
+
+    @classmethod
+    def merge_all(cls, sketches: Iterable['KLLSketch'], k: Optional[int] = None) -> 'KLLSketch':
+        """Merge several sketches into a new one"""
+        sketches = list(sketches)
+        merged = cls(k or (sketches[0].k if sketches else DEFAULT_K))
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+
+    def _sorted_items(self):
+        """Retained items in ascending order with their cumulative weights"""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2 ** h, dtype=np.int64)
+                                  for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, ranks) -> np.ndarray:
+        """
+        Values at normalized ranks
+
+        Args:
+            ranks: Ranks in [0, 1] (e.g. 0.99 for p99)
+
+        Returns:
+            Array of the smallest retained values whose cumulative weight
+            reaches rank * n (min/max at ranks 0 and 1; NaN if empty)
+        """
+        ranks = np.asarray(ranks, dtype=np.float64)
+        if self.n == 0:
+            return np.full(ranks.shape, np.nan)
+        if np.any((ranks < 0) | (ranks > 1)):
+            raise ValueError("Quantile ranks must be between 0 and 1")
+
+        items, cumulative = self._sorted_items()
+        index = np.searchsorted(cumulative, ranks * self.n, side='left')
+        result = items[np.minimum(index, items.size - 1)]
+        result = np.where(ranks <= 0, self.min_value, result)
+        return np.where(ranks >= 1, self.max_value, result)
+
+    def quantile(self, rank: float) -> float:
+        """Value at one normalized rank"""
+        return float(self.quantiles([rank])[0])
+
+    def percentiles(self, percentiles: Iterable[float]) -> dict:
+        """Map percentile ranks (0-100) to values"""
+        percentiles = [float(p) for p in percentiles]
+        return dict(zip(percentiles, (float(v) for v in self.quantiles(np.array(percentiles) / 100.0))))
+
+    def ranks(self, values) -> np.ndarray:
+        """Normalized rank (share of values <= x) of each value"""
+        values = np.asarray(values, dtype=np.float64)
+        if self.n == 0:
+            return np.full(values.shape, np.nan)
+        items, cumulative = self._sorted_items()
+        index = np.searchsorted(items, values, side='right')
+        weight = np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0)
+        return weight / self.n
+
+    def to_bytes(self) -> bytes:
+        """Serialize (see module docstring for the layout)"""
+        sizes = [level.size for level in self.levels]
+        header = _HEADER.pack(MAGIC, self.k, self.n, self.min_value, self.max_value, len(sizes))
+        return (header + struct.pack(f'<{len(sizes)}I', *sizes)
+                + np.concatenate(self.levels).astype('<f8').tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: bytes, seed: Optional[int] = None) -> 'KLLSketch':
+        """Deserialize a sketch written by to_bytes"""
+        magic, k, n, min_value, max_value, num_levels = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a serialized KLL sketch")
+        offset = _HEADER.size
+        sizes = struct.unpack_from(f'<{num_levels}I', data, offset)
+        offset += 4 * num_levels
+        items = np.frombuffer(data, dtype='<f8', offset=offset, count=sum(sizes)).astype(np.float64)
+
+        sketch = cls(k, seed)
+        sketch.n = n
+        sketch.min_value = min_value
+        sketch.max_value = max_value
+        sketch.levels = np.split(items, np.cumsum(sizes)[:-1]) if num_levels else [np.empty(0)]
+        return sketch
+
+
+def exact_sketch_bytes(sorted_values: np.ndarray, k: int = DEFAULT_K) -> bytes:
+    """
+    Serialized sketch of values that fit in level 0 (at most k, ascending)
+
+    Same bytes as KLLSketch(k).update(values).to_bytes() without building
+    the object; used for the many small segments of a segmented baseline.
+    """
+    size = sorted_values.size
+    min_value = float(sorted_values[0]) if size else float('nan')
+    max_value = float(sorted_values[-1]) if size else float('nan')
+    return (_HEADER.pack(MAGIC, k, size, min_value, max_value, 1) + struct.pack('<I', size)
+            + sorted_values.astype('<f8').tobytes())
+
+
+def grouped_sketch_bytes(
+    sorted_values: np.ndarray,
+    starts: np.ndarray,
+    counts: np.ndarray,
+    k: int = DEFAULT_K
+) -> List[bytes]:
+    """
+    Serialized sketch of each group of a segment-sorted value array
+
+    Args:
+        sorted_values: Values sorted by group, then value
+        starts: Offset of each group in sorted_values
+        counts: Number of values of each group
+        k: Sketch accuracy parameter
+
+    Returns:
+        One serialized sketch per group
+    """
+    sketches = []
+    for start, count in zip(starts.tolist(), counts.tolist()):
+        values = sorted_values[start:start + count]
+        if count <= k:
+            sketches.append(exact_sketch_bytes(values, k))
+        else:
+            sketches.append(KLLSketch(k).update(values).to_bytes())
+    return sketches
+
+
+def merge_serialized(sketches: Iterable[Optional[bytes]]) -> Optional[KLLSketch]:
+    """
+    Merge serialized sketches (e.g. quantile_sketch of several segment or
+    partition baselines); None entries are skipped
+
+    Returns:
+        The merged sketch, or None if there was nothing to merge
+    """
+    merged = None
+    for data in sketches:
+        if not data:
+            continue
+        sketch = KLLSketch.from_bytes(data)
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged
+
+
+def sketch_error(data: Optional[bytes]) -> Optional[float]:
+    """Rank error bound of a serialized sketch without deserializing the items"""
+    if not data:
+        return None
+    _, k, _, _, _, num_levels = _HEADER.unpack_from(data, 0)
+    return 0.0 if num_levels == 1 else rank_error_bound(k)
@@ -0,0 +1,344 @@
+"""
+Holt-Winters Exponential Smoothing
+
+Additive Holt-Winters (level, trend, season) over bucketed series, for the
+exponential_smoothing baseline method.
+
+State is kept in compact arrays, one row per series (level and trend of
+shape (S,), season of shape (S, period)), and the recursion steps through
+time buckets updating every series at once. Because the state carries
+everything the model needs, a refresh only feeds the buckets that arrived
+since the last run: cost is O(new buckets), not O(history).
+
+Seasons use the same absolute phases as seasonal.py (phase 0 is the
+bucket starting Monday 00:00 UTC).
+"""
+
+from datetime import datetime, timezone
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.baseline import BaselineStats, SmoothingState
+from .seasonal import phase_index, SEASONAL_BUCKET_UNITS
+
+
+def _bucket_means(buckets: Dict[str, np.ndarray]) -> np.ndarray:
+    """Per-bucket mean of each series (NaN for empty buckets)"""
+    count = buckets['count']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(count > 0, buckets['sum'] / count, np.nan) + buckets['shift'][:, None]
+
+
+def pad_buckets(buckets: Dict[str, np.ndarray], start: np.datetime64) -> Dict[str, np.ndarray]:
+    """
+    Prepend empty buckets so the grid starts at `start`
+
+    Keeps the recursion aligned with a persisted state when the first new
+    bucket with data comes after a gap.
+    """
+    days = buckets['days']
+    start = np.datetime64(start, str(np.datetime_data(days.dtype)[0]))
+    if days.size == 0 or days[0] <= start:
+        return buckets
+
+    missing = int((days[0] - start).astype(np.int64))
+    n_series = buckets['count'].shape[0]
+    empty = np.zeros((n_series, missing))
+    padded = {key: np.concatenate([empty, buckets[key]], axis=1) for key in ('count', 'sum', 'sum_sq')}
+    padded['days'] = start + np.arange(missing + days.size)
+    padded['shift'] = buckets['shift']
+    return padded
+
+
+def init_state(buckets: Dict[str, np.ndarray], period: int, unit: str = 'D') -> Dict[str, np.ndarray]:
+    """
+    Initial Holt-Winters state from the first seasons of each series
+
+    Level is the mean of the first season, trend the per-bucket change
+    between the first two seasons (0 with less than two seasons) and the
+    season the first-season deviations from the level.
+    """
+    means = _bucket_means(buckets)
+    n_series, n_buckets = means.shape
+    phases = phase_index(buckets['days'], unit, period)
+
+    with np.errstate(invalid='ignore'):
+        first = means[:, :period]
+        level = np.nanmean(np.where(np.isnan(first).all(axis=1, keepdims=True), 0.0, first), axis=1)
+        trend = np.zeros(n_series)
+        if n_buckets >= 2 * period:
+            second = np.nanmean(means[:, period:2 * period], axis=1)
+            trend = np.where(np.isnan(second), 0.0, (second - level) / period)
+
+    season = np.zeros((n_series, period))
+    deviation = first - level[:, None]
+    observed = ~np.isnan(deviation)
+    for column in range(first.shape[1]):
+        rows = observed[:, column]
+        season[rows, phases[column]] = deviation[rows, column]
+    season -= season.mean(axis=1, keepdims=True)
+
+    return {
+        'level': level,
+        'trend': trend,
+        'season': season,
+        'resid_var': np.full(n_series, np.nan),
+        'count': np.zeros(n_series)
+    }
+
+
+def update_state(
+    state: Dict[str, np.ndarray],
+    buckets: Dict[str, np.ndarray],
+    alpha: float,
+    beta: float,
+    gamma: float,
+    unit: str = 'D'
+) -> Dict[str, np.ndarray]:
+    """
+    Feed buckets through the additive Holt-Winters recursion
+
+    Buckets must directly follow the state's last bucket (see pad_buckets).
+    Empty buckets advance the level by the trend and leave trend and season
+    unchanged. resid_var tracks the mean squared deviation of raw
+    observations from the one-step forecast, smoothed with alpha.
+
+    Args:
+        state: Output of init_state or a previous update_state (modified in place)
+        buckets: count/sum/sum_sq grids of shape (S, T) from bucket_series
+        alpha: Level smoothing factor
+        beta: Trend smoothing factor
+        gamma: Seasonal smoothing factor
+        unit: Bucket width used to build `buckets`
+
+    Returns:
+        The updated state
+    """
+    level, trend, season = state['level'], state['trend'], state['season']
+    resid_var, total = state['resid_var'], state['count']
+    period = season.shape[1]
+    rows = np.arange(level.size)
+
+    means = _bucket_means(buckets)
+    phases = phase_index(buckets['days'], unit, period)
+    shift = buckets['shift']
+
+    for column, phase in enumerate(phases):
+        count = buckets['count'][:, column]
+        observed = count > 0
+        y = means[:, column]
+        prior_season = season[rows, phase]
+        forecast = level + trend + prior_season
+
+        # Mean squared deviation of the bucket's raw values from the forecast
+        d = forecast - shift
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mse = (buckets['sum_sq'][:, column] - 2.0 * d * buckets['sum'][:, column]
+                   + count * d * d) / count
+        mse = np.clip(mse, 0.0, None)
+
+        new_level = alpha * (y - prior_season) + (1.0 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1.0 - beta) * trend
+        new_season = gamma * (y - new_level) + (1.0 - gamma) * prior_season
+
+        level = np.where(observed, new_level, level + trend)
+        trend = np.where(observed, new_trend, trend)
+        season[rows, phase] = np.where(observed, new_season, prior_season)
+        smoothed = np.where(np.isnan(resid_var), mse, (1.0 - alpha) * resid_var + alpha * mse)
+        resid_var = np.where(observed, smoothed, resid_var)
+        total = total + count
+
+    state.update(level=level, trend=trend, season=season, resid_var=resid_var, count=total)
+    return state
+
+
+def forecast_profile(
+    state: Dict[str, np.ndarray],
+    next_bucket: np.datetime64,
+    unit: str = 'D',
+    series: int = 0
+) -> Dict[str, object]:
+    """
+    Baseline values for one series from its state
+
+    Returns:
+        Dictionary with mean (one-step forecast for next_bucket), std_dev
+        (sqrt of resid_var), phase_means (level + trend + season for every
+        phase over the next season) and phase_std_devs
+    """
+    season = state['season'][series]
+    period = season.size
+    level, trend = state['level'][series], state['trend'][series]
+
+    # Steps ahead (1..period) at which each phase next occurs
+    first_phase = int(phase_index(np.array([next_bucket]), unit, period)[0])
+    steps = np.mod(np.arange(period) - first_phase, period) + 1
+    phase_means = level + trend * steps + season
+
+    variance = state['resid_var'][series]
+    std_dev = float(np.sqrt(variance)) if not np.isnan(variance) else 0.0
+    return {
+        'mean': float(phase_means[first_phase]),
+        'std_dev': std_dev,
+        'phase_means': phase_means.tolist(),
+        'phase_std_devs': [std_dev] * period
+    }
+
+
+def stack_states(states: List[SmoothingState]) -> Dict[str, np.ndarray]:
+    """Pack persisted per-metric states into state arrays (one row per state)"""
+    return {
+        'level': np.array([s.level for s in states], dtype=np.float64),
+        'trend': np.array([s.trend for s in states], dtype=np.float64),
+        'season': np.array([s.season for s in states], dtype=np.float64),
+        'resid_var': np.array([s.resid_var for s in states], dtype=np.float64),
+        'count': np.array([s.sample_count for s in states], dtype=np.float64)
+    }
+
+
+def refresh_window(
+    previous: Optional[SmoothingState],
+    lookback_days: int,
+    unit: str = 'D',
+    windowed: bool = True
+) -> Tuple[Optional[np.datetime64], np.datetime64]:
+    """
+    Bucket range [since, until) to feed on this refresh (naive UTC)
+
+    Starts after the state's last bucket, or for a first fit at the
+    lookback window start (windowed, i.e. baseline.time_window enabled)
+    or at the first observation (since None). Ends at the start of the
+    current bucket so only complete buckets enter the state.
+    """
+    now = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), unit)
+    if previous is not None:
+        since = np.datetime64(previous.last_bucket.replace(tzinfo=None), unit) + 1
+    elif windowed:
+        since = now - np.timedelta64(lookback_days, 'D').astype(f'timedelta64[{unit}]')
+    else:
+        since = None
+    return since, now
+
+
+def refresh_state(
+    previous: Optional[SmoothingState],
+    buckets: Dict[str, np.ndarray],
+    min_value: float,
+    max_value: float,
+    metric_name: str,
+    metric_column: str,
+    data_source: str,
+    bucket: str,
+    period: int,
+    alpha: float,
+    beta: float,
+    gamma: float,
+    since: Optional[np.datetime64] = None
+) -> Optional[SmoothingState]:
+    """
+    Advance a persisted state with new buckets (or fit a first state)
+
+    Args:
+        previous: Stored state, or None for a first fit
+        buckets: Single-series bucket grids for the new buckets only
+        min_value: Minimum of the new observations (NaN if none)
+        max_value: Maximum of the new observations (NaN if none)
+        since: First bucket of this refresh (gaps before the first bucket
+               with data advance the trend)
+
+    Returns:
+        The new state, or None when there is no previous state and no data
+    """
+    unit = SEASONAL_BUCKET_UNITS[bucket]
+    has_data = buckets['days'].size > 0
+
+    if previous is not None:
+        arrays = stack_states([previous])
+        last_bucket = previous.last_bucket
+        sample_count = previous.sample_count
+        min_value = np.nanmin([previous.min_value, min_value])
+        max_value = np.nanmax([previous.max_value, max_value])
+    elif has_data:
+        arrays = init_state(buckets, period, unit)
+        last_bucket = None
+        sample_count = 0
+    else:
+        return None
+
+    if has_data:
+        if previous is not None and since is not None:
+            buckets = pad_buckets(buckets, since)
+        update_state(arrays, buckets, alpha, beta, gamma, unit)
+        last_bucket = buckets['days'][-1].astype('datetime64[us]').astype(datetime).replace(tzinfo=timezone.utc)
+        sample_count = int(arrays['count'][0])
+
+    resid_var = float(arrays['resid_var'][0])
+    return SmoothingState(
+        metric_name=metric_name,
+        metric_column=metric_column,
+        data_source=data_source,
+        bucket=bucket,
+        period=period,
+        last_bucket=last_bucket,
+        level=float(arrays['level'][0]),
+        trend=float(arrays['trend'][0]),
+        season=arrays['season'][0].tolist(),
+        resid_var=0.0 if np.isnan(resid_var) else resid_var,
+        sample_count=sample_count,
+        min_value=float(min_value),
+        max_value=float(max_value),
+        updated_at=datetime.now(timezone.utc)
+    )
+
+
+def state_to_baseline(
+    state: SmoothingState,
+    percentiles: List[float],
+    lookback_days: int,
+    alpha: float,
+    beta: float,
+    gamma: float,
+    backend_note: str = ""
+) -> BaselineStats:
+    """
+    Build an exponential_smoothing baseline from a state
+
+    mean is the one-step forecast for the next bucket and std_dev the
+    smoothed deviation of raw values from the forecast. Percentiles assume
+    normal residuals around the forecast; min/max/sample_count cover every
+    observation absorbed into the state.
+    """
+    unit = SEASONAL_BUCKET_UNITS[state.bucket]
+    next_bucket = np.datetime64(state.last_bucket.replace(tzinfo=None), unit) + 1
+    profile = forecast_profile(stack_states([state]), next_bucket, unit)
+
+    def quantile(p: float) -> float:
+        if profile['std_dev'] == 0:
+            return profile['mean']
+        return NormalDist(profile['mean'], profile['std_dev']).inv_cdf(min(max(p / 100.0, 1e-9), 1 - 1e-9))
+
+    return BaselineStats(
+        baseline_id=f"baseline-{state.metric_name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}",
+        metric_name=state.metric_name,
+        mean=profile['mean'],
+        std_dev=profile['std_dev'],
+        min_value=state.min_value,
+        max_value=state.max_value,
+        p50=quantile(50),
+        p95=quantile(95),
+        p99=quantile(99),
+        calculated_at=datetime.now(),
+        lookback_days=lookback_days,
+        sample_count=state.sample_count,
+        data_source=state.data_source,
+        notes=(f"Calculated from {state.metric_column} column using exponential_smoothing method "
+               f"(alpha {alpha}, beta {beta}, gamma {gamma}, period {state.period} x {state.bucket}"
+               f"{backend_note})"),
+        percentiles={p: quantile(p) for p in percentiles},
+        seasonal_period=state.period,
+        seasonal_bucket=state.bucket,
+        phase_means=profile['phase_means'],
+        phase_std_devs=profile['phase_std_devs']
+    )
@@ -0,0 +1,193 @@
+"""
+Bulk Baseline Writer
+
+Collects every baseline produced by a refresh and commits them to the
+Baseline table in one Parquet load job, instead of one streaming insert
+per baseline.
+
+- One network round trip per refresh, no streaming-insert pricing
+- Rows land directly in managed storage (no streaming buffer), so they
+  can be updated or deleted right away
+- Idempotent per run ID: the load job ID is derived from the run ID, so a
+  retried commit of the same run is recognized and not appended twice
+"""
+
+import io
+import re
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from google.cloud import bigquery
+from google.cloud.exceptions import Conflict, GoogleCloudError
+
+from ..models.baseline import (
+    BaselineStats, BaselineBatch, baseline_arrow_schema, BASELINE_TIMESTAMP_COLUMNS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def new_run_id() -> str:
+    """Generate a run ID for a refresh (UTC timestamp + random suffix)"""
+    return f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class BaselineWriter:
+    """
+    Buffers baselines for one refresh run and writes them in one commit
+
+    Usage:
+        writer = calculator.create_writer()
+        writer.add(baseline)
+        writer.add_batch(segment_batch)
+        writer.flush()
+    """
+
+    # Attempts with a fresh job ID when an earlier job of the same run failed
+    MAX_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        client: Optional[bigquery.Client],
+        table_id: str,
+        run_id: Optional[str] = None,
+        local_store=None,
+        on_commit: Optional[Callable[[List[BaselineStats], List[BaselineBatch]], None]] = None,
+        before_load: Optional[Callable[[], None]] = None
+    ):
+        """
+        Initialize writer
+
+        Args:
+            client: BigQuery client (None when writing to a local store)
+            table_id: Fully qualified Baseline table ID
+            run_id: Refresh run ID (generated if None); reuse it to make retries idempotent
+            local_store: LocalBaselineStore to write to instead of BigQuery
+            on_commit: Called with the written baselines and batches after a
+                       successful commit (e.g. to refresh a read cache)
+            before_load: Called before the first BigQuery load (e.g. to make
+                         sure the table exists); not called when nothing is written
+        """
+        self.client = client
+        self.table_id = table_id
+        self.run_id = run_id or new_run_id()
+        self.local_store = local_store
+        self.on_commit = on_commit
+        self.before_load = before_load
+        self._baselines: List[BaselineStats] = []
+        self._batches: List[BaselineBatch] = []
+
+    def __len__(self) -> int:
+        return len(self._baselines) + sum(len(batch) for batch in self._batches)
+
+    def add(self, baseline: BaselineStats):
+        """Queue a single baseline"""
+        baseline.run_id = self.run_id
+        self._baselines.append(baseline)
+
+    def add_batch(self, batch: BaselineBatch):
+        """Queue a columnar batch of segment baselines"""
+        batch.run_id = self.run_id
+        self._batches.append(batch)
+
+    def to_arrow(self):
+        """Concatenate everything queued into one pyarrow Table"""
+        import pyarrow as pa
+
+        schema = baseline_arrow_schema()
+        tables = [batch.to_arrow() for batch in self._batches]
+        if self._baselines:
+            rows = []
+            for baseline in self._baselines:
+                row = baseline.to_bigquery_row()
+                # Timestamps as datetimes (naive = UTC, as in the JSON rows), sketches as raw bytes
+                for column in BASELINE_TIMESTAMP_COLUMNS:
+                    value = getattr(baseline, column)
+                    if value is not None and value.tzinfo is None:
+                        value = value.replace(tzinfo=timezone.utc)
+                    row[column] = value
+                row['quantile_sketch'] = baseline.quantile_sketch
+                rows.append(row)
+            tables.append(pa.Table.from_pylist(rows, schema=schema))
+        if not tables:
+            return schema.empty_table()
+        return pa.concat_tables(tables)
+
+    def _job_id(self, attempt: int) -> str:
+        """Deterministic load job ID for this run (letters, digits, '-' and '_' only)"""
+        base = "baseline_load_" + re.sub(r'[^0-9A-Za-z_-]', '_', self.run_id)
+        return base if attempt == 0 else f"{base}_retry{attempt}"
+
+    def flush(self) -> int:
+        """
+        Commit all queued baselines
+
+        Returns:
+            Number of rows written (0 if the run was already committed)
+        """
+        count = len(self)
+        if count == 0:
+            return 0
+
+        if self.local_store is not None:
+            if self.local_store.has_run(self.run_id):
+                logger.info(f"Run {self.run_id} already saved locally, skipping")
+                written = 0
+            else:
+                for batch in self._batches:
+                    self.local_store.save_batch(batch)
+                self.local_store.save(self._baselines)
+                written = count
+            self._committed()
+            return written
+
+        import pyarrow.parquet as pq
+
+        if self.before_load is not None:
+            self.before_load()
+
+        buffer = io.BytesIO()
+        pq.write_table(self.to_arrow(), buffer)
+
+        parquet_options = bigquery.ParquetOptions()
+        parquet_options.enable_list_inference = True
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND
+        )
+        job_config.parquet_options = parquet_options
+
+        logger.info(f"Loading {count:,} baselines into {self.table_id} (run {self.run_id})")
+
+        for attempt in range(self.MAX_ATTEMPTS):
+            job_id = self._job_id(attempt)
+            buffer.seek(0)
+            try:
+                self.client.load_table_from_file(
+                    buffer, self.table_id, job_id=job_id, job_config=job_config
+                ).result()
+                logger.info(f"Baselines saved successfully (run {self.run_id}, job {job_id})")
+                self._committed()
+                return count
+            except Conflict:
+                # A job with this ID already exists: the run was submitted before
+                existing = self.client.get_job(job_id)
+                if existing.error_result is None:
+                    existing.result()
+                    logger.info(f"Run {self.run_id} already committed by job {job_id}, skipping")
+                    self._committed()
+                    return 0
+                logger.warning(f"Earlier job {job_id} failed: {existing.error_result}, retrying")
+            except GoogleCloudError as gce:
+                logger.error(f"BigQuery error saving baselines (run {self.run_id}): {gce}")
+                raise
+
+        raise RuntimeError(f"Failed to save baselines for run {self.run_id} after {self.MAX_ATTEMPTS} attempts")
+
+    def _committed(self):
+        if self.on_commit is not None:
+            self.on_commit(self._baselines, self._batches)
+        self._baselines = []
+        self._batches = []
@@ -0,0 +1,19 @@
+"""
+Anomaly detection module
+
+Scores metric observations against the baselines produced by the
+baseline module and emits Anomaly records for the AI agent.
+
+Components:
+- DetectionEngine: Runs the detectors configured in detection.detectors
+- StreamingDetector: EWMA/CUSUM charts over many series
+- SeriesStateStore: Memory-mapped per-series detector state
+"""
+
+from .engine import DetectionEngine, Detector
+from .state_store import SeriesStateStore
+from .streaming import StreamingDetector
+
+__all__ = ['DetectionEngine', 'Detector', 'StreamingDetector', 'SeriesStateStore']
+
+__version__ = '1.0.0'
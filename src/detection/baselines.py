@@ -0,0 +1,169 @@
+"""
+Packed Baselines
+
+The baselines of all detected metrics as flat arrays, so a micro-batch of
+observations finds its baseline with a few gathers instead of a Python
+lookup per row.
+
+- One entry per metric, one per phase for seasonal and hour_of_week
+  baselines, and one per segment of segmented detectors; each entry has
+  a center, scale, sample count and quantile row (see percentile.py)
+- A row's entry is its metric's offset + phase, where the phase comes
+  from the row's timestamp (phase 0 starts Monday 1970-01-05 00:00 UTC,
+  as in baseline/seasonal.py); non-seasonal baselines have period 1
+- Rows with a segment key that has its own baseline use the segment's
+  entry instead; unknown segments fall back to the metric's baseline
+- Robust baselines are centered on the median and scaled by the robust
+  sigma (see BaselineStats.center_and_scale)
+- A sentinel entry (NaN) at the end of the arrays stands for metrics
+  without a baseline, so their rows score NaN and never fire
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.baseline import BaselineStats, SEASONAL_BUCKET_SECONDS
+from .percentile import rank_grid, quantile_rows
+
+# Phase 0 of seasonal profiles in nanoseconds since the epoch (Monday 1970-01-05 00:00 UTC)
+PHASE_ORIGIN_NS = 4 * 86400 * 10 ** 9
+
+
+@dataclass
+class PackedBaselines:
+    """
+    Baselines of the detected metrics as flat arrays
+
+    center/scale/count/quantiles have one entry per (metric, phase) and
+    per segment, plus the sentinel; offset/period/bucket_ns have one entry
+    per metric, followed by the sentinel's entry (used for rows of unknown
+    metrics, code -1). quantiles is (entries, len(ranks)); baseline_ids
+    names the baseline behind each entry.
+    """
+    center: np.ndarray
+    scale: np.ndarray
+    count: np.ndarray
+    quantiles: np.ndarray
+    ranks: np.ndarray
+    offset: np.ndarray
+    period: np.ndarray
+    bucket_ns: np.ndarray
+    baseline_ids: np.ndarray
+    segment_entries: Dict[Tuple[int, str], int] = field(default_factory=dict)
+
+    @property
+    def median(self) -> np.ndarray:
+        """p50 of every entry"""
+        return self.quantiles[:, int(np.searchsorted(self.ranks, 50.0))]
+
+    def entries(
+        self,
+        codes: np.ndarray,
+        timestamps_ns: Optional[np.ndarray] = None,
+        segments: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Baseline entry of each row
+
+        Args:
+            codes: Metric index of each row (-1 = no baseline)
+            timestamps_ns: int64 nanoseconds since the epoch (None = phase 0)
+            segments: segment_key of each row (None = global baselines only)
+
+        Returns:
+            Integer array indexing center/scale/count/quantiles
+        """
+        entries = self.offset[codes]
+        if timestamps_ns is not None:
+            buckets = np.floor_divide(timestamps_ns - PHASE_ORIGIN_NS, self.bucket_ns[codes])
+            entries = entries + np.mod(buckets, self.period[codes])
+        if segments is None or not self.segment_entries:
+            return entries
+
+        names, name_index = np.unique(np.asarray(segments), return_inverse=True)
+        pairs, pair_index = np.unique(codes * names.size + name_index.ravel(), return_inverse=True)
+        lookup = np.array([
+            self.segment_entries.get((int(pair // names.size), str(names[pair % names.size])), -1)
+            for pair in pairs.tolist()
+        ], dtype=np.int64)
+        segment_entries = lookup[pair_index.ravel()]
+        return np.where(segment_entries >= 0, segment_entries, entries)
+
+
+def pack_baselines(
+    baselines: List[Optional[BaselineStats]],
+    segment_baselines: Optional[Sequence[List[BaselineStats]]] = None
+) -> PackedBaselines:
+    """
+    Pack the baselines of the detected metrics
+
+    Args:
+        baselines: Latest baseline of each metric (None = no baseline yet)
+        segment_baselines: Segment baselines of each metric (same order;
+                           empty lists for metrics without segments)
+
+    Phase means/std devs (and phase_counts when present) replace the
+    overall center/scale for baselines with a seasonal profile.
+    """
+    segment_baselines = segment_baselines or [[] for _ in baselines]
+    present = [b for b in baselines if b is not None] + [b for group in segment_baselines for b in group]
+    ranks = rank_grid(present)
+
+    centers, scales, counts, quantiles, ids = [], [], [], [], []
+    offsets, periods, bucket_ns = [], [], []
+    for baseline in baselines:
+        if baseline is None:
+            offsets.append(-1)
+            periods.append(1)
+            bucket_ns.append(1)
+            continue
+
+        offsets.append(len(centers))
+        rows = quantile_rows(baseline, ranks)
+        if baseline.phase_means and baseline.seasonal_bucket:
+            period = len(baseline.phase_means)
+            centers.extend(baseline.phase_means)
+            scales.extend(baseline.phase_std_devs)
+            counts.extend(baseline.phase_counts or [baseline.sample_count] * period)
+            quantiles.extend(rows if len(rows) == period else np.repeat(rows, period, axis=0))
+            ids.extend([baseline.baseline_id] * period)
+            periods.append(period)
+            bucket_ns.append(SEASONAL_BUCKET_SECONDS[baseline.seasonal_bucket] * 10 ** 9)
+        else:
+            center, scale = baseline.center_and_scale()
+            centers.append(center)
+            scales.append(scale)
+            counts.append(baseline.sample_count)
+            quantiles.extend(rows)
+            ids.append(baseline.baseline_id)
+            periods.append(1)
+            bucket_ns.append(1)
+
+    segment_entries: Dict[Tuple[int, str], int] = {}
+    for code, group in enumerate(segment_baselines):
+        for baseline in group:
+            segment_entries[(code, baseline.segment_key)] = len(centers)
+            center, scale = baseline.center_and_scale()
+            centers.append(center)
+            scales.append(scale)
+            counts.append(baseline.sample_count)
+            quantiles.extend(quantile_rows(baseline, ranks))
+            ids.append(baseline.baseline_id)
+
+    sentinel = len(centers)
+    offsets = [sentinel if offset < 0 else offset for offset in offsets] + [sentinel]
+    quantiles.append(np.full(ranks.size, np.nan))
+    return PackedBaselines(
+        center=np.array(centers + [np.nan], dtype=np.float64),
+        scale=np.array(scales + [np.nan], dtype=np.float64),
+        count=np.array(counts + [0], dtype=np.int64),
+        quantiles=np.vstack(quantiles),
+        ranks=ranks,
+        offset=np.array(offsets, dtype=np.int64),
+        period=np.array(periods + [1], dtype=np.int64),
+        bucket_ns=np.array(bucket_ns + [1], dtype=np.int64),
+        baseline_ids=np.array(ids + [None], dtype=object),
+        segment_entries=segment_entries
+    )
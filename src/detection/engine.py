@@ -0,0 +1,654 @@
+"""
+Anomaly Detection Engine
+
+Runs the detectors configured in detection.detectors over micro-batches
+of metric observations and emits Anomaly records.
+
+- Each enabled detector watches one metric (its `metric` key, or its
+  name) against the metric's latest baseline, served from the
+  calculator's baseline cache; detectors with `segments: true` also load
+  the metric's segment baselines and score rows tagged with a segment
+  key against their segment
+- z_score detectors fire on the distance from the baseline in sigmas
+  (zscore.py); percentile detectors on the empirical upper tail
+  probability under the baseline's quantile table (percentile.py); ewma
+  and cusum detectors chart every series of the metric (e.g. one borg
+  task) online and fire when it drifts from its target (streaming.py);
+  mahalanobis detectors score observation vectors of a metric group
+  against the group's covariance baseline with one distance per row
+  (mahalanobis.py, detect_vectors); the per-metric detectors of the
+  group's members are then not loaded
+- A batch is parallel NumPy arrays (metric names, values, optional
+  timestamps and segment keys) and is scored in one vectorized pass;
+  Anomaly objects are only built for the rows that fire
+- The packed baseline arrays are rebuilt only when the cache hands out a
+  different baseline (new refresh or TTL expiry)
+- Streaming state is memory-mapped under detection.streaming.state_dir
+  (one directory per detector) and snapshotted every
+  detection.streaming.snapshot_seconds, so a restarted engine resumes
+  every chart where the last snapshot left it
+"""
+
+import time
+import uuid
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..baseline.calculator import BaselineCalculator
+from ..models.anomaly import Anomaly, AnomalyType, Severity
+from ..models.baseline import BaselineStats, CovarianceBaseline
+from ..utils.config import get_config
+from .baselines import PackedBaselines, pack_baselines
+from .mahalanobis import PackedCovariance, pack_covariance, whiten, chi2_upper_tail, contributions
+from .percentile import upper_tail_probabilities, normal_upper_quantile
+from .streaming import StreamingDetector, STREAMING_DEFAULTS
+from .zscore import (
+    z_scores, deviation_percentages, erf, confidences, sample_reliability,
+    severity_codes, SEVERITY_LEVELS
+)
+
+logger = logging.getLogger(__name__)
+
+# Detection methods implemented by the engine
+SUPPORTED_METHODS = ('z_score', 'percentile', 'ewma', 'cusum', 'mahalanobis')
+
+# detection_method reported on emitted anomalies
+METHOD_LABELS = {
+    'z_score': 'z-score', 'percentile': 'percentile', 'ewma': 'ewma', 'cusum': 'cusum',
+    'mahalanobis': 'mahalanobis'
+}
+
+# Detector entry keys passed to streaming detectors (see streaming.py)
+STREAMING_OPTIONS = ('lambda', 'limit', 'k', 'h', 'warmup', 'target')
+
+# Segment list of detectors without segments (one shared object, so refresh_baselines sees no change)
+NO_SEGMENTS: Tuple[BaselineStats, ...] = ()
+
+# impact_level of the series named in affected_resources, by severity
+IMPACT_LEVELS = {
+    Severity.CRITICAL: 'high', Severity.HIGH: 'high', Severity.MEDIUM: 'medium',
+    Severity.LOW: 'low', Severity.INFO: 'low'
+}
+
+# Metric name keywords -> anomaly type (classification guide of docs/ANOMALY_DETECTOR_INTERFACE.md)
+ANOMALY_TYPE_KEYWORDS = [
+    (AnomalyType.STABILITY, ('error', 'fail', 'crash')),
+    (AnomalyType.COST, ('cost', 'spend', 'usd')),
+    (AnomalyType.RESOURCE, ('cpu', 'memory', 'disk', 'utilization')),
+    (AnomalyType.PERFORMANCE, ('latency', 'time', 'throughput', 'duration'))
+]
+
+
+def classify_metric(metric_name: str) -> AnomalyType:
+    """Anomaly type of a metric, from keywords in its name"""
+    name = metric_name.lower()
+    for anomaly_type, keywords in ANOMALY_TYPE_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return anomaly_type
+    return AnomalyType.UNKNOWN
+
+
+@dataclass
+class Detector:
+    """
+    One enabled entry of detection.detectors
+
+    threshold is in sigmas (z_score); threshold_percentile is the baseline
+    percentile (0-100) a value must exceed (percentile); options holds the
+    chart parameters of ewma/cusum detectors (lambda, limit, k, h, warmup,
+    target). A mahalanobis detector watches a metric group (its `group`
+    key, stored as metric) and its threshold is in equivalent sigmas.
+    """
+    name: str
+    metric: str
+    method: str
+    threshold: float
+    priority: int
+    anomaly_type: AnomalyType
+    metric_type: str
+    threshold_percentile: float = 95.0
+    segments: bool = False
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_detectors(
+    entries: List[Dict[str, Any]],
+    default_threshold: float,
+    metric_columns: Dict[str, str],
+    group_members: Optional[Dict[str, List[str]]] = None
+) -> List[Detector]:
+    """
+    Enabled detectors of detection.detectors, by priority, one per metric
+
+    Args:
+        entries: detection.detectors config entries
+        default_threshold: Threshold of entries without one (detection.threshold_sigma)
+        metric_columns: Metric name -> source column (reported as metric_type)
+        group_members: Covariance group name -> member metrics (baseline.covariance.groups)
+
+    Returns:
+        List of Detector; entries with an unsupported method, for a metric
+        already watched by a higher-priority detector, or for a member of
+        a group watched by a mahalanobis detector, are skipped
+    """
+    detectors: Dict[str, Detector] = {}
+    for entry in sorted(entries, key=lambda e: e.get('priority', 999)):
+        if not entry.get('enabled', True):
+            continue
+        method = entry.get('method', 'z_score')
+        if method not in SUPPORTED_METHODS:
+            logger.warning(f"Detector {entry['name']}: method '{method}' not supported, skipping")
+            continue
+        metric = entry.get('group' if method == 'mahalanobis' else 'metric', entry['name'])
+        if metric in detectors:
+            logger.warning(f"Detector {entry['name']}: metric {metric} already watched by "
+                           f"{detectors[metric].name}, skipping")
+            continue
+        anomaly_type = entry.get('anomaly_type')
+        detectors[metric] = Detector(
+            name=entry['name'],
+            metric=metric,
+            method=method,
+            threshold=float(entry.get('threshold', default_threshold)),
+            priority=entry.get('priority', 999),
+            anomaly_type=(AnomalyType[anomaly_type] if anomaly_type else
+                          AnomalyType.UNKNOWN if method == 'mahalanobis' else classify_metric(metric)),
+            metric_type=metric_columns.get(metric) or metric,
+            threshold_percentile=float(entry.get('threshold_percentile', 95.0)),
+            segments=bool(entry.get('segments', False)),
+            options={key: entry[key] for key in STREAMING_OPTIONS if key in entry}
+        )
+
+    # A group's joint score replaces the per-metric checks of its members
+    group_members = group_members or {}
+    for group in [d for d in detectors.values() if d.method == 'mahalanobis']:
+        for metric in group_members.get(group.metric, []):
+            member = detectors.get(metric)
+            if member is not None and member.method != 'mahalanobis':
+                logger.warning(f"Detector {member.name}: metric {metric} already watched by "
+                               f"{group.name} (group {group.metric}), skipping")
+                del detectors[metric]
+    return list(detectors.values())
+
+
+class DetectionEngine:
+    """
+    Vectorized anomaly detection over micro-batches of observations
+
+    Usage:
+        engine = DetectionEngine()
+        anomalies = engine.detect(metric_names, values, timestamps)
+    """
+
+    def __init__(self, config=None, calculator: Optional[BaselineCalculator] = None):
+        """
+        Initialize engine
+
+        Args:
+            config: Configuration object. If None, uses global config.
+            calculator: BaselineCalculator serving the baselines (created if None)
+        """
+        self.config = config or get_config()
+        self.calculator = calculator or BaselineCalculator(self.config)
+
+        self.threshold_sigma = self.config.get('detection.threshold_sigma', 2.5)
+        self.min_confidence = self.config.get('detection.min_confidence', 0.7)
+        metric_columns = {m['name']: m.get('column') for m in self.config.get('baseline.metrics', [])}
+        group_members = {g['name']: list(g.get('metrics', []))
+                         for g in self.config.get('baseline.covariance.groups', []) or [] if 'name' in g}
+        detectors = load_detectors(
+            self.config.get('detection.detectors', []) or [], self.threshold_sigma, metric_columns,
+            group_members
+        )
+        # Group detectors score vectors (detect_vectors); the others score rows of one metric
+        self.group_detectors = {d.metric: d for d in detectors if d.method == 'mahalanobis'}
+        self.detectors = [d for d in detectors if d.method != 'mahalanobis']
+        self._metric_codes = {detector.metric: i for i, detector in enumerate(self.detectors)}
+        # Per-detector firing limits; the trailing entry (code -1) never fires
+        is_percentile = [d.method == 'percentile' for d in self.detectors]
+        self._percentile = np.array(is_percentile + [False])
+        self._thresholds = np.array([d.threshold if d.method == 'z_score' else np.inf
+                                     for d in self.detectors] + [np.inf])
+        self._tail_limits = np.array([1.0 - d.threshold_percentile / 100.0 if p else -np.inf
+                                      for d, p in zip(self.detectors, is_percentile)] + [-np.inf])
+
+        self._baselines: List[Optional[BaselineStats]] = []
+        self._segment_baselines: List[Sequence[BaselineStats]] = []
+        self._packed: Optional[PackedBaselines] = None
+
+        self.state_dir = self.config.get('detection.streaming.state_dir', '~/.cache/baseline/detector_state')
+        self.snapshot_seconds = self.config.get('detection.streaming.snapshot_seconds', 60)
+        self._streaming: Dict[int, StreamingDetector] = {}
+        for code, detector in enumerate(self.detectors):
+            if detector.method in STREAMING_DEFAULTS:
+                options = {k: v for k, v in detector.options.items() if k != 'target'}
+                self._streaming[code] = StreamingDetector(
+                    detector.method,
+                    state_path=str(Path(self.state_dir).expanduser() / detector.name) if self.state_dir else None,
+                    **options
+                )
+        self._last_snapshot = time.monotonic()
+        self._covariances: Dict[str, Tuple[CovarianceBaseline, PackedCovariance]] = {}
+
+        logger.info(f"Detection engine initialized with {len(detectors)} detectors: "
+                    f"{', '.join(d.name for d in detectors)}")
+
+    def refresh_baselines(self, force: bool = False) -> PackedBaselines:
+        """
+        Latest baselines of the watched metrics, packed for scoring
+
+        Repacked only when the baseline cache returns a different baseline
+        (or segment list) than the previous batch saw, or when forced.
+        """
+        baselines = self.calculator.get_latest_baselines([d.metric for d in self.detectors])
+        current = [baselines.get(d.metric) for d in self.detectors]
+        segments = [self.calculator.get_segment_baselines(d.metric) if d.segments else NO_SEGMENTS
+                    for d in self.detectors]
+        if (force or self._packed is None or
+                any(new is not old for new, old in zip(current, self._baselines)) or
+                any(new is not old for new, old in zip(segments, self._segment_baselines))):
+            missing = [d.metric for d, b in zip(self.detectors, current) if b is None]
+            if missing:
+                logger.warning(f"No baseline for {', '.join(missing)}; their observations are not scored")
+            self._baselines = current
+            self._segment_baselines = segments
+            self._packed = pack_baselines(current, segments)
+        return self._packed
+
+    def metric_codes(self, metrics: Union[str, Sequence[str], np.ndarray], size: int) -> np.ndarray:
+        """Detector index of each row (-1 for metrics no detector watches)"""
+        if isinstance(metrics, str):
+            return np.full(size, self._metric_codes.get(metrics, -1), dtype=np.int64)
+        names, inverse = np.unique(np.asarray(metrics), return_inverse=True)
+        lookup = np.array([self._metric_codes.get(str(name), -1) for name in names], dtype=np.int64)
+        return lookup[inverse.ravel()]
+
+    def score(
+        self,
+        metrics: Union[str, Sequence[str], np.ndarray],
+        values: np.ndarray,
+        timestamps: Optional[np.ndarray] = None,
+        segments: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score every observation of a batch
+
+        Args:
+            metrics: Metric name of each row, or one name for the whole batch
+            values: Observed values
+            timestamps: Observation times (datetime64, naive = UTC); pick the
+                        phase of seasonal baselines. None scores against phase 0.
+            segments: segment_key of each row (e.g. "cluster=3"); rows of
+                      segmented detectors use their segment's baseline
+
+        Returns:
+            Dictionary of arrays: codes (detector index, -1 = not watched),
+            entries (packed baseline entry), expected (baseline mean, or
+            median for percentile detectors), z (signed deviation in
+            sigmas, NaN without a baseline) and tail (upper tail
+            probability; rows of percentile detectors only, NaN elsewhere)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        packed = self.refresh_baselines()
+        codes = self.metric_codes(metrics, values.size)
+        timestamps_ns = None
+        if timestamps is not None:
+            timestamps_ns = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)
+        entries = packed.entries(codes, timestamps_ns, segments)
+        expected = packed.center[entries]
+        z = z_scores(values, expected, packed.scale[entries])
+
+        tail = np.full(values.size, np.nan)
+        percentile_rows = np.flatnonzero(self._percentile[codes])
+        if percentile_rows.size:
+            rows = entries[percentile_rows]
+            tail[percentile_rows] = upper_tail_probabilities(
+                packed.quantiles, packed.ranks, rows, values[percentile_rows], packed.count[rows]
+            )
+            expected[percentile_rows] = packed.median[rows]
+
+        return {'codes': codes, 'entries': entries, 'expected': expected, 'z': z, 'tail': tail}
+
+    def detect(
+        self,
+        metrics: Union[str, Sequence[str], np.ndarray],
+        values: np.ndarray,
+        timestamps: Optional[np.ndarray] = None,
+        segments: Optional[np.ndarray] = None,
+        detected_at: Optional[datetime] = None,
+        series: Optional[np.ndarray] = None
+    ) -> List[Anomaly]:
+        """
+        Detect anomalies in a batch of observations
+
+        A row of a z_score detector fires when |z| reaches the detector's
+        threshold; a row of a percentile detector when its upper tail
+        probability is at most 1 - threshold_percentile/100. Either way
+        the detection confidence must reach detection.min_confidence.
+        Rows of ewma/cusum detectors update their series' chart and fire
+        when it signals a drift (see streaming.py).
+
+        Args:
+            metrics: Metric name of each row, or one name for the whole batch
+            values: Observed values
+            timestamps: Observation times (datetime64, naive = UTC)
+            segments: segment_key of each row (see score)
+            detected_at: detected_at of rows without timestamps (default: now)
+            series: int64 series key of each row for ewma/cusum detectors
+                    (e.g. job_id * 10000 + task_index); None = one series per metric
+
+        Returns:
+            List of Anomaly, in batch order
+        """
+        values = np.asarray(values, dtype=np.float64)
+        scores = self.score(metrics, values, timestamps, segments)
+        codes, z, tail = scores['codes'], scores['z'], scores['tail']
+        with np.errstate(invalid='ignore'):
+            fired = (np.abs(z) >= self._thresholds[codes]) | (tail <= self._tail_limits[codes])
+        rows = np.flatnonzero(fired)
+
+        # Percentile rows report their tail in sigmas; z_score rows their one-sided normal tail
+        packed = self._packed
+        entries = scores['entries'][rows]
+        percentile = self._percentile[codes[rows]]
+        abs_z = np.abs(z[rows])
+        tail = np.where(percentile, tail[rows], 0.5 * (1.0 - erf(abs_z / np.sqrt(2.0))))
+        counts = packed.count[entries]
+        found = {
+            'rows': rows,
+            'sigma': np.where(percentile, normal_upper_quantile(tail), abs_z),
+            'tail': tail,
+            'confidence': np.where(percentile, (1.0 - tail) * sample_reliability(counts),
+                                   confidences(abs_z, counts)),
+            'expected': scores['expected'][rows],
+            'percentage': deviation_percentages(values[rows], scores['expected'][rows]),
+            'baseline_ids': packed.baseline_ids[entries],
+            'series': np.full(rows.size, -1, dtype=np.int64)
+        }
+        if self._streaming:
+            streamed = self._detect_streaming(values, scores, timestamps, series)
+            merged = np.argsort(np.concatenate([found['rows'], streamed['rows']]), kind='stable')
+            found = {key: np.concatenate([found[key], streamed[key]])[merged] for key in found}
+            self._maybe_snapshot()
+
+        keep = found['confidence'] >= self.min_confidence
+        found = {key: value[keep] for key, value in found.items()}
+        rows = found['rows']
+        if rows.size == 0:
+            return []
+
+        current = values[rows]
+        severities = severity_codes(found['sigma']).tolist()
+        if timestamps is not None:
+            times = np.asarray(timestamps, dtype='datetime64[us]')[rows].tolist()
+        else:
+            times = [detected_at or datetime.now()] * rows.size
+
+        anomalies = []
+        series_keys = found['series'].tolist()
+        for i, code in enumerate(codes[rows].tolist()):
+            detector = self.detectors[code]
+            severity = SEVERITY_LEVELS[severities[i]]
+            affected = []
+            if series_keys[i] >= 0:
+                affected = [{'resource_type': 'series', 'resource_id': str(series_keys[i]),
+                             'impact_level': IMPACT_LEVELS[severity]}]
+            anomalies.append(Anomaly(
+                anomaly_id=str(uuid.uuid4()),
+                detected_at=times[i],
+                metric_name=detector.metric,
+                metric_type=detector.metric_type,
+                current_value=float(current[i]),
+                baseline_value=float(found['expected'][i]),
+                deviation_sigma=float(found['sigma'][i]),
+                deviation_percentage=float(found['percentage'][i]),
+                anomaly_type=detector.anomaly_type,
+                severity=severity,
+                confidence=float(found['confidence'][i]),
+                affected_resources=affected,
+                detection_method=METHOD_LABELS[detector.method],
+                baseline_id=found['baseline_ids'][i],
+                tail_probability=float(found['tail'][i])
+            ))
+
+        logger.info(f"Detected {len(anomalies)} anomalies in {values.size:,} observations")
+        return anomalies
+
+    def _detect_streaming(
+        self,
+        values: np.ndarray,
+        scores: Dict[str, np.ndarray],
+        timestamps: Optional[np.ndarray],
+        series: Optional[np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Feed the rows of ewma/cusum detectors to their charts
+
+        Returns the alarmed rows with the fields detect() builds anomalies
+        from: deviation_sigma is the estimated mean shift in sigmas, the
+        tail and confidence come from the chart statistic, and the
+        baseline value is the series target.
+        """
+        codes, packed = scores['codes'], self._packed
+        order = None
+        if timestamps is not None:
+            order = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)
+        if series is not None:
+            series = np.asarray(series, dtype=np.int64)
+
+        parts = []
+        for code, streamer in self._streaming.items():
+            rows = np.flatnonzero(codes == code)
+            if rows.size == 0:
+                continue
+            detector = self.detectors[code]
+            keys = series[rows] if series is not None else np.zeros(rows.size, dtype=np.int64)
+            entries = scores['entries'][rows]
+            use_baseline = detector.options.get('target', 'warmup') == 'baseline'
+            result = streamer.update(
+                keys, values[rows],
+                order=None if order is None else order[rows],
+                target_mean=packed.center[entries] if use_baseline else None,
+                target_std=packed.scale[entries] if use_baseline else None
+            )
+            alarm = np.flatnonzero(result['alarm'])
+            if alarm.size == 0:
+                continue
+
+            shift = result['shift'][alarm]
+            evidence = np.abs(result['evidence'][alarm])
+            mean, std = result['target_mean'][alarm], result['target_std'][alarm]
+            if use_baseline:
+                counts = packed.count[entries[alarm]]
+                baseline_ids = packed.baseline_ids[entries[alarm]]
+            else:
+                counts = result['samples'][alarm]
+                baseline_ids = np.full(alarm.size, None, dtype=object)
+            parts.append({
+                'rows': rows[alarm],
+                'sigma': np.abs(shift),
+                'tail': 0.5 * (1.0 - erf(evidence / np.sqrt(2.0))),
+                'confidence': confidences(evidence, counts),
+                'expected': mean,
+                'percentage': deviation_percentages(mean + shift * std, mean),
+                'baseline_ids': baseline_ids,
+                'series': keys[alarm]
+            })
+
+        if not parts:
+            return {
+                'rows': np.zeros(0, dtype=np.int64), 'sigma': np.zeros(0), 'tail': np.zeros(0),
+                'confidence': np.zeros(0), 'expected': np.zeros(0), 'percentage': np.zeros(0),
+                'baseline_ids': np.zeros(0, dtype=object), 'series': np.zeros(0, dtype=np.int64)
+            }
+        return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+    def _maybe_snapshot(self):
+        if self.snapshot_seconds is not None and \
+                time.monotonic() - self._last_snapshot >= self.snapshot_seconds:
+            self.snapshot()
+
+    def snapshot(self):
+        """Persist the state of the ewma/cusum detectors (see SeriesStateStore)"""
+        for streamer in self._streaming.values():
+            streamer.snapshot()
+        self._last_snapshot = time.monotonic()
+
+    def refresh_covariance(self, group: str) -> Optional[PackedCovariance]:
+        """
+        Latest covariance baseline of a metric group, factored for scoring
+
+        Refactored only when the baseline cache returns a different
+        baseline than the previous batch saw.
+        """
+        baseline = self.calculator.get_covariance_baseline(group)
+        if baseline is None:
+            logger.warning(f"No covariance baseline for {group}; its observations are not scored")
+            self._covariances.pop(group, None)
+            return None
+        cached = self._covariances.get(group)
+        if cached is None or cached[0] is not baseline:
+            cached = (baseline, pack_covariance(baseline))
+            self._covariances[group] = cached
+        return cached[1]
+
+    def _group_matrix(
+        self,
+        packed: PackedCovariance,
+        values: Union[np.ndarray, Mapping[str, np.ndarray]]
+    ) -> np.ndarray:
+        """(N, k) float matrix of observation vectors in the group's metric order"""
+        if isinstance(values, Mapping):
+            return np.column_stack([np.asarray(values[name], dtype=np.float64) for name in packed.metric_names])
+        matrix = np.asarray(values, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != packed.size:
+            raise ValueError(f"Expected (N, {packed.size}) observations of {', '.join(packed.metric_names)}, "
+                             f"got shape {matrix.shape}")
+        return matrix
+
+    def score_vectors(
+        self,
+        group: str,
+        values: Union[np.ndarray, Mapping[str, np.ndarray]]
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Score observation vectors of a metric group
+
+        Args:
+            group: Group of a mahalanobis detector (baseline.covariance.groups)
+            values: (N, k) array in the group's metric order, or metric name -> values
+
+        Returns:
+            Dictionary of arrays: values (N, k), centered, whitened,
+            distance (Mahalanobis distance), tail (chi-square upper tail
+            probability) and sigma (two-sided normal equivalent of the
+            tail); rows with a missing metric score NaN. None if the group
+            has no covariance baseline yet.
+        """
+        packed = self.refresh_covariance(group)
+        if packed is None:
+            return None
+        matrix = self._group_matrix(packed, values)
+        centered, whitened = whiten(matrix, packed)
+        squared = np.einsum('ij,ij->i', whitened, whitened)
+        tail = chi2_upper_tail(squared, packed.size)
+        return {
+            'values': matrix,
+            'centered': centered,
+            'whitened': whitened,
+            'distance': np.sqrt(squared),
+            'tail': tail,
+            'sigma': normal_upper_quantile(0.5 * tail)
+        }
+
+    def detect_vectors(
+        self,
+        group: str,
+        values: Union[np.ndarray, Mapping[str, np.ndarray]],
+        timestamps: Optional[np.ndarray] = None,
+        detected_at: Optional[datetime] = None
+    ) -> List[Anomaly]:
+        """
+        Detect joint anomalies of a metric group
+
+        A row fires when its Mahalanobis distance, in equivalent sigmas,
+        reaches the detector's threshold and its confidence ((1 - tail) x
+        (1 - 1/sqrt(n)), n = covariance sample count) reaches
+        detection.min_confidence. The anomaly is reported on the metric
+        with the largest share of the distance, with the other metrics'
+        values in related_metrics and every share in historical_context.
+
+        Args:
+            group: Group of a mahalanobis detector
+            values: (N, k) array in the group's metric order, or metric name -> values
+            timestamps: Observation times (datetime64, naive = UTC)
+            detected_at: detected_at of rows without timestamps (default: now)
+
+        Returns:
+            List of Anomaly, in batch order
+        """
+        detector = self.group_detectors.get(group)
+        if detector is None:
+            raise ValueError(f"No mahalanobis detector configured for group {group}")
+        scores = self.score_vectors(group, values)
+        if scores is None:
+            return []
+
+        packed = self._covariances[group][1]
+        tail, sigma = scores['tail'], scores['sigma']
+        confidence = (1.0 - tail) * sample_reliability(np.array(packed.sample_count))
+        with np.errstate(invalid='ignore'):
+            rows = np.flatnonzero((sigma >= detector.threshold) & (confidence >= self.min_confidence))
+        if rows.size == 0:
+            return []
+
+        matrix = scores['values'][rows]
+        shares = contributions(scores['centered'][rows], scores['whitened'][rows], packed)
+        shares = shares / np.sum(shares, axis=1, keepdims=True)
+        dominant = np.argmax(shares, axis=1)
+        current = matrix[np.arange(rows.size), dominant]
+        expected = packed.mean[dominant]
+        percentages = deviation_percentages(current, expected)
+        severities = severity_codes(sigma[rows]).tolist()
+        if timestamps is not None:
+            times = np.asarray(timestamps, dtype='datetime64[us]')[rows].tolist()
+        else:
+            times = [detected_at or datetime.now()] * rows.size
+
+        names = packed.metric_names
+        anomalies = []
+        for i, row in enumerate(rows.tolist()):
+            top = int(dominant[i])
+            anomaly_type = detector.anomaly_type
+            if anomaly_type == AnomalyType.UNKNOWN:
+                anomaly_type = classify_metric(names[top])
+            anomalies.append(Anomaly(
+                anomaly_id=str(uuid.uuid4()),
+                detected_at=times[i],
+                metric_name=names[top],
+                metric_type=packed.metric_columns[top],
+                current_value=float(current[i]),
+                baseline_value=float(expected[i]),
+                deviation_sigma=float(sigma[row]),
+                deviation_percentage=float(percentages[i]),
+                anomaly_type=anomaly_type,
+                severity=SEVERITY_LEVELS[severities[i]],
+                confidence=float(confidence[row]),
+                related_metrics={name: float(matrix[i, j]) for j, name in enumerate(names) if j != top},
+                detection_method=METHOD_LABELS[detector.method],
+                historical_context={
+                    'metric_group': group,
+                    'mahalanobis_distance': float(scores['distance'][row]),
+                    'contributions': {name: float(shares[i, j]) for j, name in enumerate(names)}
+                },
+                baseline_id=packed.baseline_id,
+                tail_probability=float(tail[row])
+            ))
+
+        logger.info(f"Detected {len(anomalies)} joint anomalies of {group} in {tail.size:,} observations")
+        return anomalies
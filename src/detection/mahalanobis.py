@@ -0,0 +1,137 @@
+"""
+Mahalanobis Scoring
+
+Scores observation vectors of a correlated metric group (e.g. CPU,
+memory, error rate and execution time of one task) against the group's
+covariance baseline: one distance per row instead of one check per
+metric, so joint shifts are caught and correlated metrics do not each
+raise their own anomaly.
+
+- The covariance is factored once per baseline (Cholesky, L L^T = S) and
+  its inverse factor W = L^-1 kept, so a batch is whitened with one
+  (N x k) @ (k x k) product: w = W (x - mean) has identity covariance and
+  the squared distance is |w|^2
+- Under the baseline (approximately normal data) the squared distance is
+  chi-square with k degrees of freedom; its upper tail probability is
+  evaluated in closed form for integer k and reported in sigmas as the
+  two-sided normal deviation with the same tail (k = 1 gives |z|)
+- Each metric's share of the squared distance, (x - mean)_i (S^-1 (x - mean))_i,
+  names the metric driving a detection (shares sum to 1 but can be
+  negative for metrics that moved against their correlation)
+- Singular covariances (constant or collinear metrics) get a small ridge
+  on the diagonal before factoring
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..models.baseline import CovarianceBaseline
+from .zscore import erfc
+
+# Relative ridges tried on the covariance diagonal until Cholesky succeeds
+RIDGES = (0.0, 1e-9, 1e-6, 1e-3)
+
+
+@dataclass
+class PackedCovariance:
+    """
+    A covariance baseline prepared for scoring
+
+    whitening is the inverse Cholesky factor of the covariance matrix
+    (lower triangular, k x k).
+    """
+    metric_names: List[str]
+    metric_columns: List[str]
+    mean: np.ndarray
+    whitening: np.ndarray
+    sample_count: int
+    baseline_id: Optional[str]
+
+    @property
+    def size(self) -> int:
+        """Number of metrics"""
+        return len(self.metric_names)
+
+
+def cholesky_factor(covariance: np.ndarray) -> np.ndarray:
+    """
+    Lower Cholesky factor of a covariance matrix
+
+    Adds the first of RIDGES (relative to the diagonal) that makes the
+    matrix positive definite.
+
+    Raises:
+        ValueError: If no ridge helps (e.g. NaN entries)
+    """
+    scale = np.diag(covariance).copy()
+    scale[~(scale > 0)] = 1.0
+    for ridge in RIDGES:
+        try:
+            return np.linalg.cholesky(covariance + np.diag(ridge * scale))
+        except np.linalg.LinAlgError:
+            continue
+    raise ValueError("Covariance matrix is not positive definite")
+
+
+def pack_covariance(baseline: CovarianceBaseline) -> PackedCovariance:
+    """Factor a covariance baseline for scoring"""
+    factor = cholesky_factor(baseline.covariance_matrix())
+    return PackedCovariance(
+        metric_names=list(baseline.metric_names),
+        metric_columns=list(baseline.metric_columns),
+        mean=np.asarray(baseline.means, dtype=np.float64),
+        whitening=np.linalg.solve(factor, np.eye(factor.shape[0])),
+        sample_count=baseline.sample_count,
+        baseline_id=baseline.baseline_id
+    )
+
+
+def whiten(values: np.ndarray, packed: PackedCovariance) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Center and whiten observation vectors
+
+    Args:
+        values: (N, k) observations in packed.metric_names order
+        packed: Packed covariance baseline
+
+    Returns:
+        (centered, whitened), both (N, k); squared distances are the row
+        sums of whitened ** 2
+    """
+    centered = values - packed.mean
+    return centered, centered @ packed.whitening.T
+
+
+def chi2_upper_tail(squared: np.ndarray, dof: int) -> np.ndarray:
+    """
+    P(X > squared) for X chi-square with integer dof degrees of freedom
+
+    Even dof: exp(-x/2) sum_{j < dof/2} (x/2)^j / j!. Odd dof: erfc(sqrt(x/2))
+    + sqrt(2x/pi) exp(-x/2) sum_{j=1}^{(dof-1)/2} x^(j-1) / (1 * 3 * ... * (2j-1)).
+    """
+    x = np.maximum(np.asarray(squared, dtype=np.float64), 0.0)
+    half = 0.5 * x
+    if dof % 2 == 0:
+        term = np.ones_like(x)
+        total = np.ones_like(x)
+        for j in range(1, dof // 2):
+            term = term * half / j
+            total = total + term
+        return np.minimum(np.exp(-half) * total, 1.0)
+
+    tail = erfc(np.sqrt(half))
+    if dof > 1:
+        term = np.sqrt(2.0 * x / np.pi)
+        total = term.copy()
+        for j in range(2, (dof + 1) // 2):
+            term = term * x / (2 * j - 1)
+            total = total + term
+        tail = tail + np.exp(-half) * total
+    return np.minimum(tail, 1.0)
+
+
+def contributions(centered: np.ndarray, whitened: np.ndarray, packed: PackedCovariance) -> np.ndarray:
+    """Each metric's term of the squared distance, (x - mean)_i (S^-1 (x - mean))_i"""
+    return centered * (whitened @ packed.whitening)
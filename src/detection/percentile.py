@@ -0,0 +1,173 @@
+"""
+Percentile Scoring
+
+Empirical tail probabilities of observations against stored quantile
+tables, for skewed metrics (latencies, execution times) where a sigma
+distance from the mean misjudges how unusual a value is.
+
+- Every baseline entry (metric, phase of an hour_of_week profile, or
+  segment) is resampled onto one shared rank grid, giving a 2-D table
+  (entries x ranks) of ascending quantile values
+- Knots come from the baseline's KLL sketch when stored (any rank), else
+  from min, the configured percentiles and max; values between knots are
+  interpolated linearly, so the resampling adds no information
+- Each row is located in its entry's quantile row with a row-wise
+  searchsorted (a vectorized binary search over the table, one gather per
+  step), and the CDF is interpolated between the two bracketing knots
+- Upper tail probabilities are floored at 1/(n+1) up to the largest of
+  n observations (rare, not impossible); beyond it the tail decays
+  exponentially with the distance past the maximum, in units of the
+  p99-max spread, so a value far above anything seen scores far higher
+  than one just above the maximum
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from ..baseline.sketch import KLLSketch
+from ..models.baseline import BaselineStats
+
+# Ranks (percent) every quantile table has, on top of the configured percentiles
+BASE_RANK_GRID = np.arange(0.0, 101.0, 1.0)
+
+# Rank whose distance to the maximum scales the tail beyond the maximum
+TAIL_SPREAD_RANK = 99.0
+
+
+def rank_grid(baselines: Iterable[BaselineStats]) -> np.ndarray:
+    """Shared rank grid (0-100): whole percents plus every stored percentile rank"""
+    ranks = set(BASE_RANK_GRID.tolist())
+    for baseline in baselines:
+        ranks.update(float(rank) for rank in baseline.percentiles)
+        ranks.update(float(rank) for rank in baseline.phase_percentiles)
+    return np.array(sorted(ranks))
+
+
+def _resample(knot_ranks: List[float], knot_values: List[float], grid: np.ndarray) -> np.ndarray:
+    """Piecewise-linear quantile function through the knots, evaluated on the grid"""
+    ranks = np.asarray(knot_ranks, dtype=np.float64)
+    values = np.asarray(knot_values, dtype=np.float64)
+    known = ~np.isnan(values)
+    if not known.any():
+        return np.full(grid.shape, np.nan)
+    order = np.argsort(ranks[known], kind='stable')
+    resampled = np.interp(grid, ranks[known][order], values[known][order])
+    # Approximate percentiles can cross; quantile rows must not decrease
+    return np.maximum.accumulate(resampled)
+
+
+def quantile_rows(baseline: BaselineStats, grid: np.ndarray) -> np.ndarray:
+    """
+    Quantile table rows of a baseline
+
+    Args:
+        baseline: Baseline to tabulate
+        grid: Rank grid (0-100) from rank_grid
+
+    Returns:
+        (phases, len(grid)) array for baselines with phase_percentiles,
+        otherwise (1, len(grid))
+    """
+    if baseline.phase_percentiles and baseline.phase_means:
+        ranks = sorted(baseline.phase_percentiles)
+        table = np.array([baseline.phase_percentiles[rank] for rank in ranks], dtype=np.float64).T
+        knot_ranks = [0.0] + ranks + [100.0]
+        return np.vstack([
+            _resample(knot_ranks, [baseline.min_value] + row.tolist() + [baseline.max_value], grid)
+            for row in table
+        ])
+
+    if baseline.quantile_sketch:
+        sketch = KLLSketch.from_bytes(baseline.quantile_sketch)
+        return np.maximum.accumulate(sketch.quantiles(grid / 100.0))[np.newaxis, :]
+
+    knots: Dict[float, float] = {50.0: baseline.p50, 95.0: baseline.p95, 99.0: baseline.p99}
+    knots.update({float(rank): value for rank, value in baseline.percentiles.items()})
+    knots.update({0.0: baseline.min_value, 100.0: baseline.max_value})
+    return _resample(list(knots), list(knots.values()), grid)[np.newaxis, :]
+
+
+def row_searchsorted(table: np.ndarray, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    np.searchsorted(table[r], x, side='right') for every (r, x) pair
+
+    Binary search over all pairs at once: log2(columns) steps, each one
+    gather and compare per pair.
+    """
+    low = np.zeros(values.shape, dtype=np.int64)
+    high = np.full(values.shape, table.shape[1], dtype=np.int64)
+    flat = table.ravel()
+    base = rows.astype(np.int64) * table.shape[1]
+    for _ in range(int(np.ceil(np.log2(table.shape[1] + 1)))):
+        mid = (low + high) >> 1
+        active = low < high
+        go_right = active & (flat[base + np.minimum(mid, table.shape[1] - 1)] <= values)
+        low = np.where(go_right, mid + 1, low)
+        high = np.where(active & ~go_right, mid, high)
+    return low
+
+
+def upper_tail_probabilities(
+    table: np.ndarray,
+    grid: np.ndarray,
+    rows: np.ndarray,
+    values: np.ndarray,
+    sample_counts: np.ndarray
+) -> np.ndarray:
+    """
+    Empirical P(X > x) of each value under its quantile row
+
+    Args:
+        table: (entries, len(grid)) ascending quantile values
+        grid: Rank grid (0-100)
+        rows: Table row of each value
+        values: Observed values
+        sample_counts: Number of values behind each row's baseline
+
+    Returns:
+        Tail probabilities in [1/(n+1), 1] up to the row maximum, below
+        1/(n+1) past it (1/(n+1) * exp(-(x - max) / (max - p99)));
+        NaN for NaN values or rows
+    """
+    columns = table.shape[1]
+    position = row_searchsorted(table, rows, values)
+    lower = np.clip(position - 1, 0, columns - 1)
+    upper = np.clip(position, 0, columns - 1)
+    base = rows.astype(np.int64) * columns
+    flat = table.ravel()
+    v0, v1 = flat[base + lower], flat[base + upper]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.clip((values - v0) / (v1 - v0), 0.0, 1.0)
+    cdf = (grid[lower] + (grid[upper] - grid[lower]) * np.where(v1 > v0, fraction, 0.0)) / 100.0
+    cdf = np.where(position == 0, 0.0, np.where(position == columns, 1.0, cdf))
+
+    floor = 1.0 / (np.maximum(sample_counts, 1) + 1.0)
+    tail = np.maximum(1.0 - cdf, floor)
+
+    # Past the maximum: exponential decay over the p99-max spread (the
+    # full range when those coincide; a constant row gives 0)
+    top = flat[base + columns - 1]
+    beyond = values > top
+    if beyond.any():
+        spread_column = min(int(np.searchsorted(grid, TAIL_SPREAD_RANK)), columns - 1)
+        spread = top - flat[base + spread_column]
+        spread = np.where(spread > 0, spread, top - flat[base])
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            decay = np.exp(-(values - top) / spread)
+        tail = np.where(beyond, floor * np.nan_to_num(decay, nan=0.0), tail)
+    return np.where(np.isnan(values) | np.isnan(flat[base]), np.nan, tail)
+
+
+def normal_upper_quantile(tail: np.ndarray) -> np.ndarray:
+    """
+    Sigma of a standard normal with the given upper tail probability
+
+    Rational approximation of Abramowitz & Stegun 26.2.23 (absolute error
+    below 4.5e-4); used to report percentile detections in sigmas.
+    """
+    tail = np.clip(np.asarray(tail, dtype=np.float64), 1e-300, 1.0 - 1e-16)
+    p = np.minimum(tail, 1.0 - tail)
+    t = np.sqrt(-2.0 * np.log(p))
+    z = t - (2.515517 + 0.802853 * t + 0.010328 * t * t) / (1.0 + 1.432788 * t + 0.189269 * t * t + 0.001308 * t ** 3)
+    return np.where(tail <= 0.5, z, -z)
@@ -0,0 +1,181 @@
+"""
+Series State Store
+
+Per-series detector state for millions of series, kept in preallocated
+NumPy columns indexed by slot, so a batch of observations is read and
+written with one gather/scatter per column.
+
+- Series are identified by int64 keys (e.g. job_id * 10000 + task_index);
+  each key gets a slot on first sight. A sorted key index resolves a
+  batch of keys with one searchsorted; it is rebuilt from the key column
+  when the store is opened
+- With a directory, every column is a memory-mapped .npy file
+  (`<dir>/<column>.npy`) and meta.json records the number of slots in
+  use, so a restarted detector reopens its state instantly instead of
+  replaying history. snapshot() flushes the columns and rewrites
+  meta.json atomically; slots added after the last snapshot are dropped
+  on reopen, while updates to existing slots may already be on disk
+- Columns double in capacity when full (memory-mapped files are copied
+  to a larger file once)
+- meta.json also stores the detector parameters; a store opened with
+  different parameters starts over, as its state would not match them
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+
+
+class SeriesStateStore:
+    """
+    Fixed-schema state columns with one slot per series key
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, Any],
+        path: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        initial_capacity: int = 1024
+    ):
+        """
+        Open (or create) a store
+
+        Args:
+            columns: Column name -> dtype (a 'key' int64 column is added)
+            path: Directory of the memory-mapped columns (None keeps state in memory)
+            params: Detector parameters the state belongs to
+            initial_capacity: Slots allocated up front for a new store
+        """
+        self.dtypes = {'key': np.dtype(np.int64)}
+        self.dtypes.update({name: np.dtype(dtype) for name, dtype in columns.items()})
+        self.path = Path(path).expanduser() if path else None
+        self.params = params or {}
+        self.size = 0
+        self.columns: Dict[str, np.ndarray] = {}
+
+        capacity = max(initial_capacity, 1)
+        meta = self._read_meta()
+        if meta is not None and meta.get('params') == self.params and \
+                set(meta.get('columns', [])) == set(self.dtypes):
+            self.size = meta['size']
+            for name in self.dtypes:
+                self.columns[name] = np.lib.format.open_memmap(self._column_path(name), mode='r+')
+            logger.info(f"Opened detector state {self.path} ({self.size:,} series)")
+        else:
+            if meta is not None:
+                logger.warning(f"Detector state {self.path} has different parameters, starting over")
+                (self.path / META_FILE).unlink()
+            for name, dtype in self.dtypes.items():
+                self.columns[name] = self._allocate(name, dtype, capacity)
+        self._rebuild_index()
+
+    def _column_path(self, name: str) -> Path:
+        return self.path / f"{name}.npy"
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        if self.path is None or not (self.path / META_FILE).exists():
+            return None
+        try:
+            with open(self.path / META_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable detector state {self.path}: {e}")
+            return None
+
+    def _allocate(self, name: str, dtype: np.dtype, capacity: int, suffix: str = "") -> np.ndarray:
+        """Zero-filled column (a new memory-mapped file with a directory)"""
+        if self.path is None:
+            return np.zeros(capacity, dtype=dtype)
+        self.path.mkdir(parents=True, exist_ok=True)
+        column_path = self._column_path(name).with_suffix(f".npy{suffix}")
+        return np.lib.format.open_memmap(column_path, mode='w+', dtype=dtype, shape=(capacity,))
+
+    @property
+    def capacity(self) -> int:
+        """Slots allocated"""
+        return int(self.columns['key'].shape[0])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _rebuild_index(self):
+        keys = self.columns['key'][:self.size]
+        order = np.argsort(keys, kind='stable')
+        self._index_keys = np.asarray(keys[order])
+        self._index_slots = order.astype(np.int64)
+
+    def _grow(self, min_capacity: int):
+        """Reallocate every column with at least min_capacity slots"""
+        capacity = max(min_capacity, 2 * self.capacity)
+        for name, dtype in self.dtypes.items():
+            old = self.columns[name]
+            new = self._allocate(name, dtype, capacity, suffix=".tmp" if self.path else "")
+            new[:self.size] = old[:self.size]
+            if self.path is not None:
+                new.flush()
+                del old
+                self.columns[name] = None
+                Path(new.filename).replace(self._column_path(name))
+                new = np.lib.format.open_memmap(self._column_path(name), mode='r+')
+            self.columns[name] = new
+
+    def slots(self, keys: np.ndarray, create: bool = True) -> np.ndarray:
+        """
+        Slot of each series key
+
+        Args:
+            keys: int64 series keys (repeats allowed)
+            create: Assign slots to unseen keys (otherwise they map to -1)
+
+        Returns:
+            int64 array of slots
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        if self._index_keys.size:
+            position = np.minimum(np.searchsorted(self._index_keys, keys), self._index_keys.size - 1)
+            found = self._index_keys[position] == keys
+            slots = np.where(found, self._index_slots[position], -1)
+        else:
+            found = np.zeros(keys.shape, dtype=bool)
+            slots = np.full(keys.shape, -1, dtype=np.int64)
+        if not create or found.all():
+            return slots
+
+        new_keys = np.unique(keys[~found])
+        first = self.size
+        if first + new_keys.size > self.capacity:
+            self._grow(first + new_keys.size)
+        new_slots = np.arange(first, first + new_keys.size, dtype=np.int64)
+        # Slots past the last snapshot may hold state written before a restart
+        for column in self.columns.values():
+            column[first:first + new_keys.size] = 0
+        self.columns['key'][new_slots] = new_keys
+        self.size += new_keys.size
+
+        # Merge the new keys into the sorted index
+        insert_at = np.searchsorted(self._index_keys, new_keys)
+        self._index_keys = np.insert(self._index_keys, insert_at, new_keys)
+        self._index_slots = np.insert(self._index_slots, insert_at, new_slots)
+        missing = ~found
+        slots[missing] = new_slots[np.searchsorted(new_keys, keys[missing])]
+        return slots
+
+    def snapshot(self):
+        """Flush the columns and record the slots in use (no-op in memory)"""
+        if self.path is None:
+            return
+        for column in self.columns.values():
+            column.flush()
+        meta = {'size': self.size, 'columns': sorted(self.dtypes), 'params': self.params}
+        tmp_path = self.path / f"{META_FILE}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        tmp_path.replace(self.path / META_FILE)
@@ -0,0 +1,237 @@
+"""
+Streaming Drift Detectors
+
+EWMA control charts and two-sided CUSUM for slow drifts that a static
+mean/std threshold never sees, with one state slot per series in a
+SeriesStateStore.
+
+- Observations are standardized against the series target: the metric's
+  baseline (mean/std of the row's phase or segment, target: baseline) or
+  the series' own first `warmup` observations (Welford, target: warmup)
+- EWMA: e = lambda * u + (1 - lambda) * e on the standardized residual u;
+  alarms when |e| exceeds `limit` times its exact standard deviation
+  sqrt(lambda / (2 - lambda) * (1 - (1 - lambda)^(2t))) after t updates.
+  An alarm fires once when a series leaves control, not on every point
+- CUSUM (Page): S+ = max(0, S+ + u - k), S- = max(0, S- - u - k); alarms
+  when either sum exceeds h and resets both. The shift estimate is
+  k + S / run length (Montgomery), in sigmas
+- Every update is O(1) per observation. A batch is sorted by series (and
+  time) and applied in rounds: round r updates the r-th observation of
+  every series at once, so observations of one series stay in order and
+  each round is a single vectorized gather/update/scatter
+- Series with zero spread are not charted (u = 0)
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from .state_store import SeriesStateStore
+
+# Streaming methods and their default parameters
+STREAMING_DEFAULTS = {
+    'ewma': {'lambda': 0.2, 'limit': 3.0},
+    'cusum': {'k': 0.5, 'h': 5.0}
+}
+
+# State columns: series target (Welford over the warm-up), chart updates, chart state
+BASE_COLUMNS = {'count': np.int64, 'mean': np.float64, 'm2': np.float64, 'steps': np.int64}
+METHOD_COLUMNS = {
+    'ewma': {'ewma': np.float64, 'alarm': np.uint8},
+    'cusum': {'pos': np.float64, 'neg': np.float64, 'run_pos': np.int64, 'run_neg': np.int64}
+}
+
+
+class StreamingDetector:
+    """
+    EWMA or CUSUM chart over many series
+    """
+
+    def __init__(
+        self,
+        method: str,
+        warmup: int = 30,
+        state_path: Optional[str] = None,
+        initial_capacity: int = 1024,
+        **params
+    ):
+        """
+        Initialize detector (reopening its state when state_path exists)
+
+        Args:
+            method: "ewma" or "cusum"
+            warmup: Observations that fix a series' own target (target: warmup)
+            state_path: Directory of the memory-mapped state (None = in memory)
+            initial_capacity: Series slots allocated up front
+            **params: lambda/limit (ewma) or k/h (cusum), see STREAMING_DEFAULTS
+        """
+        if method not in STREAMING_DEFAULTS:
+            raise ValueError(f"Unknown streaming method '{method}'")
+        self.method = method
+        self.warmup = max(int(warmup), 2)
+        self.params = {**STREAMING_DEFAULTS[method],
+                       **{k: float(v) for k, v in params.items() if k in STREAMING_DEFAULTS[method]}}
+        columns = {**BASE_COLUMNS, **METHOD_COLUMNS[method]}
+        self.store = SeriesStateStore(
+            columns, state_path, params={'method': method, 'warmup': self.warmup, **self.params},
+            initial_capacity=initial_capacity
+        )
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def snapshot(self):
+        """Persist the state (see SeriesStateStore.snapshot)"""
+        self.store.snapshot()
+
+    def update(
+        self,
+        series: np.ndarray,
+        values: np.ndarray,
+        order: Optional[np.ndarray] = None,
+        target_mean: Optional[np.ndarray] = None,
+        target_std: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Feed a batch of observations
+
+        Args:
+            series: int64 series key of each observation
+            values: Observed values (NaN rows are skipped)
+            order: Sort key within a series, e.g. int64 timestamps (None = batch order)
+            target_mean: Per-row in-control mean (None = learn from the warm-up)
+            target_std: Per-row in-control standard deviation (with target_mean)
+
+        Returns:
+            Dictionary of per-row arrays: alarm (bool), shift (estimated
+            mean shift in sigmas, signed), evidence (standardized chart
+            statistic), target_mean, target_std, samples (observations
+            behind the series target; 0 while warming up)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        size = values.size
+        result = {
+            'alarm': np.zeros(size, dtype=bool),
+            'shift': np.full(size, np.nan),
+            'evidence': np.full(size, np.nan),
+            'target_mean': np.full(size, np.nan),
+            'target_std': np.full(size, np.nan),
+            'samples': np.zeros(size, dtype=np.int64)
+        }
+        valid = np.flatnonzero(~np.isnan(values))
+        if target_mean is not None:
+            valid = valid[~np.isnan(target_mean[valid]) & ~np.isnan(target_std[valid])]
+        if valid.size == 0:
+            return result
+
+        slots = self.store.slots(np.asarray(series, dtype=np.int64)[valid])
+        # Sort by slot (then time) and number each observation within its series
+        keys = (slots,) if order is None else (np.asarray(order)[valid], slots)
+        ordered = np.lexsort(keys)
+        sorted_slots = slots[ordered]
+        starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+        lengths = np.diff(np.r_[starts, sorted_slots.size])
+        rank = np.arange(sorted_slots.size) - np.repeat(starts, lengths)
+
+        by_round = np.argsort(rank, kind='stable')
+        round_sizes = np.bincount(rank)
+        position = 0
+        for round_size in round_sizes.tolist():
+            batch = ordered[by_round[position:position + round_size]]
+            position += round_size
+            rows = valid[batch]
+            self._update_round(
+                slots[batch], values[rows], rows, result,
+                None if target_mean is None else target_mean[rows],
+                None if target_std is None else target_std[rows]
+            )
+        return result
+
+    def _update_round(
+        self,
+        slots: np.ndarray,
+        x: np.ndarray,
+        rows: np.ndarray,
+        result: Dict[str, np.ndarray],
+        target_mean: Optional[np.ndarray],
+        target_std: Optional[np.ndarray]
+    ):
+        """Apply one observation to each of a set of distinct series"""
+        columns = self.store.columns
+        count = columns['count'][slots]
+
+        if target_mean is None:
+            # Welford update while warming up; the target freezes afterwards
+            warming = count < self.warmup
+            if warming.any():
+                w_slots, w_x = slots[warming], x[warming]
+                n = count[warming] + 1
+                mean = columns['mean'][w_slots]
+                delta = w_x - mean
+                mean = mean + delta / n
+                columns['m2'][w_slots] += delta * (w_x - mean)
+                columns['mean'][w_slots] = mean
+                columns['count'][w_slots] = n
+            active = ~warming
+            slots, x, rows = slots[active], x[active], rows[active]
+            if slots.size == 0:
+                return
+            mu = columns['mean'][slots]
+            sigma = np.sqrt(columns['m2'][slots] / (self.warmup - 1))
+            samples = np.full(slots.size, self.warmup, dtype=np.int64)
+        else:
+            mu, sigma = target_mean, target_std
+            columns['count'][slots] = count + 1
+            samples = np.zeros(slots.size, dtype=np.int64)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            u = np.where(sigma > 0, (x - mu) / sigma, 0.0)
+        steps = columns['steps'][slots] + 1
+        columns['steps'][slots] = steps
+
+        if self.method == 'ewma':
+            alarm, shift, evidence = self._ewma(slots, u, steps)
+        else:
+            alarm, shift, evidence = self._cusum(slots, u)
+
+        result['alarm'][rows] = alarm
+        result['shift'][rows] = shift
+        result['evidence'][rows] = evidence
+        result['target_mean'][rows] = mu
+        result['target_std'][rows] = sigma
+        result['samples'][rows] = samples
+
+    def _ewma(self, slots: np.ndarray, u: np.ndarray, steps: np.ndarray):
+        columns = self.store.columns
+        lam, limit = self.params['lambda'], self.params['limit']
+        ewma = lam * u + (1.0 - lam) * columns['ewma'][slots]
+        columns['ewma'][slots] = ewma
+        spread = np.sqrt(lam / (2.0 - lam) * (1.0 - (1.0 - lam) ** (2.0 * steps)))
+        evidence = ewma / spread
+        out = np.abs(evidence) > limit
+        alarm = out & (columns['alarm'][slots] == 0)
+        columns['alarm'][slots] = out
+        return alarm, ewma, evidence
+
+    def _cusum(self, slots: np.ndarray, u: np.ndarray):
+        columns = self.store.columns
+        k, h = self.params['k'], self.params['h']
+        pos = np.maximum(0.0, columns['pos'][slots] + u - k)
+        neg = np.maximum(0.0, columns['neg'][slots] - u - k)
+        run_pos = np.where(pos > 0, columns['run_pos'][slots] + 1, 0)
+        run_neg = np.where(neg > 0, columns['run_neg'][slots] + 1, 0)
+
+        upper = pos >= neg
+        total = np.where(upper, pos, neg)
+        run = np.maximum(np.where(upper, run_pos, run_neg), 1)
+        sign = np.where(upper, 1.0, -1.0)
+        shift = sign * (k + total / run)
+        # Standardized sum of the run's residuals: (S + k * N) / sqrt(N)
+        evidence = sign * (total + k * run) / np.sqrt(run)
+        alarm = (pos > h) | (neg > h)
+
+        columns['pos'][slots] = np.where(alarm, 0.0, pos)
+        columns['neg'][slots] = np.where(alarm, 0.0, neg)
+        columns['run_pos'][slots] = np.where(alarm, 0, run_pos)
+        columns['run_neg'][slots] = np.where(alarm, 0, run_neg)
+        return alarm, shift, evidence
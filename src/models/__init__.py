@@ -0,0 +1,22 @@
+"""
+Data models
+"""
+
+from .baseline import (
+    BaselineStats, BaselineBatch, PartialAggregate, SmoothingState, CovarianceBaseline, RegimeShift,
+    make_segment_key, make_segment_keys, baseline_arrow_schema,
+    BASELINE_TABLE_SCHEMA, BASELINE_TIMESTAMP_COLUMNS, BASELINE_PARTIALS_TABLE_SCHEMA,
+    BASELINE_SMOOTHING_STATE_TABLE_SCHEMA, BASELINE_COVARIANCE_TABLE_SCHEMA
+)
+from .anomaly import (
+    Anomaly, AnomalyType, Severity, RootCause, Recommendation, AnomalyAnalysis, HumanReadableSummary
+)
+
+__all__ = [
+    'BaselineStats', 'BaselineBatch', 'PartialAggregate', 'SmoothingState', 'CovarianceBaseline', 'RegimeShift',
+    'make_segment_key', 'make_segment_keys', 'baseline_arrow_schema',
+    'BASELINE_TABLE_SCHEMA', 'BASELINE_TIMESTAMP_COLUMNS', 'BASELINE_PARTIALS_TABLE_SCHEMA',
+    'BASELINE_SMOOTHING_STATE_TABLE_SCHEMA', 'BASELINE_COVARIANCE_TABLE_SCHEMA',
+    'Anomaly', 'AnomalyType', 'Severity', 'RootCause', 'Recommendation', 'AnomalyAnalysis',
+    'HumanReadableSummary'
+]
@@ -0,0 +1,216 @@
+"""
+Anomaly data models
+
+Defines the Anomaly record emitted by detectors (the contract described in
+docs/ANOMALY_DETECTOR_INTERFACE.md) and the analysis records produced from
+it by AnomalyAnalyzerAgent.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any, List, Optional
+
+
+class AnomalyType(Enum):
+    """What kind of problem an anomaly points to (drives the recommendations)"""
+    STABILITY = "STABILITY"
+    PERFORMANCE = "PERFORMANCE"
+    COST = "COST"
+    RESOURCE = "RESOURCE"
+    UNKNOWN = "UNKNOWN"
+
+
+class Severity(Enum):
+    """Anomaly severity, most severe first"""
+    CRITICAL = "CRITICAL"
+    HIGH = "HIGH"
+    MEDIUM = "MEDIUM"
+    LOW = "LOW"
+    INFO = "INFO"
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+@dataclass
+class Anomaly:
+    """
+    A detected anomaly of one metric observation
+
+    deviation_sigma is the absolute distance from the baseline in standard
+    deviations; deviation_percentage is signed ((current - baseline) /
+    baseline * 100). tail_probability is the probability of a value at
+    least this extreme under the baseline. time_window holds
+    start/end/duration_seconds and historical_context
+    previous_anomalies/trend/seasonality when known (metric_group,
+    mahalanobis_distance and per-metric contributions for joint detections).
+    """
+    anomaly_id: str
+    detected_at: datetime
+    metric_name: str
+    metric_type: str
+    current_value: float
+    baseline_value: float
+    deviation_sigma: float
+    deviation_percentage: float
+    anomaly_type: AnomalyType
+    severity: Severity
+    confidence: float
+    affected_resources: List[Dict[str, str]] = field(default_factory=list)
+    related_metrics: Dict[str, float] = field(default_factory=dict)
+    time_window: Optional[Dict[str, Any]] = None
+    detection_method: Optional[str] = None
+    historical_context: Optional[Dict[str, Any]] = None
+    baseline_id: Optional[str] = None
+    tail_probability: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary (the detector interface payload)"""
+        time_window = None
+        if self.time_window is not None:
+            time_window = {key: _isoformat(value) for key, value in self.time_window.items()}
+        return {
+            'anomaly_id': self.anomaly_id,
+            'detected_at': _isoformat(self.detected_at),
+            'metric_name': self.metric_name,
+            'metric_type': self.metric_type,
+            'current_value': self.current_value,
+            'baseline_value': self.baseline_value,
+            'deviation_sigma': self.deviation_sigma,
+            'deviation_percentage': self.deviation_percentage,
+            'anomaly_type': self.anomaly_type.value,
+            'severity': self.severity.value,
+            'confidence': self.confidence,
+            'affected_resources': self.affected_resources,
+            'related_metrics': self.related_metrics,
+            'time_window': time_window,
+            'detection_method': self.detection_method,
+            'historical_context': self.historical_context,
+            'baseline_id': self.baseline_id,
+            'tail_probability': self.tail_probability
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Anomaly':
+        """Create from a detector interface payload (ISO 8601 strings are parsed)"""
+        detected_at = data['detected_at']
+        if isinstance(detected_at, str):
+            detected_at = datetime.fromisoformat(detected_at.replace('Z', '+00:00'))
+        return cls(
+            anomaly_id=data['anomaly_id'],
+            detected_at=detected_at,
+            metric_name=data['metric_name'],
+            metric_type=data['metric_type'],
+            current_value=float(data['current_value']),
+            baseline_value=float(data['baseline_value']),
+            deviation_sigma=float(data['deviation_sigma']),
+            deviation_percentage=float(data['deviation_percentage']),
+            anomaly_type=AnomalyType[data.get('anomaly_type') or 'UNKNOWN'],
+            severity=Severity[data['severity']],
+            confidence=float(data['confidence']),
+            affected_resources=data.get('affected_resources') or [],
+            related_metrics=data.get('related_metrics') or {},
+            time_window=data.get('time_window'),
+            detection_method=data.get('detection_method'),
+            historical_context=data.get('historical_context'),
+            baseline_id=data.get('baseline_id'),
+            tail_probability=data.get('tail_probability')
+        )
+
+
+@dataclass
+class RootCause:
+    """Most likely cause of an anomaly"""
+    primary_cause: str
+    contributing_factors: List[str] = field(default_factory=list)
+    confidence: float = 0.0
+    evidence: List[str] = field(default_factory=list)
+    correlation_data: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'primary_cause': self.primary_cause,
+            'contributing_factors': self.contributing_factors,
+            'confidence': self.confidence,
+            'evidence': self.evidence,
+            'correlation_data': self.correlation_data
+        }
+
+
+@dataclass
+class Recommendation:
+    """One actionable recommendation ("high", "medium" or "low" priority)"""
+    priority: str
+    action: str
+    rationale: str
+    expected_impact: str
+    implementation_steps: List[str] = field(default_factory=list)
+    estimated_effort: str = ""
+    risk_level: str = "low"
+    cost_impact: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'priority': self.priority,
+            'action': self.action,
+            'rationale': self.rationale,
+            'expected_impact': self.expected_impact,
+            'implementation_steps': self.implementation_steps,
+            'estimated_effort': self.estimated_effort,
+            'risk_level': self.risk_level,
+            'cost_impact': self.cost_impact
+        }
+
+
+@dataclass
+class HumanReadableSummary:
+    """Plain-language explanation of an analysis for non-technical readers"""
+    what_happened: str
+    why_it_happened: str
+    what_is_the_impact: str
+    what_improvements_can_be_made: str
+    estimated_benefit_if_implemented: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return {
+            'what_happened': self.what_happened,
+            'why_it_happened': self.why_it_happened,
+            'what_is_the_impact': self.what_is_the_impact,
+            'what_improvements_can_be_made': self.what_improvements_can_be_made,
+            'estimated_benefit_if_implemented': self.estimated_benefit_if_implemented
+        }
+
+
+@dataclass
+class AnomalyAnalysis:
+    """Result of analyzing one anomaly: root cause, recommendations and summary"""
+    anomaly: Anomaly
+    root_cause: RootCause
+    recommendations: List[Recommendation]
+    analyzed_at: datetime
+    analysis_duration_ms: int
+    ai_model_used: str
+    historical_context: str = ""
+    trend_analysis: str = ""
+    predicted_impact: str = ""
+    summary: Optional[HumanReadableSummary] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary"""
+        return {
+            'anomaly': self.anomaly.to_dict(),
+            'root_cause': self.root_cause.to_dict(),
+            'recommendations': [rec.to_dict() for rec in self.recommendations],
+            'analyzed_at': _isoformat(self.analyzed_at),
+            'analysis_duration_ms': self.analysis_duration_ms,
+            'ai_model_used': self.ai_model_used,
+            'historical_context': self.historical_context,
+            'trend_analysis': self.trend_analysis,
+            'predicted_impact': self.predicted_impact,
+            'summary': self.summary.to_dict() if self.summary else None
+        }
@@ -0,0 +1,838 @@
+"""
+Baseline data models
+
+Defines the BaselineStats record produced by BaselineCalculator and the
+schema of the BigQuery Baseline table it is persisted to, plus the
+intermediate state tables (day partials, smoothing state), the joint
+covariance baselines of metric groups and detected regime shifts.
+"""
+
+import base64
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Phase 0 of seasonal profiles: Monday 1970-01-05 00:00 UTC (as baseline/seasonal.py)
+PHASE_ORIGIN = datetime(1970, 1, 5, tzinfo=timezone.utc)
+SEASONAL_BUCKET_SECONDS = {'day': 86400, 'hour': 3600}
+
+# Scale factors turning MAD and IQR into standard-deviation estimates (normal data)
+MAD_TO_SIGMA = 1.4826
+IQR_TO_SIGMA = 1.349
+
+
+@dataclass
+class BaselineStats:
+    """
+    Statistical baseline for a single metric
+
+    One instance corresponds to one row in the BigQuery Baseline table.
+    p50/p95/p99 are always populated; `percentiles` additionally maps every
+    percentile configured in baseline.percentiles (e.g. 99.9) to its value.
+    `rolling_series` holds the daily rolling-window stats behind a
+    rolling_average baseline; it is returned to callers but not persisted.
+    Seasonal baselines also carry one mean/std per phase (phase 0 starts
+    Monday 00:00 UTC, bucket width given by seasonal_bucket); hour_of_week
+    baselines add per-phase counts and percentiles (phase_percentiles maps
+    each configured rank to one value per phase). expected_at looks up
+    the phase of a timestamp.
+    Segment baselines (metrics with group_by) set segment_key and
+    segment_values; global baselines leave them empty.
+    source_modified/source_num_rows/input_fingerprint record the inputs
+    the baseline was computed from; validated_at is bumped when a refresh
+    finds them unchanged and reuses the baseline.
+    quantile_sketch is a serialized KLL sketch of the values (see
+    baseline/sketch.py) that can be merged and queried at any rank;
+    quantile_rank_error is its normalized rank error bound (0 = exact).
+    median/mad/iqr/trimmed_mean/trimmed_std_dev are set by the robust_stats
+    method (which also stores the trimmed moments as mean/std_dev); see
+    robust_deviation.
+    """
+    baseline_id: str
+    metric_name: str
+    mean: float
+    std_dev: float
+    min_value: float
+    max_value: float
+    p50: float
+    p95: float
+    p99: float
+    calculated_at: datetime
+    lookback_days: int
+    sample_count: int
+    data_source: str
+    notes: Optional[str] = None
+    percentiles: Dict[float, float] = field(default_factory=dict)
+    rolling_series: List[Dict[str, Any]] = field(default_factory=list)
+    seasonal_period: Optional[int] = None
+    seasonal_bucket: Optional[str] = None
+    phase_means: List[float] = field(default_factory=list)
+    phase_std_devs: List[float] = field(default_factory=list)
+    phase_counts: List[int] = field(default_factory=list)
+    phase_percentiles: Dict[float, List[float]] = field(default_factory=dict)
+    segment_key: Optional[str] = None
+    group_by: List[str] = field(default_factory=list)
+    segment_values: List[str] = field(default_factory=list)
+    run_id: Optional[str] = None
+    source_modified: Optional[datetime] = None
+    source_num_rows: Optional[int] = None
+    input_fingerprint: Optional[str] = None
+    validated_at: Optional[datetime] = None
+    quantile_sketch: Optional[bytes] = None
+    quantile_rank_error: Optional[float] = None
+    median: Optional[float] = None
+    mad: Optional[float] = None
+    iqr: Optional[float] = None
+    trimmed_mean: Optional[float] = None
+    trimmed_std_dev: Optional[float] = None
+
+    def phase_at(self, timestamp: datetime) -> Optional[int]:
+        """Seasonal phase of a timestamp (None for baselines without phases; naive = UTC)"""
+        if not self.phase_means or not self.seasonal_bucket:
+            return None
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        elapsed = (timestamp - PHASE_ORIGIN).total_seconds()
+        return int(elapsed // SEASONAL_BUCKET_SECONDS[self.seasonal_bucket]) % len(self.phase_means)
+
+    def expected_at(self, timestamp: datetime) -> Tuple[float, float]:
+        """
+        Expected (mean, std_dev) at a timestamp
+
+        The phase's mean/std for seasonal and hour_of_week baselines (an
+        array index), the overall mean/std otherwise.
+        """
+        phase = self.phase_at(timestamp)
+        if phase is None:
+            return self.mean, self.std_dev
+        return self.phase_means[phase], self.phase_std_devs[phase]
+
+    def robust_deviation(self, value: float) -> float:
+        """
+        Deviation of a value from the median in robust standard deviations
+
+        Sigma is MAD * 1.4826, falling back to IQR / 1.349 when more than
+        half the values are identical (MAD 0), then to std_dev. Baselines
+        without robust statistics use (value - mean) / std_dev.
+
+        Returns:
+            Signed deviation in sigmas (0.0 if no spread is known)
+        """
+        center, sigma = self.center_and_scale()
+        return (value - center) / sigma if sigma else 0.0
+
+    def center_and_scale(self) -> Tuple[float, float]:
+        """(center, sigma) used by robust_deviation: median/robust sigma, or mean/std_dev"""
+        if self.median is None:
+            return self.mean, self.std_dev
+        return self.median, (self.mad or 0.0) * MAD_TO_SIGMA or (self.iqr or 0.0) / IQR_TO_SIGMA or self.std_dev
+
+    def to_bigquery_row(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable row for the Baseline table"""
+        return {
+            'baseline_id': self.baseline_id,
+            'metric_name': self.metric_name,
+            'mean': self.mean,
+            'std_dev': self.std_dev,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+            'p50': self.p50,
+            'p95': self.p95,
+            'p99': self.p99,
+            'calculated_at': self.calculated_at.isoformat(),
+            'lookback_days': self.lookback_days,
+            'sample_count': self.sample_count,
+            'data_source': self.data_source,
+            'notes': self.notes,
+            'percentile_ranks': list(self.percentiles.keys()),
+            'percentile_values': list(self.percentiles.values()),
+            'seasonal_period': self.seasonal_period,
+            'seasonal_bucket': self.seasonal_bucket,
+            'phase_means': list(self.phase_means),
+            'phase_std_devs': list(self.phase_std_devs),
+            'phase_counts': list(self.phase_counts),
+            'phase_percentile_values': [v for rank in self.percentiles
+                                        for v in self.phase_percentiles.get(rank, [])],
+            'segment_key': self.segment_key,
+            'group_by': list(self.group_by),
+            'segment_values': list(self.segment_values),
+            'run_id': self.run_id,
+            'source_modified': self.source_modified.isoformat() if self.source_modified else None,
+            'source_num_rows': self.source_num_rows,
+            'input_fingerprint': self.input_fingerprint,
+            'validated_at': self.validated_at.isoformat() if self.validated_at else None,
+            # BYTES columns are base64 strings in JSON rows
+            'quantile_sketch': (base64.b64encode(self.quantile_sketch).decode('ascii')
+                                if self.quantile_sketch is not None else None),
+            'quantile_rank_error': self.quantile_rank_error,
+            'median': self.median,
+            'mad': self.mad,
+            'iqr': self.iqr,
+            'trimmed_mean': self.trimmed_mean,
+            'trimmed_std_dev': self.trimmed_std_dev
+        }
+
+    @classmethod
+    def from_bigquery_row(cls, row) -> 'BaselineStats':
+        """
+        Build a BaselineStats object from a Baseline table row
+
+        Columns added after the original schema are optional so rows
+        written by older versions still load.
+        """
+        ranks = row.get('percentile_ranks') or []
+        values = row.get('percentile_values') or []
+        sketch = row.get('quantile_sketch')
+        if isinstance(sketch, str):
+            sketch = base64.b64decode(sketch)
+        # phase_percentile_values: one block of seasonal_period values per rank
+        phase_values = [float(v) for v in row.get('phase_percentile_values') or []]
+        period = row.get('seasonal_period') or 0
+        phase_percentiles = {}
+        if period and len(phase_values) == period * len(ranks):
+            phase_percentiles = {float(r): phase_values[i * period:(i + 1) * period] for i, r in enumerate(ranks)}
+        return cls(
+            baseline_id=row['baseline_id'],
+            metric_name=row['metric_name'],
+            mean=float(row['mean']),
+            std_dev=float(row['std_dev']),
+            min_value=float(row['min_value']),
+            max_value=float(row['max_value']),
+            p50=float(row['p50']),
+            p95=float(row['p95']),
+            p99=float(row['p99']),
+            calculated_at=row['calculated_at'],
+            lookback_days=int(row['lookback_days']),
+            sample_count=int(row['sample_count']),
+            data_source=row['data_source'],
+            notes=row.get('notes'),
+            percentiles={float(r): float(v) for r, v in zip(ranks, values)},
+            seasonal_period=row.get('seasonal_period'),
+            seasonal_bucket=row.get('seasonal_bucket'),
+            phase_means=[float(v) for v in row.get('phase_means') or []],
+            phase_std_devs=[float(v) for v in row.get('phase_std_devs') or []],
+            phase_counts=[int(v) for v in row.get('phase_counts') or []],
+            phase_percentiles=phase_percentiles,
+            segment_key=row.get('segment_key'),
+            group_by=list(row.get('group_by') or []),
+            segment_values=list(row.get('segment_values') or []),
+            run_id=row.get('run_id'),
+            source_modified=row.get('source_modified'),
+            source_num_rows=row.get('source_num_rows'),
+            input_fingerprint=row.get('input_fingerprint'),
+            validated_at=row.get('validated_at'),
+            quantile_sketch=sketch,
+            quantile_rank_error=row.get('quantile_rank_error'),
+            median=row.get('median'),
+            mad=row.get('mad'),
+            iqr=row.get('iqr'),
+            trimmed_mean=row.get('trimmed_mean'),
+            trimmed_std_dev=row.get('trimmed_std_dev')
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return self.to_bigquery_row()
+
+
+# BigQuery schema for the Baseline table
+# Each entry is passed to bigquery.SchemaField(**field)
+BASELINE_TABLE_SCHEMA = [
+    {'name': 'baseline_id', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Unique identifier'},
+    {'name': 'metric_name', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Metric name'},
+    {'name': 'mean', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Average value'},
+    {'name': 'std_dev', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Standard deviation'},
+    {'name': 'min_value', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Minimum value'},
+    {'name': 'max_value', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Maximum value'},
+    {'name': 'p50', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': '50th percentile'},
+    {'name': 'p95', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': '95th percentile'},
+    {'name': 'p99', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': '99th percentile'},
+    {'name': 'calculated_at', 'field_type': 'TIMESTAMP', 'mode': 'REQUIRED',
+     'description': 'Calculation timestamp'},
+    {'name': 'lookback_days', 'field_type': 'INTEGER', 'mode': 'REQUIRED',
+     'description': 'Days analyzed'},
+    {'name': 'sample_count', 'field_type': 'INTEGER', 'mode': 'REQUIRED',
+     'description': 'Number of samples'},
+    {'name': 'data_source', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Source table name'},
+    {'name': 'notes', 'field_type': 'STRING', 'mode': 'NULLABLE',
+     'description': 'Additional notes'},
+    {'name': 'percentile_ranks', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Configured percentile ranks (e.g. 50, 95, 99.9)'},
+    {'name': 'percentile_values', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Values for percentile_ranks, same order'},
+    {'name': 'seasonal_period', 'field_type': 'INTEGER', 'mode': 'NULLABLE',
+     'description': 'Buckets per season (seasonal baselines only)'},
+    {'name': 'seasonal_bucket', 'field_type': 'STRING', 'mode': 'NULLABLE',
+     'description': 'Bucket width of the seasonal phases (day or hour)'},
+    {'name': 'phase_means', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Expected value per seasonal phase'},
+    {'name': 'phase_std_devs', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Standard deviation per seasonal phase'},
+    {'name': 'phase_counts', 'field_type': 'INTEGER', 'mode': 'REPEATED',
+     'description': 'Number of values per seasonal phase (hour_of_week baselines)'},
+    {'name': 'phase_percentile_values', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Per-phase percentiles: seasonal_period values for each of percentile_ranks, in order'},
+    {'name': 'segment_key', 'field_type': 'STRING', 'mode': 'NULLABLE',
+     'description': 'Segment identifier, e.g. cluster=3/machine_id=17 (NULL for global baselines)'},
+    {'name': 'group_by', 'field_type': 'STRING', 'mode': 'REPEATED',
+     'description': 'Segment dimension columns'},
+    {'name': 'segment_values', 'field_type': 'STRING', 'mode': 'REPEATED',
+     'description': 'Segment dimension values, same order as group_by'},
+    {'name': 'run_id', 'field_type': 'STRING', 'mode': 'NULLABLE',
+     'description': 'Refresh run that wrote the row (bulk writes are idempotent per run_id)'},
+    {'name': 'source_modified', 'field_type': 'TIMESTAMP', 'mode': 'NULLABLE',
+     'description': 'Source table last-modified time when the baseline was computed'},
+    {'name': 'source_num_rows', 'field_type': 'INTEGER', 'mode': 'NULLABLE',
+     'description': 'Source table row count when the baseline was computed'},
+    {'name': 'input_fingerprint', 'field_type': 'STRING', 'mode': 'NULLABLE',
+     'description': 'Hash of the calculation inputs (column, method, window, parameters)'},
+    {'name': 'validated_at', 'field_type': 'TIMESTAMP', 'mode': 'NULLABLE',
+     'description': 'Last refresh that found the inputs unchanged and kept this baseline'},
+    {'name': 'quantile_sketch', 'field_type': 'BYTES', 'mode': 'NULLABLE',
+     'description': 'Serialized mergeable KLL quantile sketch of the values'},
+    {'name': 'quantile_rank_error', 'field_type': 'FLOAT', 'mode': 'NULLABLE',
+     'description': 'Normalized rank error bound of quantile_sketch (0 = exact)'},
+    {'name': 'median', 'field_type': 'FLOAT', 'mode': 'NULLABLE',
+     'description': 'Median (robust_stats baselines)'},
+    {'name': 'mad', 'field_type': 'FLOAT', 'mode': 'NULLABLE',
+     'description': 'Median absolute deviation from the median (robust_stats baselines)'},
+    {'name': 'iqr', 'field_type': 'FLOAT', 'mode': 'NULLABLE',
+     'description': 'Interquartile range p75 - p25 (robust_stats baselines)'},
+    {'name': 'trimmed_mean', 'field_type': 'FLOAT', 'mode': 'NULLABLE',
+     'description': 'Mean without the trimmed tails (robust_stats baselines)'},
+    {'name': 'trimmed_std_dev', 'field_type': 'FLOAT', 'mode': 'NULLABLE',
+     'description': 'Standard deviation without the trimmed tails (robust_stats baselines)'},
+]
+
+# Columns of BASELINE_TABLE_SCHEMA holding timestamps
+BASELINE_TIMESTAMP_COLUMNS = [
+    field['name'] for field in BASELINE_TABLE_SCHEMA if field['field_type'] == 'TIMESTAMP'
+]
+
+
+def baseline_arrow_schema():
+    """pyarrow schema matching BASELINE_TABLE_SCHEMA (used for Parquet load jobs)"""
+    import pyarrow as pa
+
+    types = {
+        'STRING': pa.string(),
+        'FLOAT': pa.float64(),
+        'INTEGER': pa.int64(),
+        'TIMESTAMP': pa.timestamp('us', tz='UTC'),
+        'BYTES': pa.binary()
+    }
+    fields = []
+    for definition in BASELINE_TABLE_SCHEMA:
+        value_type = types[definition['field_type']]
+        if definition['mode'] == 'REPEATED':
+            value_type = pa.list_(value_type)
+        fields.append(pa.field(definition['name'], value_type, nullable=definition['mode'] != 'REQUIRED'))
+    return pa.schema(fields)
+
+
+def make_segment_key(group_by: List[str], values: List[str]) -> str:
+    """Build the segment_key for one segment (dimension=value pairs joined by '/')"""
+    return "/".join(f"{dimension}={value}" for dimension, value in zip(group_by, values))
+
+
+def make_segment_keys(group_by: List[str], segment_values: List[np.ndarray]) -> np.ndarray:
+    """segment_key of many segments at once (one value array per dimension)"""
+    keys = np.full(len(segment_values[0]) if segment_values else 0, "", dtype=object)
+    for i, (dimension, values) in enumerate(zip(group_by, segment_values)):
+        part = np.char.add(f"{dimension}=", np.asarray(values, dtype=str)).astype(object)
+        keys = part if i == 0 else keys + "/" + part
+    return keys
+
+
+@dataclass
+class BaselineBatch:
+    """
+    Columnar batch of segment baselines for one metric
+
+    Holds one array per statistic with one entry per segment, so a metric
+    that expands to tens of thousands of segments is computed, passed
+    around and written without creating a BaselineStats object per row.
+    `segment_values` has one string array per group_by dimension and
+    `percentiles` maps each rank (always including 50/95/99) to an array.
+    `quantile_sketches` optionally holds one serialized KLL sketch per
+    segment, with its rank error bound in `quantile_rank_error`.
+    """
+    metric_name: str
+    metric_column: str
+    data_source: str
+    method: str
+    lookback_days: int
+    calculated_at: datetime
+    group_by: List[str]
+    segment_values: List[np.ndarray]
+    mean: np.ndarray
+    std_dev: np.ndarray
+    min_value: np.ndarray
+    max_value: np.ndarray
+    sample_count: np.ndarray
+    percentiles: Dict[float, np.ndarray]
+    notes: Optional[str] = None
+    run_id: Optional[str] = None
+    source_modified: Optional[datetime] = None
+    source_num_rows: Optional[int] = None
+    input_fingerprint: Optional[str] = None
+    quantile_sketches: Optional[List[bytes]] = None
+    quantile_rank_error: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return int(self.mean.size)
+
+    def segment_keys(self) -> np.ndarray:
+        """segment_key of every segment"""
+        if not self.group_by:
+            return np.full(len(self), "", dtype=object)
+        return make_segment_keys(self.group_by, self.segment_values)
+
+    def baseline_ids(self) -> np.ndarray:
+        """baseline_id of every segment"""
+        stamp = self.calculated_at.strftime('%Y%m%d-%H%M%S')
+        return f"baseline-{self.metric_name}-{stamp}-" + self.segment_keys()
+
+    def to_arrow(self):
+        """
+        Convert to a pyarrow Table with the Baseline table columns
+
+        Used by the bulk writer (Parquet load job) and the local store.
+        """
+        import pyarrow as pa
+
+        size = len(self)
+        ranks = sorted(self.percentiles)
+        n_dims = len(self.group_by)
+
+        def repeated(values: np.ndarray, width: int, value_type):
+            offsets = np.arange(size + 1, dtype=np.int32) * width
+            return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values, type=value_type))
+
+        # Naive timestamps are UTC, as with the JSON rows of to_bigquery_row
+        calculated_at = self.calculated_at
+        if calculated_at.tzinfo is None:
+            calculated_at = calculated_at.replace(tzinfo=timezone.utc)
+
+        interleaved = (np.stack([np.asarray(v, dtype=object) for v in self.segment_values], axis=1).ravel()
+                       if n_dims else np.array([], dtype=object))
+        percentile_values = (np.stack([self.percentiles[r] for r in ranks], axis=1).ravel()
+                             if ranks else np.array([], dtype=np.float64))
+
+        columns = {
+            'baseline_id': pa.array(self.baseline_ids(), type=pa.string()),
+            'metric_name': pa.array([self.metric_name] * size, type=pa.string()),
+            'mean': pa.array(self.mean, type=pa.float64()),
+            'std_dev': pa.array(self.std_dev, type=pa.float64()),
+            'min_value': pa.array(self.min_value, type=pa.float64()),
+            'max_value': pa.array(self.max_value, type=pa.float64()),
+            'p50': pa.array(self.percentiles[50.0], type=pa.float64()),
+            'p95': pa.array(self.percentiles[95.0], type=pa.float64()),
+            'p99': pa.array(self.percentiles[99.0], type=pa.float64()),
+            'calculated_at': pa.array([calculated_at] * size, type=pa.timestamp('us', tz='UTC')),
+            'lookback_days': pa.array([self.lookback_days] * size, type=pa.int64()),
+            'sample_count': pa.array(self.sample_count, type=pa.int64()),
+            'data_source': pa.array([self.data_source] * size, type=pa.string()),
+            'notes': pa.array([self.notes] * size, type=pa.string()),
+            'percentile_ranks': repeated(np.tile(np.array(ranks, dtype=np.float64), size), len(ranks), pa.float64()),
+            'percentile_values': repeated(percentile_values, len(ranks), pa.float64()),
+            'seasonal_period': pa.nulls(size, type=pa.int64()),
+            'seasonal_bucket': pa.nulls(size, type=pa.string()),
+            'phase_means': repeated(np.array([], dtype=np.float64), 0, pa.float64()),
+            'phase_std_devs': repeated(np.array([], dtype=np.float64), 0, pa.float64()),
+            'phase_counts': repeated(np.array([], dtype=np.int64), 0, pa.int64()),
+            'phase_percentile_values': repeated(np.array([], dtype=np.float64), 0, pa.float64()),
+            'segment_key': pa.array(self.segment_keys(), type=pa.string()),
+            'group_by': repeated(np.array(self.group_by * size, dtype=object), n_dims, pa.string()),
+            'segment_values': repeated(interleaved, n_dims, pa.string()),
+            'run_id': pa.array([self.run_id] * size, type=pa.string()),
+            'source_modified': pa.array([self.source_modified] * size, type=pa.timestamp('us', tz='UTC')),
+            'source_num_rows': pa.array([self.source_num_rows] * size, type=pa.int64()),
+            'input_fingerprint': pa.array([self.input_fingerprint] * size, type=pa.string()),
+            'validated_at': pa.nulls(size, type=pa.timestamp('us', tz='UTC')),
+            'quantile_sketch': (pa.array(self.quantile_sketches, type=pa.binary())
+                                if self.quantile_sketches is not None else pa.nulls(size, type=pa.binary())),
+            'quantile_rank_error': (pa.array(self.quantile_rank_error, type=pa.float64())
+                                    if self.quantile_rank_error is not None else pa.nulls(size, type=pa.float64())),
+            'median': pa.nulls(size, type=pa.float64()),
+            'mad': pa.nulls(size, type=pa.float64()),
+            'iqr': pa.nulls(size, type=pa.float64()),
+            'trimmed_mean': pa.nulls(size, type=pa.float64()),
+            'trimmed_std_dev': pa.nulls(size, type=pa.float64()),
+        }
+        return pa.table(columns).cast(baseline_arrow_schema())
+
+    def to_baselines(self) -> List[BaselineStats]:
+        """Materialize one BaselineStats per segment (for small batches)"""
+        keys = self.segment_keys()
+        ids = self.baseline_ids()
+        ranks = sorted(self.percentiles)
+        return [
+            BaselineStats(
+                baseline_id=ids[i],
+                metric_name=self.metric_name,
+                mean=float(self.mean[i]),
+                std_dev=float(self.std_dev[i]),
+                min_value=float(self.min_value[i]),
+                max_value=float(self.max_value[i]),
+                p50=float(self.percentiles[50.0][i]),
+                p95=float(self.percentiles[95.0][i]),
+                p99=float(self.percentiles[99.0][i]),
+                calculated_at=self.calculated_at,
+                lookback_days=self.lookback_days,
+                sample_count=int(self.sample_count[i]),
+                data_source=self.data_source,
+                notes=self.notes,
+                percentiles={r: float(self.percentiles[r][i]) for r in ranks},
+                segment_key=keys[i],
+                group_by=list(self.group_by),
+                segment_values=[str(values[i]) for values in self.segment_values],
+                run_id=self.run_id,
+                source_modified=self.source_modified,
+                source_num_rows=self.source_num_rows,
+                input_fingerprint=self.input_fingerprint,
+                quantile_sketch=self.quantile_sketches[i] if self.quantile_sketches is not None else None,
+                quantile_rank_error=(float(self.quantile_rank_error[i])
+                                     if self.quantile_rank_error is not None else None)
+            )
+            for i in range(len(self))
+        ]
+
+
+@dataclass
+class PartialAggregate:
+    """
+    Mergeable sufficient statistics for one metric over one day partition
+
+    count/sum/M2 combine exactly with Chan's parallel variance formula, so
+    a lookback-window baseline can be assembled from stored daily partials
+    without rescanning raw rows. Quantiles are merged separately from the
+    serialized sketch.
+    """
+    count: int
+    sum: float
+    m2: float
+    min_value: float
+    max_value: float
+
+    @property
+    def mean(self) -> float:
+        """Mean of the aggregated values"""
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def std_dev(self) -> float:
+        """Sample standard deviation (matches BigQuery STDDEV)"""
+        if self.count < 2:
+            return 0.0
+        return (self.m2 / (self.count - 1)) ** 0.5
+
+    def merge(self, other: 'PartialAggregate') -> 'PartialAggregate':
+        """Combine two partials (Chan et al. pairwise update)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        m2 = self.m2 + other.m2 + delta * delta * self.count * other.count / count
+        return PartialAggregate(
+            count=count,
+            sum=self.sum + other.sum,
+            m2=m2,
+            min_value=min(self.min_value, other.min_value),
+            max_value=max(self.max_value, other.max_value)
+        )
+
+    @classmethod
+    def merge_all(cls, partials: List['PartialAggregate']) -> 'PartialAggregate':
+        """Fold a list of partials into one"""
+        total = cls(count=0, sum=0.0, m2=0.0, min_value=0.0, max_value=0.0)
+        for partial in partials:
+            total = total.merge(partial)
+        return total
+
+
+# BigQuery schema for the BaselinePartials rollup table (one row per metric per day,
+# plus optional hourly and per-segment rows)
+BASELINE_PARTIALS_TABLE_SCHEMA = [
+    {'name': 'metric_name', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Metric name'},
+    {'name': 'metric_column', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Source column the partial was computed from'},
+    {'name': 'data_source', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Source table name'},
+    {'name': 'partition_date', 'field_type': 'DATE', 'mode': 'REQUIRED',
+     'description': 'Day the partial covers'},
+    {'name': 'hour', 'field_type': 'INTEGER', 'mode': 'NULLABLE',
+     'description': 'Hour of the day (0-23) for hourly rollups, NULL for day rollups'},
+    {'name': 'group_by', 'field_type': 'STRING', 'mode': 'REPEATED',
+     'description': 'Segment dimensions (empty for the global rollup)'},
+    {'name': 'segment_values', 'field_type': 'STRING', 'mode': 'REPEATED',
+     'description': 'Segment values, same order as group_by'},
+    {'name': 'sample_count', 'field_type': 'INTEGER', 'mode': 'REQUIRED',
+     'description': 'Number of non-null values'},
+    {'name': 'sum_value', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Sum of values'},
+    {'name': 'm2', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Sum of squared deviations from the day mean'},
+    {'name': 'min_value', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Minimum value'},
+    {'name': 'max_value', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Maximum value'},
+    {'name': 'quantile_sketch', 'field_type': 'BYTES', 'mode': 'NULLABLE',
+     'description': 'Serialized KLL quantile sketch'},
+    {'name': 'calculated_at', 'field_type': 'TIMESTAMP', 'mode': 'REQUIRED',
+     'description': 'When the partial was computed'},
+]
+
+
+@dataclass
+class SmoothingState:
+    """
+    Holt-Winters state for one metric, persisted between refreshes
+
+    level/trend/season are the additive Holt-Winters components after the
+    bucket starting at last_bucket; season is indexed by absolute phase
+    (phase 0 starts Monday 00:00 UTC). resid_var is the exponentially
+    weighted mean squared deviation of raw observations from the one-step
+    forecast. A refresh only feeds buckets after last_bucket.
+    """
+    metric_name: str
+    metric_column: str
+    data_source: str
+    bucket: str
+    period: int
+    last_bucket: datetime
+    level: float
+    trend: float
+    season: List[float]
+    resid_var: float
+    sample_count: int
+    min_value: float
+    max_value: float
+    updated_at: datetime
+
+    def to_bigquery_row(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable row for the smoothing state table"""
+        return {
+            'metric_name': self.metric_name,
+            'metric_column': self.metric_column,
+            'data_source': self.data_source,
+            'bucket': self.bucket,
+            'period': self.period,
+            'last_bucket': self.last_bucket.isoformat(),
+            'level': self.level,
+            'trend': self.trend,
+            'season': list(self.season),
+            'resid_var': self.resid_var,
+            'sample_count': self.sample_count,
+            'min_value': self.min_value,
+            'max_value': self.max_value,
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    @classmethod
+    def from_bigquery_row(cls, row) -> 'SmoothingState':
+        """Build a SmoothingState object from a state table row"""
+        return cls(
+            metric_name=row['metric_name'],
+            metric_column=row['metric_column'],
+            data_source=row['data_source'],
+            bucket=row['bucket'],
+            period=int(row['period']),
+            last_bucket=row['last_bucket'],
+            level=float(row['level']),
+            trend=float(row['trend']),
+            season=[float(v) for v in row['season']],
+            resid_var=float(row['resid_var']),
+            sample_count=int(row['sample_count']),
+            min_value=float(row['min_value']),
+            max_value=float(row['max_value']),
+            updated_at=row['updated_at']
+        )
+
+
+# BigQuery schema for the smoothing state table (one row per metric)
+BASELINE_SMOOTHING_STATE_TABLE_SCHEMA = [
+    {'name': 'metric_name', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Metric name'},
+    {'name': 'metric_column', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Source column the state was fitted on'},
+    {'name': 'data_source', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Source table name'},
+    {'name': 'bucket', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Bucket width (day or hour)'},
+    {'name': 'period', 'field_type': 'INTEGER', 'mode': 'REQUIRED',
+     'description': 'Buckets per season'},
+    {'name': 'last_bucket', 'field_type': 'TIMESTAMP', 'mode': 'REQUIRED',
+     'description': 'Start of the last bucket absorbed into the state'},
+    {'name': 'level', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Smoothed level'},
+    {'name': 'trend', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Smoothed trend per bucket'},
+    {'name': 'season', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Seasonal component per phase'},
+    {'name': 'resid_var', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Smoothed squared deviation from the one-step forecast'},
+    {'name': 'sample_count', 'field_type': 'INTEGER', 'mode': 'REQUIRED',
+     'description': 'Observations absorbed so far'},
+    {'name': 'min_value', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Minimum value seen'},
+    {'name': 'max_value', 'field_type': 'FLOAT', 'mode': 'REQUIRED',
+     'description': 'Maximum value seen'},
+    {'name': 'updated_at', 'field_type': 'TIMESTAMP', 'mode': 'REQUIRED',
+     'description': 'When the state was last updated'},
+]
+
+
+@dataclass
+class CovarianceBaseline:
+    """
+    Joint baseline of correlated metrics of one source table
+
+    Computed in one scan over the rows where every metric is present
+    (baseline.covariance.groups). means is in metric_names order and
+    covariance is the sample covariance matrix, row-major (k x k for k
+    metrics). One instance corresponds to one row of the covariance table.
+    source_modified/source_num_rows/input_fingerprint record the inputs
+    like on BaselineStats, so an unchanged group is not recomputed.
+    """
+    baseline_id: str
+    group_name: str
+    metric_names: List[str]
+    metric_columns: List[str]
+    data_source: str
+    means: List[float]
+    covariance: List[float]
+    sample_count: int
+    lookback_days: int
+    calculated_at: datetime
+    source_modified: Optional[datetime] = None
+    source_num_rows: Optional[int] = None
+    input_fingerprint: Optional[str] = None
+
+    def covariance_matrix(self) -> np.ndarray:
+        """Covariance as a (k, k) array"""
+        size = len(self.metric_names)
+        return np.asarray(self.covariance, dtype=np.float64).reshape(size, size)
+
+    def to_bigquery_row(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable row for the covariance table"""
+        return {
+            'baseline_id': self.baseline_id,
+            'group_name': self.group_name,
+            'metric_names': list(self.metric_names),
+            'metric_columns': list(self.metric_columns),
+            'data_source': self.data_source,
+            'means': [float(v) for v in self.means],
+            'covariance': [float(v) for v in self.covariance],
+            'sample_count': self.sample_count,
+            'lookback_days': self.lookback_days,
+            'calculated_at': self.calculated_at.isoformat(),
+            'source_modified': self.source_modified.isoformat() if self.source_modified else None,
+            'source_num_rows': self.source_num_rows,
+            'input_fingerprint': self.input_fingerprint
+        }
+
+    @classmethod
+    def from_bigquery_row(cls, row) -> 'CovarianceBaseline':
+        """Build a CovarianceBaseline object from a covariance table row"""
+        return cls(
+            baseline_id=row['baseline_id'],
+            group_name=row['group_name'],
+            metric_names=list(row['metric_names']),
+            metric_columns=list(row['metric_columns']),
+            data_source=row['data_source'],
+            means=[float(v) for v in row['means']],
+            covariance=[float(v) for v in row['covariance']],
+            sample_count=int(row['sample_count']),
+            lookback_days=int(row['lookback_days']),
+            calculated_at=row['calculated_at'],
+            source_modified=row.get('source_modified'),
+            source_num_rows=row.get('source_num_rows'),
+            input_fingerprint=row.get('input_fingerprint')
+        )
+
+
+# BigQuery schema for the covariance table (one row per group and refresh)
+BASELINE_COVARIANCE_TABLE_SCHEMA = [
+    {'name': 'baseline_id', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Unique identifier for the covariance baseline'},
+    {'name': 'group_name', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Metric group (baseline.covariance.groups)'},
+    {'name': 'metric_names', 'field_type': 'STRING', 'mode': 'REPEATED',
+     'description': 'Metrics of the group, in matrix order'},
+    {'name': 'metric_columns', 'field_type': 'STRING', 'mode': 'REPEATED',
+     'description': 'Source column of each metric'},
+    {'name': 'data_source', 'field_type': 'STRING', 'mode': 'REQUIRED',
+     'description': 'Source table name'},
+    {'name': 'means', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Mean of each metric'},
+    {'name': 'covariance', 'field_type': 'FLOAT', 'mode': 'REPEATED',
+     'description': 'Sample covariance matrix, row-major'},
+    {'name': 'sample_count', 'field_type': 'INTEGER', 'mode': 'REQUIRED',
+     'description': 'Rows with every metric present'},
+    {'name': 'lookback_days', 'field_type': 'INTEGER', 'mode': 'REQUIRED',
+     'description': 'Lookback window in days'},
+    {'name': 'calculated_at', 'field_type': 'TIMESTAMP', 'mode': 'REQUIRED',
+     'description': 'When the covariance was calculated'},
+    {'name': 'source_modified', 'field_type': 'TIMESTAMP', 'mode': 'NULLABLE',
+     'description': 'Source table last-modified time when the covariance was computed'},
+    {'name': 'source_num_rows', 'field_type': 'INTEGER', 'mode': 'NULLABLE',
+     'description': 'Source table row count when the covariance was computed'},
+    {'name': 'input_fingerprint', 'field_type': 'STRING', 'mode': 'NULLABLE',
+     'description': 'Hash of the group inputs (metrics, columns, window)'},
+]
+
+
+@dataclass
+class RegimeShift:
+    """
+    A permanent level change of one series of a metric
+
+    Found by change-point detection over the daily means (see
+    baseline/changepoint.py). segment_key is None for the metric's global
+    series. change_date is the first day of the new regime and regime_days
+    the number of days from it to the last day analyzed. shift_sigma is
+    (after_mean - before_mean) in units of the series' day-to-day noise.
+    migration_id is set when the change falls within the migration window
+    of a row of the migrations table.
+    """
+    metric_name: str
+    segment_key: Optional[str]
+    change_date: date
+    before_mean: float
+    after_mean: float
+    shift_sigma: float
+    regime_days: int
+    changepoints: int
+    detected_at: datetime
+    migration_id: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary"""
+        return {
+            'metric_name': self.metric_name,
+            'segment_key': self.segment_key,
+            'change_date': self.change_date.isoformat(),
+            'before_mean': self.before_mean,
+            'after_mean': self.after_mean,
+            'shift_sigma': self.shift_sigma,
+            'regime_days': self.regime_days,
+            'changepoints': self.changepoints,
+            'detected_at': self.detected_at.isoformat(),
+            'migration_id': self.migration_id
+        }
@@ -0,0 +1,72 @@
+"""
+Test Historical Backfill
+Trailing-window statistics and chunking of baseline/backfill.py on
+synthetic data (no BigQuery access needed)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.baseline.backfill import trailing_window_stats, date_chunks, BackfillCheckpoint
+
+
+def test_trailing_window_stats_matches_loop():
+    """Every as-of day gets the stats of the lookback days before it"""
+    rng = np.random.default_rng(9)
+    days = np.datetime64('2025-01-01') + rng.integers(0, 60, 20_000).astype('timedelta64[D]')
+    values = rng.gamma(2.0, 50.0, days.size) + 1e6  # large offset: checks the centered sums
+    values[::37] = np.nan
+    as_of = np.datetime64('2025-01-01') + np.arange(0, 70, 3).astype('timedelta64[D]')
+
+    stats = trailing_window_stats(days, values, as_of, 7, [90.0])
+
+    for i, day in enumerate(as_of):
+        window = values[(days >= day - 7) & (days < day) & ~np.isnan(values)]
+        assert stats['sample_count'][i] == window.size
+        if window.size == 0:
+            assert np.isnan(stats['mean'][i]) and np.isnan(stats['quantiles'][90.0][i])
+            continue
+        assert np.isclose(stats['mean'][i], window.mean(), rtol=0, atol=1e-6)
+        assert np.isclose(stats['std_dev'][i], window.std(ddof=1), rtol=1e-6)
+        assert stats['quantiles'][90.0][i] == np.percentile(window, 90.0)
+        assert stats['min_value'][i] == window.min() and stats['max_value'][i] == window.max()
+
+
+def test_date_chunks():
+    """Chunks cover the range without gaps or overlap"""
+    chunks = date_chunks(date(2025, 1, 1), date(2025, 3, 1), 31)
+    assert chunks == [(date(2025, 1, 1), date(2025, 1, 31)), (date(2025, 2, 1), date(2025, 3, 1))]
+    assert date_chunks(date(2025, 1, 1), date(2025, 1, 1), 31) == [(date(2025, 1, 1), date(2025, 1, 1))]
+
+
+def test_checkpoint_persists_per_job():
+    """Completed units survive a restart and are kept per job key"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'checkpoint.json')
+        checkpoint = BackfillCheckpoint(path, 'job-a')
+        checkpoint.mark_done('table/ts/2025-01-01')
+        BackfillCheckpoint(path, 'job-b').mark_done('table/ts/2025-02-01')
+
+        reopened = BackfillCheckpoint(path, 'job-a')
+        assert len(reopened) == 1
+        assert reopened.is_done('table/ts/2025-01-01')
+        assert not reopened.is_done('table/ts/2025-02-01')
+
+
+if __name__ == "__main__":
+    tests = [test_trailing_window_stats_matches_loop, test_date_chunks, test_checkpoint_persists_per_job]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,84 @@
+"""
+Test Baseline Cache
+TTL expiry, LRU eviction and invalidation of baseline/cache.py (no
+BigQuery access needed)
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.baseline.cache import BaselineCache, ALL_SEGMENTS
+
+
+def test_lru_eviction():
+    """The least recently used key goes first; a hit makes a key recent"""
+    cache = BaselineCache(ttl_seconds=0, max_entries=2)
+    cache.put(('error_rate', None), 'a')
+    cache.put(('cpu_utilization', None), 'b')
+    assert cache.get(('error_rate', None)) == (True, 'a')
+
+    cache.put(('execution_time', None), 'c')
+
+    assert cache.get(('cpu_utilization', None)) == (False, None)
+    assert cache.get(('error_rate', None)) == (True, 'a')
+    assert cache.stats()['entries'] == 2
+
+
+def test_ttl_expiry_and_cached_miss():
+    """Entries, including cached misses, expire after the TTL"""
+    cache = BaselineCache(ttl_seconds=0.05)
+    cache.put(('error_rate', None), None)
+    assert cache.get(('error_rate', None)) == (True, None)
+
+    time.sleep(0.1)
+
+    assert cache.get(('error_rate', None)) == (False, None)
+    assert cache.stats()['entries'] == 0
+
+
+def test_invalidate_metric():
+    """Every segment entry of a metric is dropped, other metrics are kept"""
+    cache = BaselineCache()
+    for key in [('error_rate', None), ('error_rate', 'cluster=1'), ('error_rate', ALL_SEGMENTS),
+                ('cpu_utilization', None)]:
+        cache.put(key, 'value')
+
+    cache.invalidate_metric('error_rate')
+
+    assert [cache.get(key)[0] for key in [('error_rate', None), ('error_rate', 'cluster=1'),
+                                          ('cpu_utilization', None)]] == [False, False, True]
+
+
+def test_put_if_newer_mixed_time_zones():
+    """Naive (UTC) and aware calculated_at compare without error; the newer one stays"""
+    cache = BaselineCache()
+    key = ('error_rate', None)
+    newer = SimpleNamespace(calculated_at=datetime(2025, 1, 1, 12, 0))
+    older = SimpleNamespace(calculated_at=datetime(2025, 1, 1, 13, 0, tzinfo=timezone(timedelta(hours=2))))
+
+    cache.put(key, newer)
+    cache.put_if_newer(key, older)
+    assert cache.get(key) == (True, newer)
+
+    latest = SimpleNamespace(calculated_at=datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc))
+    cache.put_if_newer(key, latest)
+    assert cache.get(key) == (True, latest)
+
+
+if __name__ == "__main__":
+    tests = [test_lru_eviction, test_ttl_expiry_and_cached_miss, test_invalidate_metric,
+             test_put_if_newer_mixed_time_zones]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
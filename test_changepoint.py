@@ -0,0 +1,43 @@
+"""
+Test Change-Point Detection
+Regime search of baseline/changepoint.py on synthetic daily means
+(no BigQuery access needed)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.baseline.changepoint import find_last_regime
+
+
+def test_find_last_regime_step():
+    """A step is located on its first day; a flat series has no change"""
+    rng = np.random.default_rng(5)
+    days = 60
+    means = rng.normal(10.0, 1.0, (2, days))
+    means[0, 40:] += 5.0
+    means[:, [12, 33]] = np.nan  # days without data
+
+    regimes = find_last_regime(means, np.full(days, 4.0 * np.log(days)), min_size=5)
+
+    assert regimes['start'].tolist() == [40, -1]
+    assert regimes['changepoints'].tolist() == [1, 0]
+    assert 4.0 < regimes['shift_sigma'][0] < 6.0
+    assert abs(regimes['after'][0] - regimes['before'][0] - 5.0) < 1.0
+
+
+if __name__ == "__main__":
+    tests = [test_find_last_regime_step]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
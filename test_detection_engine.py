@@ -0,0 +1,85 @@
+"""
+Test Detection Engine
+z-score scoring and severity of detection/engine.py against an in-memory
+baseline (no BigQuery access needed)
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.detection.engine import DetectionEngine
+from src.detection.zscore import severity_codes, SEVERITY_LEVELS
+from src.models.anomaly import Severity
+from src.models.baseline import BaselineStats
+from src.utils.config import Config
+
+
+class StaticBaselines:
+    """Serves fixed baselines in place of a BaselineCalculator"""
+
+    def __init__(self, baselines):
+        self.baselines = baselines
+
+    def get_latest_baselines(self, metric_names, segment_key=None):
+        return {name: self.baselines.get(name) for name in metric_names}
+
+    def get_segment_baselines(self, metric_name):
+        return []
+
+
+def make_engine() -> DetectionEngine:
+    config = Config()
+    config.update('detection.detectors', [
+        {'name': 'error_rate', 'metric': 'error_rate', 'priority': 1, 'method': 'z_score', 'threshold': 2.5}
+    ])
+    config.update('detection.min_confidence', 0.7)
+    baseline = BaselineStats(
+        baseline_id='baseline-error_rate', metric_name='error_rate', mean=10.0, std_dev=2.0,
+        min_value=2.0, max_value=18.0, p50=10.0, p95=13.3, p99=14.7, calculated_at=datetime.now(),
+        lookback_days=30, sample_count=1000, data_source='cloud_workload_dataset'
+    )
+    return DetectionEngine(config, StaticBaselines({'error_rate': baseline}))
+
+
+def test_severity_codes():
+    """|z| maps to severities at the 1.5/2/3/5 sigma edges"""
+    codes = severity_codes(np.array([0.0, 1.5, 1.6, 2.5, 3.5, 6.0]))
+    assert [SEVERITY_LEVELS[c] for c in codes] == [
+        Severity.INFO, Severity.INFO, Severity.LOW, Severity.MEDIUM, Severity.HIGH, Severity.CRITICAL
+    ]
+
+
+def test_z_score_detection():
+    """Rows fire at the detector threshold in both directions, with the z-score as sigma"""
+    engine = make_engine()
+    metrics = np.array(['error_rate'] * 5 + ['unwatched', 'error_rate'])
+    values = np.array([10.0, 14.9, 16.5, 21.0, 3.0, 1e9, np.nan])
+
+    scores = engine.score(metrics, values)
+    anomalies = engine.detect(metrics, values)
+
+    assert np.allclose(scores['z'][:5], [0.0, 2.45, 3.25, 5.5, -3.5])
+    assert [a.current_value for a in anomalies] == [16.5, 21.0, 3.0]
+    assert [a.severity for a in anomalies] == [Severity.HIGH, Severity.CRITICAL, Severity.HIGH]
+    assert np.allclose([a.deviation_sigma for a in anomalies], [3.25, 5.5, 3.5])
+    assert np.allclose([a.deviation_percentage for a in anomalies], [65.0, 110.0, -70.0])
+    assert all(a.baseline_value == 10.0 and a.baseline_id == 'baseline-error_rate' for a in anomalies)
+    assert all(a.detection_method == 'z-score' and a.confidence >= 0.7 for a in anomalies)
+
+
+if __name__ == "__main__":
+    tests = [test_severity_codes, test_z_score_detection]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,84 @@
+"""
+Test Local Baseline Store
+Save/load round trip of baseline/local_backend.py LocalBaselineStore in a
+temporary directory (no BigQuery access needed)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.baseline.local_backend import LocalBaselineStore
+from src.baseline.sketch import KLLSketch
+from src.models.baseline import BaselineStats
+
+
+def make_baseline(calculated_at: datetime, mean: float, segment_key=None, **fields) -> BaselineStats:
+    return BaselineStats(
+        baseline_id=f"baseline-error_rate-{calculated_at:%Y%m%d}-{segment_key}", metric_name='error_rate',
+        mean=mean, std_dev=0.5, min_value=0.0, max_value=4.0, p50=mean, p95=3.0, p99=3.5,
+        calculated_at=calculated_at, lookback_days=30, sample_count=500,
+        data_source='cloud_workload_dataset', segment_key=segment_key, **fields
+    )
+
+
+def test_round_trip_latest():
+    """The newest global baseline comes back with its percentiles, sketch and timestamps"""
+    sketch = KLLSketch(seed=0).update(np.random.default_rng(0).normal(2.0, 0.5, 5_000)).to_bytes()
+    modified = datetime(2025, 3, 1, 6, 0, tzinfo=timezone.utc)
+    newest = make_baseline(datetime(2025, 3, 2), 2.0, percentiles={90.0: 2.6, 99.9: 3.9},
+                           quantile_sketch=sketch, source_modified=modified, run_id='run-2')
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = LocalBaselineStore(store_dir)
+        store.save([make_baseline(datetime(2025, 3, 1), 1.0, run_id='run-1'), newest,
+                    make_baseline(datetime(2025, 3, 3), 9.0, segment_key='cluster=1')])
+
+        latest = store.get_latest('error_rate')
+        segments = store.get_latest_segments('error_rate')
+        missing = store.get_latest_many(['error_rate', 'cpu_utilization'])['cpu_utilization']
+        runs = [store.has_run('run-1'), store.has_run('run-2'), store.has_run('run-3')]
+
+    assert latest.baseline_id == newest.baseline_id and latest.mean == 2.0
+    assert latest.calculated_at == newest.calculated_at
+    assert latest.percentiles[90.0] == 2.6 and latest.percentiles[99.9] == 3.9
+    assert latest.quantile_sketch == sketch
+    assert latest.source_modified == modified
+    assert [s.segment_key for s in segments] == ['cluster=1'] and segments[0].mean == 9.0
+    assert missing is None
+    assert runs == [True, True, False]
+
+
+def test_mark_validated():
+    """validated_at is set on the listed baselines only"""
+    validated_at = datetime(2025, 3, 4, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = LocalBaselineStore(store_dir)
+        store.save([make_baseline(datetime(2025, 3, 1), 1.0),
+                    make_baseline(datetime(2025, 3, 2), 2.0, segment_key='cluster=1')])
+
+        updated = store.mark_validated(['baseline-error_rate-20250301-None'], validated_at)
+        latest = store.get_latest('error_rate')
+        segment = store.get_latest('error_rate', 'cluster=1')
+
+    assert updated == 1
+    assert latest.validated_at == validated_at
+    assert segment.validated_at is None
+
+
+if __name__ == "__main__":
+    tests = [test_round_trip_latest, test_mark_validated]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,57 @@
+"""
+Test Mahalanobis Detection
+Chi-square tail of detection/mahalanobis.py and group detector loading,
+on synthetic data (no BigQuery access needed)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.detection.mahalanobis import chi2_upper_tail
+from src.detection.engine import load_detectors
+
+
+def test_chi2_upper_tail_known_values():
+    """Tail probabilities at tabulated chi-square critical values"""
+    critical = {1: 3.841459, 2: 5.991465, 3: 7.814728, 4: 9.487729, 5: 11.070498}
+    for dof, value in critical.items():
+        assert abs(chi2_upper_tail(np.array([value]), dof)[0] - 0.05) < 1e-6, dof
+
+    assert abs(chi2_upper_tail(np.array([23.209251]), 10)[0] - 0.01) < 1e-6
+    assert abs(chi2_upper_tail(np.array([6.634897]), 1)[0] - 0.01) < 1e-6
+    assert np.allclose(chi2_upper_tail(np.array([0.0, 1.0, 4.0]), 2), np.exp(-np.array([0.0, 0.5, 2.0])))
+    assert abs(chi2_upper_tail(np.array([0.0]), 3)[0] - 1.0) < 1e-6
+
+
+def test_group_detector_replaces_member_detectors():
+    """Per-metric detectors of a watched group's metrics are not loaded"""
+    entries = [
+        {'name': 'error_rate', 'metric': 'error_rate', 'priority': 1, 'method': 'z_score'},
+        {'name': 'cpu_spike', 'metric': 'cpu_utilization', 'priority': 2, 'method': 'percentile'},
+        {'name': 'disk', 'metric': 'disk_io', 'priority': 3, 'method': 'z_score'},
+        {'name': 'joint', 'group': 'workload', 'priority': 4, 'method': 'mahalanobis'},
+        {'name': 'joint_off', 'group': 'other', 'enabled': False, 'method': 'mahalanobis'}
+    ]
+    members = {'workload': ['error_rate', 'cpu_utilization'], 'other': ['disk_io']}
+
+    detectors = load_detectors(entries, 2.5, {}, members)
+
+    assert [d.name for d in detectors] == ['disk', 'joint']
+    assert [d.name for d in load_detectors(entries, 2.5, {})] == ['error_rate', 'cpu_spike', 'disk', 'joint']
+
+
+if __name__ == "__main__":
+    tests = [test_chi2_upper_tail_known_values, test_group_detector_replaces_member_detectors]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
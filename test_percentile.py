@@ -0,0 +1,58 @@
+"""
+Test Percentile Scoring
+Row-wise search and tail probabilities of detection/percentile.py on
+synthetic quantile tables (no BigQuery access needed)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.detection.percentile import (
+    row_searchsorted, upper_tail_probabilities, normal_upper_quantile, BASE_RANK_GRID
+)
+
+
+def test_row_searchsorted_matches_numpy():
+    """Every (row, value) pair lands where np.searchsorted(side='right') puts it"""
+    rng = np.random.default_rng(4)
+    table = np.sort(np.round(rng.normal(0.0, 3.0, (40, 101))), axis=1)  # rounded: many ties
+    rows = rng.integers(0, table.shape[0], 5_000)
+    values = np.round(rng.normal(0.0, 4.0, rows.size) * 2) / 2
+
+    expected = [np.searchsorted(table[r], v, side='right') for r, v in zip(rows, values)]
+
+    assert row_searchsorted(table, rows, values).tolist() == expected
+
+
+def test_upper_tail_probabilities():
+    """Knots give 1 - rank, the floor holds up to the maximum, and the tail keeps falling past it"""
+    table = np.vstack([BASE_RANK_GRID * 2.0, BASE_RANK_GRID + 1000.0])  # max 200 and 1100
+    rows = np.array([0, 0, 0, 0, 1, 1, 0, 0])
+    values = np.array([100.0, 190.0, 199.99, 200.0, 1000.0, np.nan, 210.0, 1e6])
+    counts = np.full(values.size, 299)
+
+    tail = upper_tail_probabilities(table, BASE_RANK_GRID, rows, values, counts)
+
+    assert np.allclose(tail[:5], [0.5, 0.05, 1 / 300, 1 / 300, 1.0])
+    assert np.isnan(tail[5])
+    # 210 is five p99-max spreads (2.0) past the maximum
+    assert np.isclose(tail[6], np.exp(-5.0) / 300)
+    assert tail[7] == 0.0
+    assert normal_upper_quantile(tail[7:8])[0] > 30.0
+
+
+if __name__ == "__main__":
+    tests = [test_row_searchsorted_matches_numpy, test_upper_tail_probabilities]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,57 @@
+"""
+Test KLL Quantile Sketch
+Merge accuracy and serialization of baseline/sketch.py on synthetic data
+(no BigQuery access needed)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.baseline.sketch import KLLSketch, rank_error_bound
+
+
+def test_kll_merge_rank_error():
+    """Merged sketches answer quantiles within the published rank error bound"""
+    rng = np.random.default_rng(7)
+    left = rng.normal(100.0, 15.0, 60_000)
+    right = rng.lognormal(4.0, 0.5, 40_000)
+    merged = KLLSketch(seed=1).update(left).merge(KLLSketch(seed=2).update(right))
+
+    values = np.sort(np.concatenate([left, right]))
+    ranks = np.linspace(0.01, 0.99, 99)
+    true_ranks = np.searchsorted(values, merged.quantiles(ranks), side='right') / values.size
+
+    assert len(merged) == values.size
+    assert not merged.is_exact
+    assert merged.min_value == values[0] and merged.max_value == values[-1]
+    assert np.abs(true_ranks - ranks).max() <= rank_error_bound(merged.k)
+    assert merged.num_retained < 5 * merged.k
+
+
+def test_kll_serialize_round_trip():
+    """to_bytes/from_bytes preserves every query answer"""
+    sketch = KLLSketch(k=64, seed=3).update(np.random.default_rng(3).exponential(2.0, 10_000))
+    restored = KLLSketch.from_bytes(sketch.to_bytes())
+    ranks = np.linspace(0.0, 1.0, 21)
+
+    assert (restored.k, restored.n) == (sketch.k, sketch.n)
+    assert (restored.min_value, restored.max_value) == (sketch.min_value, sketch.max_value)
+    assert np.array_equal(restored.quantiles(ranks), sketch.quantiles(ranks))
+    assert restored.to_bytes() == sketch.to_bytes()
+
+
+if __name__ == "__main__":
+    tests = [test_kll_merge_rank_error, test_kll_serialize_round_trip]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,68 @@
+"""
+Test Holt-Winters Smoothing
+State recursion of baseline/smoothing.py across refreshes, on synthetic
+data (no BigQuery access needed)
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.baseline.smoothing import init_state, update_state, pad_buckets, refresh_window
+
+
+def daily_buckets(values: np.ndarray, first_day: str) -> dict:
+    """count/sum/sum_sq grids of one series with one value per day (NaN = no data)"""
+    observed = ~np.isnan(values)
+    return {
+        'count': observed.astype(np.float64)[None, :],
+        'sum': np.where(observed, values, 0.0)[None, :],
+        'sum_sq': np.where(observed, values * values, 0.0)[None, :],
+        'days': np.datetime64(first_day, 'D') + np.arange(values.size),
+        'shift': np.zeros(1)
+    }
+
+
+def test_smoothing_state_continues_across_gap():
+    """Feeding a series in two refreshes with a gap padded in gives the one-pass state"""
+    rng = np.random.default_rng(11)
+    days = np.arange(70)
+    values = 50.0 + 0.1 * days + 5.0 * np.sin(2 * np.pi * days / 7) + rng.normal(0.0, 1.0, days.size)
+    values[45:52] = np.nan  # no data for a week
+
+    one_pass = update_state(init_state(daily_buckets(values, '2024-01-01'), 7),
+                            daily_buckets(values, '2024-01-01'), 0.3, 0.1, 0.2)
+
+    first = daily_buckets(values[:45], '2024-01-01')
+    state = update_state(init_state(first, 7), first, 0.3, 0.1, 0.2)
+    later = pad_buckets(daily_buckets(values[52:], '2024-02-22'), np.datetime64('2024-02-15'))
+    assert later['days'][0] == np.datetime64('2024-02-15') and later['count'].shape == (1, 25)
+    state = update_state(state, later, 0.3, 0.1, 0.2)
+
+    for key in ('level', 'trend', 'season', 'resid_var', 'count'):
+        assert np.allclose(state[key], one_pass[key]), key
+
+
+def test_refresh_window_first_fit():
+    """A first fit reads the lookback window only when the time window is enabled"""
+    since, until = refresh_window(None, 30)
+    assert until - since == np.timedelta64(30, 'D')
+
+    since, until = refresh_window(None, 30, windowed=False)
+    assert since is None and until.dtype == np.dtype('datetime64[D]')
+
+
+if __name__ == "__main__":
+    tests = [test_smoothing_state_continues_across_gap, test_refresh_window_first_fit]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
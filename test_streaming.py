@@ -0,0 +1,75 @@
+"""
+Test Streaming Detectors
+CUSUM charts of detection/streaming.py on synthetic series (no BigQuery
+access needed)
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.detection.streaming import StreamingDetector
+
+
+def test_cusum_alarm_and_reset():
+    """A 2-sigma shift alarms after h / (shift - k) steps, then the sums restart"""
+    detector = StreamingDetector('cusum', k=0.5, h=5.0)
+    shifted = np.r_[np.zeros(10), np.full(8, 2.0)]
+    series = np.r_[np.zeros(shifted.size), np.ones(shifted.size)].astype(np.int64)
+    values = np.r_[shifted, np.zeros(shifted.size)]
+    order = np.r_[np.arange(shifted.size), np.arange(shifted.size)]
+
+    result = detector.update(series, values, order,
+                             target_mean=np.zeros(values.size), target_std=np.ones(values.size))
+
+    # +1.5 per shifted step: 1.5, 3, 4.5, 6 > h, then again from 0
+    assert np.flatnonzero(result['alarm']).tolist() == [13, 17]
+    assert np.allclose(result['shift'][[13, 17]], 2.0)
+    assert not result['alarm'][shifted.size:].any()
+    assert len(detector) == 2
+
+
+def test_cusum_alarm_with_warmup_target():
+    """Without a target the first warmup observations of each series fix it"""
+    rng = np.random.default_rng(2)
+    detector = StreamingDetector('cusum', warmup=50)
+    values = np.r_[rng.normal(20.0, 2.0, 50), rng.normal(20.0, 2.0, 50), rng.normal(28.0, 2.0, 20)]
+
+    result = detector.update(np.zeros(values.size, dtype=np.int64), values)
+
+    assert (result['samples'][:50] == 0).all() and (result['samples'][50:] == 50).all()
+    assert not result['alarm'][:100].any()
+    assert result['alarm'][100:].any()
+
+
+def test_cusum_resumes_from_snapshot():
+    """A detector reopened from its state directory continues the same sums"""
+    with tempfile.TemporaryDirectory() as state_dir:
+        detector = StreamingDetector('cusum', state_path=state_dir, k=0.5, h=5.0)
+        detector.update(np.zeros(3, dtype=np.int64), np.full(3, 2.0), None, np.zeros(3), np.ones(3))
+        detector.snapshot()
+        del detector
+
+        reopened = StreamingDetector('cusum', state_path=state_dir, k=0.5, h=5.0)
+        result = reopened.update(np.zeros(1, dtype=np.int64), np.array([2.0]), None,
+                                 np.zeros(1), np.ones(1))
+
+    # 4.5 carried over + 1.5 crosses h on the first observation after the restart
+    assert result['alarm'].tolist() == [True]
+
+
+if __name__ == "__main__":
+    tests = [test_cusum_alarm_and_reset, test_cusum_alarm_with_warmup_target, test_cusum_resumes_from_snapshot]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,94 @@
+"""
+Test Bulk Baseline Writer
+Load job ID idempotency of baseline/writer.py against an in-memory job
+registry (no BigQuery access needed)
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pyarrow.parquet as pq
+from google.cloud.exceptions import Conflict
+
+from src.baseline.writer import BaselineWriter
+from src.models.baseline import BaselineStats
+
+
+class LoadJob:
+    def __init__(self, rows: int, error_result=None):
+        self.rows = rows
+        self.error_result = error_result
+
+    def result(self):
+        return self
+
+
+class JobRegistry:
+    """Accepts load jobs like BigQuery: a job ID can only be used once"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def load_table_from_file(self, buffer, table_id, job_id=None, job_config=None):
+        if job_id in self.jobs:
+            raise Conflict(f"Already Exists: Job {job_id}")
+        self.jobs[job_id] = LoadJob(pq.read_table(buffer).num_rows)
+        return self.jobs[job_id]
+
+    def get_job(self, job_id):
+        return self.jobs[job_id]
+
+    def loaded_rows(self) -> int:
+        return sum(job.rows for job in self.jobs.values() if job.error_result is None)
+
+
+def make_baseline(metric_name: str) -> BaselineStats:
+    return BaselineStats(
+        baseline_id=f"baseline-{metric_name}", metric_name=metric_name, mean=1.0, std_dev=0.5,
+        min_value=0.0, max_value=3.0, p50=1.0, p95=2.0, p99=2.5, calculated_at=datetime(2025, 1, 1),
+        lookback_days=30, sample_count=100, data_source='cloud_workload_dataset'
+    )
+
+
+def write(client: JobRegistry, run_id: str) -> int:
+    writer = BaselineWriter(client, 'project.dataset.Baseline', run_id=run_id)
+    writer.add(make_baseline('error_rate'))
+    writer.add(make_baseline('cpu_utilization'))
+    return writer.flush()
+
+
+def test_retried_run_is_not_appended_twice():
+    """A second commit of the same run ID finds its job and writes nothing"""
+    client = JobRegistry()
+
+    assert write(client, '20250101T020000-abc') == 2
+    assert write(client, '20250101T020000-abc') == 0
+    assert write(client, '20250102T020000-def') == 2
+    assert list(client.jobs) == ['baseline_load_20250101T020000-abc', 'baseline_load_20250102T020000-def']
+    assert client.loaded_rows() == 4
+
+
+def test_failed_job_is_retried_with_new_id():
+    """A run whose earlier job failed is loaded under a retry job ID"""
+    client = JobRegistry()
+    client.jobs['baseline_load_backfill-1_t_2025-01-01'] = LoadJob(0, error_result={'reason': 'invalid'})
+
+    assert write(client, 'backfill-1/t/2025-01-01') == 2
+    assert client.jobs['baseline_load_backfill-1_t_2025-01-01_retry1'].rows == 2
+    assert client.loaded_rows() == 2
+
+
+if __name__ == "__main__":
+    tests = [test_retried_run_is_not_appended_twice, test_failed_job_is_retried_with_new_id]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[OK] {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"[FAILED] {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)